@@ -0,0 +1,77 @@
+import os
+import threading
+from agents import AsyncOpenAI, OpenAIChatCompletionsModel
+from my_agents.Agent_manager import manager_agent
+from my_agents.meeting_canceller import meeting_canceller_agent
+from my_agents.meeting_rescheduler import meeting_rescheduler_agent
+from my_agents.meeting_update import meeting_update_agent
+from my_agents.meeting_scheduler import meeting_scheduler_agent
+from my_agents.meeting_viewer import meeting_viewer_agent
+from instrumentation_hooks import InstrumentationHooks
+
+MODEL_NAME = "openai/gpt-4o-mini"
+# OPENROUTER_BASE_URL points at another OpenAI-compatible endpoint (e.g. benchmarks/fake_llm.py)
+DEFAULT_BASE_URL = "https://openrouter.ai/api/v1"
+
+
+def build_model(api_key=None, base_url=None):
+    """
+    Returns the chat-completions model backed by one shared AsyncOpenAI client.
+    """
+    client = AsyncOpenAI(
+        api_key=api_key or os.getenv("OPENROUTER_API_KEY"),
+        base_url=base_url or os.getenv("OPENROUTER_BASE_URL", DEFAULT_BASE_URL),
+    )
+    return OpenAIChatCompletionsModel(model=MODEL_NAME, openai_client=client)
+
+
+class AgentGraph:
+    """
+    The manager agent and its sub-agents, built once and shared by every conversation.
+    """
+
+    def __init__(self, model):
+        self.viewer = meeting_viewer_agent(model=model)
+        self.scheduler = meeting_scheduler_agent(model=model)
+        self.canceller = meeting_canceller_agent(model=model)
+        self.rescheduler = meeting_rescheduler_agent(model=model)
+        self.updater = meeting_update_agent(model=model)
+        self.manager = manager_agent(
+            model=model,
+            viewer=self.viewer,
+            scheduler=self.scheduler,
+            canceller=self.canceller,
+            rescheduler=self.rescheduler,
+            updater=self.updater,
+        )
+        # Local intent router targets: unambiguous messages skip the manager's LLM hop
+        self.agents_by_intent = {
+            "view": self.viewer,
+            "schedule": self.scheduler,
+            "cancel": self.canceller,
+            "reschedule": self.rescheduler,
+            "update": self.updater,
+        }
+        # Per-agent and per-LLM-call spans (see instrumentation_hooks.py)
+        self.hooks = InstrumentationHooks()
+
+    def agent_for(self, intent):
+        return self.agents_by_intent.get(intent, self.manager)
+
+    def intent_of(self, agent):
+        return next((i for i, a in self.agents_by_intent.items() if a is agent), None)
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_agent_graph():
+    """
+    Returns the process-wide agent graph (one model client for all conversations).
+    """
+    global _graph
+    with _graph_lock:
+        if _graph is None:
+            _graph = AgentGraph(build_model())
+        return _graph
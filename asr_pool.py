@@ -0,0 +1,154 @@
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+def _warm_worker():
+    """
+    Worker initializer: loads the configured ASR model once per worker process.
+    """
+    from voice_input import get_asr_model
+    get_asr_model()
+
+
+def _transcribe_job(audio):
+    from voice_input import transcribe_audio
+    start = time.perf_counter()
+    text = transcribe_audio(audio)
+    return text, time.perf_counter() - start
+
+
+class TranscriptionPool:
+    """
+    Transcribes audio in worker processes that each own an ASR model,
+    so the Streamlit script thread (and other sessions) are never blocked.
+
+    `workers` limits concurrent transcriptions; at most `max_queue` jobs may be
+    waiting or running, and further submissions raise queue.Full.
+    """
+
+    def __init__(self, workers=1, max_queue=8):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = self._new_executor()
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _new_executor(self):
+        # spawn: forking a process that runs Streamlit/agent threads is unsafe
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_warm_worker)
+
+    def submit(self, audio):
+        """
+        Queues a float32 16 kHz buffer for transcription and returns a job id.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise queue.Full(f"Transcription queue is full ({self.max_queue} jobs)")
+        try:
+            try:
+                future = self._executor.submit(_transcribe_job, audio)
+            except BrokenProcessPool:
+                # A worker died (e.g. out of memory); start a fresh pool once
+                self._executor = self._new_executor()
+                future = self._executor.submit(_transcribe_job, audio)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            job_id = next(self._ids)
+            self._jobs[job_id] = future
+        future.add_done_callback(self._on_done)
+        return job_id
+
+    def _on_done(self, future):
+        self._slots.release()
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+                self._busy_seconds += future.result()[1]
+
+    def poll(self, job_id):
+        """
+        Returns {"status": "Pending"} while the job runs, then its result once
+        ({"status": "Done", "text": ...} or {"status": "Failed", "message": ...}).
+        """
+        with self._lock:
+            future = self._jobs.get(job_id)
+            if future is None:
+                return {"status": "Failed", "message": f"Unknown transcription job {job_id}."}
+            if not future.done():
+                return {"status": "Pending"}
+            del self._jobs[job_id]
+        try:
+            text, _ = future.result()
+            return {"status": "Done", "text": text}
+        except Exception as e:
+            return {"status": "Failed", "message": f"Transcription failed: {e}"}
+
+    def wait(self, job_id, timeout=None, interval=0.1):
+        """
+        Polls until the job finishes or `timeout` seconds pass.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            result = self.poll(job_id)
+            if result["status"] != "Pending":
+                return result
+            if deadline is not None and time.monotonic() >= deadline:
+                return result
+            time.sleep(interval)
+
+    def metrics(self):
+        """
+        Queue-depth and throughput counters for monitoring.
+        """
+        with self._lock:
+            in_flight = sum(1 for f in self._jobs.values() if not f.done())
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": in_flight,
+                "queued": max(0, in_flight - self.workers),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "busy_seconds": round(self._busy_seconds, 3),
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_transcription_pool():
+    """
+    Process-wide pool shared by all Streamlit sessions.
+    ASR_WORKERS sets the concurrency limit, ASR_MAX_QUEUE the queue bound.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TranscriptionPool(
+                workers=int(os.getenv("ASR_WORKERS", "1")),
+                max_queue=int(os.getenv("ASR_MAX_QUEUE", "8")))
+        return _pool
@@ -0,0 +1,119 @@
+"""
+CPU latency benchmark for the ASR backends.
+
+Transcribes a fixed set of local WAV fixtures with each configuration and
+reports real-time factor (processing time / audio duration), p50/p95 latency
+per file and peak RSS. Every configuration runs in its own interpreter so
+model memory does not leak between measurements.
+
+Configurations are ENGINE:MODEL:COMPUTE, e.g. whisper:base:fp32,
+whisper:tiny:int8, faster-whisper:base:int8.
+
+Usage:
+    python benchmarks/asr_bench.py [--fixtures benchmarks/fixtures] [--runs 3]
+        [--config whisper:base:fp32 --config faster-whisper:base:int8] [--json]
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(ROOT, "benchmarks", "fixtures")
+DEFAULT_CONFIGS = ["whisper:base:fp32", "whisper:base:int8", "whisper:tiny:fp32"]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(config, fixtures, runs):
+    """
+    Runs in the child interpreter: loads one configuration and times it.
+    """
+    sys.path.insert(0, ROOT)
+    from voice_input import SAMPLE_RATE, get_asr_model, load_wav
+
+    engine, model, compute = config.split(":")
+    clips = [(path, load_wav(path)) for path in fixtures]
+
+    start = time.perf_counter()
+    asr = get_asr_model(engine, model, compute)
+    load_seconds = time.perf_counter() - start
+    asr.transcribe(clips[0][1])  # warm-up, not measured
+
+    latencies = []
+    audio_seconds = 0.0
+    transcripts = {}
+    for _ in range(runs):
+        for path, audio in clips:
+            start = time.perf_counter()
+            transcripts[os.path.basename(path)] = asr.transcribe(audio)
+            latencies.append(time.perf_counter() - start)
+            audio_seconds += len(audio) / SAMPLE_RATE
+
+    return {
+        "config": config,
+        "load_seconds": load_seconds,
+        "rtf": sum(latencies) / audio_seconds,
+        "p50_seconds": percentile(latencies, 50),
+        "p95_seconds": percentile(latencies, 95),
+        # ru_maxrss is KiB on Linux
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "transcripts": transcripts,
+    }
+
+
+def run_config(config, fixtures, runs):
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--worker", config,
+         "--runs", str(runs), *fixtures],
+        cwd=ROOT, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):])
+    return {"config": config, "error": proc.stderr.strip().splitlines()[-1:] or ["no output"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="directory of .wav files")
+    parser.add_argument("--config", action="append", help="ENGINE:MODEL:COMPUTE (repeatable)")
+    parser.add_argument("--runs", type=int, default=3, help="passes over the fixtures per config")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("files", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print("__BENCH__" + json.dumps(measure(args.worker, args.files, args.runs)))
+        return
+
+    fixtures = sorted(glob.glob(os.path.join(args.fixtures, "*.wav")))
+    if not fixtures:
+        sys.exit(f"No .wav fixtures found in {args.fixtures}")
+
+    results = [run_config(config, fixtures, args.runs) for config in args.config or DEFAULT_CONFIGS]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{len(fixtures)} fixtures x {args.runs} runs")
+    print(f"{'config':<28} {'load s':>7} {'RTF':>6} {'p50 s':>7} {'p95 s':>7} {'RSS MB':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['config']:<28} failed: {r['error'][0]}")
+            continue
+        print(f"{r['config']:<28} {r['load_seconds']:>7.2f} {r['rtf']:>6.3f} "
+              f"{r['p50_seconds']:>7.3f} {r['p95_seconds']:>7.3f} {r['peak_rss_mb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+In-memory Google Calendar v3 server for offline benchmarks.
+
+Implements the events endpoints the app uses (list with timeMin/timeMax,
+pageToken and syncToken, get, insert, update, patch, delete), the `fields`
+partial-response selector and the multipart batch endpoint, and counts every
+API call and byte on the wire. inject_fault() makes upcoming calls fail with
+429/403/5xx (optionally with Retry-After) to exercise the client's retries, or
+apply a call and then fail it, as if the response was lost.
+Point the app at it with CALENDAR_API_ROOT=<server.url>.
+"""
+import datetime
+import email
+import itertools
+import json
+import threading
+import urllib.parse
+import uuid
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EVENTS_PREFIX = "/calendar/v3/calendars/"
+BATCH_PATH = "/batch/calendar/v3"
+
+
+def _event_time(value):
+    if "dateTime" in value:
+        return datetime.datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00"))
+    return datetime.datetime.fromisoformat(value["date"]).replace(tzinfo=datetime.timezone.utc)
+
+
+def _error(status, reason, message):
+    return status, {"error": {"code": status, "message": message,
+                              "errors": [{"reason": reason, "message": message}]}}
+
+
+def _parse_fields(spec):
+    """
+    Parses a partial-response selector such as "items(id,start),nextPageToken" into a nested dict.
+    """
+    tree, stack, name = {}, [], ""
+    node = tree
+    for ch in spec + ",":
+        if ch not in ",()":
+            name += ch
+            continue
+        if name.strip():
+            node.setdefault(name.strip(), {})
+        if ch == "(":
+            stack.append(node)
+            node = node[name.strip()]
+        elif ch == ")":
+            node = stack.pop()
+        name = ""
+    return tree
+
+
+def _select(value, tree):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_select(v, tree) for v in value]
+    if isinstance(value, dict):
+        return {k: _select(value[k], sub) for k, sub in tree.items() if k in value}
+    return value
+
+
+class FakeCalendar:
+    """
+    The calendar state and request dispatcher, independent of HTTP.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = {}        # event_id -> event (deleted events stay as cancelled tombstones)
+        self.changed_at = {}    # event_id -> sequence number of its last change
+        self.sequence = 0
+        self._ids = itertools.count(1)
+        self._faults = deque()  # (status, reason, retry_after, after) for the next calls
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"round_trips": 0, "api_calls": Counter(), "bytes_in": 0, "bytes_out": 0,
+                      "faults": 0}
+
+    def inject_fault(self, status=503, times=1, retry_after=None, reason=None, after=False):
+        """
+        Fails the next `times` API calls (batch items included) with `status`.
+        With `after`, each call is applied first and only its response is replaced.
+        Defaults: 429/403 -> rateLimitExceeded, others -> backendError.
+        """
+        reason = reason or ("rateLimitExceeded" if status in (403, 429) else "backendError")
+        with self.lock:
+            self._faults.extend([(status, reason, retry_after, after)] * times)
+
+    def _touch(self, event):
+        self.sequence += 1
+        event["updated"] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        event["etag"] = f'"{self.sequence}"'
+        self.events[event["id"]] = event
+        self.changed_at[event["id"]] = self.sequence
+
+    def add_event(self, event):
+        """
+        Seeds an event directly (not counted as an API call). Returns the stored copy.
+        """
+        with self.lock:
+            return self._insert(dict(event))
+
+    def _insert(self, body):
+        event_id = body.get("id") or f"evt{next(self._ids):05d}"
+        # Server-assigned fields as Google returns them, so full payloads have a realistic size
+        owner = {"email": "owner@example.com", "self": True}
+        event = {**body, "id": event_id, "status": "confirmed", "kind": "calendar#event",
+                 "htmlLink": f"https://calendar.google.com/event?eid={event_id}",
+                 "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                 "creator": owner, "organizer": owner, "iCalUID": f"{event_id}@google.com",
+                 "sequence": 0, "reminders": {"useDefault": True}, "eventType": "default"}
+        self._touch(event)
+        return event
+
+    def _live(self, event_id):
+        event = self.events.get(event_id)
+        if event is None:
+            return None, _error(404, "notFound", "Not Found")
+        if event["status"] == "cancelled":
+            return None, _error(410, "deleted", "Resource has been deleted")
+        return event, None
+
+    def dispatch(self, method, path, query, body, batched=False):
+        """
+        Handles one Calendar API call. Returns (status, payload or None, extra headers).
+        """
+        with self.lock:
+            fault = self._faults.popleft() if self._faults else None
+            if fault:
+                self.stats["faults"] += 1
+        if fault:
+            status, reason, retry_after, after = fault
+            if after:
+                self._dispatch(method, path, query, body, batched)
+            headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+            return (*_error(status, reason, f"Injected {status} {reason}"), headers)
+
+        status, payload = self._dispatch(method, path, query, body, batched)
+        if payload is not None and status < 400 and query.get("fields"):
+            payload = _select(payload, _parse_fields(query["fields"]))
+        return status, payload, {}
+
+    def _dispatch(self, method, path, query, body, batched):
+        if not path.startswith(EVENTS_PREFIX):
+            return _error(404, "notFound", f"No route for {path}")
+        parts = [urllib.parse.unquote(p) for p in path[len(EVENTS_PREFIX):].split("/")]
+        if len(parts) < 2 or parts[1] != "events":
+            return _error(404, "notFound", f"No route for {path}")
+        event_id = parts[2] if len(parts) > 2 else None
+
+        with self.lock:
+            if batched:
+                self.stats["api_calls"]["batch_item"] += 1
+            if event_id is None and method == "GET":
+                self.stats["api_calls"]["events.list"] += 1
+                return self._list(query)
+            if event_id is None and method == "POST":
+                self.stats["api_calls"]["events.insert"] += 1
+                if (body or {}).get("id") in self.events:
+                    return _error(409, "duplicate", "The requested identifier already exists.")
+                return 200, self._insert(body or {})
+
+            operation = {"GET": "get", "PUT": "update", "PATCH": "patch", "DELETE": "delete"}.get(method)
+            if operation is None:
+                return _error(405, "methodNotAllowed", method)
+            self.stats["api_calls"][f"events.{operation}"] += 1
+            event, error = self._live(event_id)
+            if error:
+                return error
+            if operation == "get":
+                return 200, event
+            if operation == "delete":
+                self._touch({"id": event_id, "status": "cancelled"})
+                return 204, None
+            if operation == "update":
+                server_fields = ("kind", "htmlLink", "created", "creator", "organizer", "iCalUID",
+                                 "sequence", "eventType")
+                updated = {**(body or {}), "id": event_id, "status": "confirmed",
+                           **{k: event[k] for k in server_fields if k in event}}
+            else:
+                updated = {**event, **(body or {})}
+            self._touch(updated)
+            return 200, updated
+
+    def _list(self, query):
+        max_results = int(query.get("maxResults", 250))
+        offset = int(query.get("pageToken", 0))
+
+        if "syncToken" in query:
+            try:
+                since = int(query["syncToken"].split("-", 1)[1])
+            except (IndexError, ValueError):
+                return _error(410, "fullSyncRequired", "Sync token is no longer valid")
+            items = [e for e in self.events.values() if self.changed_at[e["id"]] > since]
+        else:
+            items = [e for e in self.events.values() if e["status"] != "cancelled"]
+            if "timeMin" in query:
+                time_min = datetime.datetime.fromisoformat(query["timeMin"].replace("Z", "+00:00"))
+                items = [e for e in items if _event_time(e["end"]) > time_min]
+            if "timeMax" in query:
+                time_max = datetime.datetime.fromisoformat(query["timeMax"].replace("Z", "+00:00"))
+                items = [e for e in items if _event_time(e["start"]) < time_max]
+            items.sort(key=lambda e: _event_time(e["start"]))
+
+        page = items[offset:offset + max_results]
+        response = {"kind": "calendar#events", "items": page}
+        if offset + max_results < len(items):
+            response["nextPageToken"] = str(offset + max_results)
+        else:
+            response["nextSyncToken"] = f"sync-{self.sequence}"
+        return 200, response
+
+
+class _Handler(BaseHTTPRequestHandler):
+    calendar = None  # set per server
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length) if length else b""
+        with self.calendar.lock:
+            self.calendar.stats["round_trips"] += 1
+            self.calendar.stats["bytes_in"] += length
+
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == BATCH_PATH:
+            status, content_type, payload = self._batch(raw)
+            headers = {}
+        else:
+            query = dict(urllib.parse.parse_qsl(url.query))
+            status, body, headers = self.calendar.dispatch(
+                self.command, url.path, query, json.loads(raw) if raw else None)
+            content_type = "application/json"
+            payload = json.dumps(body).encode() if body is not None else b""
+
+        with self.calendar.lock:
+            self.calendar.stats["bytes_out"] += len(payload)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _batch(self, raw):
+        message = email.message_from_bytes(
+            b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + raw)
+        boundary = f"batch_{uuid.uuid4().hex}"
+        chunks = []
+        for part in message.get_payload():
+            inner = part.get_payload().replace("\r\n", "\n")
+            head, _, body = inner.partition("\n\n")
+            method, target, _ = head.split("\n", 1)[0].split(" ", 2)
+            url = urllib.parse.urlsplit(target)
+            status, result, headers = self.calendar.dispatch(
+                method, url.path, dict(urllib.parse.parse_qsl(url.query)),
+                json.loads(body) if body.strip() else None, batched=True)
+            content = json.dumps(result) if result is not None else ""
+            extra = "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\n"
+                f"Content-ID: <response-{part['Content-ID'][1:-1]}>\r\n\r\n"
+                f"HTTP/1.1 {status} {'OK' if status < 400 else 'Error'}\r\n"
+                f"{extra}Content-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n"
+                f"{content}\r\n")
+        chunks.append(f"--{boundary}--\r\n")
+        return 200, f"multipart/mixed; boundary={boundary}", "".join(chunks).encode()
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _handle
+
+
+class FakeCalendarServer:
+    """
+    Serves a FakeCalendar on 127.0.0.1 from a background thread.
+    """
+
+    def __init__(self, calendar=None, port=0):
+        self.calendar = calendar or FakeCalendar()
+        handler = type("Handler", (_Handler,), {"calendar": self.calendar})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
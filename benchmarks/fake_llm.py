@@ -0,0 +1,148 @@
+"""
+Scripted OpenAI-compatible chat-completions server for offline benchmarks.
+
+Each request to POST /v1/chat/completions consumes the next scripted reply:
+    {"content": "text"}                               -> assistant message
+    {"tool": "name", "arguments": {...}}              -> one function/handoff call
+    {"tools": [("name", {...}), ...]}                 -> parallel calls
+Requests with "stream": true get the same reply as chat.completion.chunk events.
+Point an AsyncOpenAI client at it with base_url=<server.url>.
+"""
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ScriptExhausted(Exception):
+    pass
+
+
+class FakeChatModel:
+    """
+    Reply script plus request/byte counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.script = deque()
+        self._ids = itertools.count(1)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "bytes_in": 0, "bytes_out": 0, "messages_sent": 0}
+
+    def queue(self, *replies):
+        with self.lock:
+            self.script.extend(replies)
+
+    def complete(self, request):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["messages_sent"] += len(request.get("messages", []))
+            if not self.script:
+                raise ScriptExhausted("No scripted reply left for this request")
+            reply = self.script.popleft()
+            call_ids = self._ids
+
+        calls = reply.get("tools") or ([(reply["tool"], reply.get("arguments", {}))] if "tool" in reply else [])
+        message = {"role": "assistant", "content": reply.get("content")}
+        if calls:
+            message["tool_calls"] = [{
+                "id": f"call_{next(call_ids)}",
+                "type": "function",
+                "function": {"name": name, "arguments": json.dumps(arguments)},
+            } for name, arguments in calls]
+        return {
+            "id": f"chatcmpl-{next(call_ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "message": message,
+                         "finish_reason": "tool_calls" if calls else "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    model = None  # set per server
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            status, body = 404, {"error": {"message": f"No route for {self.path}"}}
+        else:
+            try:
+                status, body = 200, self.model.complete(request)
+            except ScriptExhausted as e:
+                status, body = 500, {"error": {"message": str(e)}}
+
+        if status == 200 and request.get("stream"):
+            return self._stream(length, body)
+        payload = json.dumps(body).encode()
+        with self.model.lock:
+            self.model.stats["bytes_in"] += length
+            self.model.stats["bytes_out"] += len(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _stream(self, length, completion):
+        """
+        Sends a completion as server-sent chat.completion.chunk events.
+        """
+        choice = completion["choices"][0]
+        message = choice["message"]
+        delta = {"role": "assistant"}
+        if message.get("content"):
+            delta["content"] = message["content"]
+        if message.get("tool_calls"):
+            delta["tool_calls"] = [{**call, "index": i} for i, call in enumerate(message["tool_calls"])]
+        base = {"id": completion["id"], "object": "chat.completion.chunk",
+                "created": completion["created"], "model": completion["model"]}
+        chunks = [
+            {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]},
+            {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": choice["finish_reason"]}]},
+            {**base, "choices": [], "usage": completion["usage"]},
+        ]
+        payload = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks).encode() + b"data: [DONE]\n\n"
+        with self.model.lock:
+            self.model.stats["bytes_in"] += length
+            self.model.stats["bytes_out"] += len(payload)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class FakeChatServer:
+    """
+    Serves a FakeChatModel on 127.0.0.1 from a background thread.
+    """
+
+    def __init__(self, model=None, port=0):
+        self.model = model or FakeChatModel()
+        handler = type("Handler", (_Handler,), {"model": self.model})
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
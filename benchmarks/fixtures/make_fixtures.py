@@ -0,0 +1,45 @@
+"""
+Regenerates the WAV clips used by benchmarks/asr_bench.py.
+
+The clips are synthetic and deterministic (16 kHz mono): voiced bursts with a
+syllable-rate envelope separated by short pauses over low background noise, at
+the lengths of typical spoken requests. They measure latency, real-time factor
+and memory; the transcripts they produce are not meaningful. Replace or add
+recorded speech clips here to benchmark accuracy as well.
+
+Usage:
+    python benchmarks/fixtures/make_fixtures.py
+"""
+import os
+import wave
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FS = 16000
+# (file name, seconds)
+CLIPS = [("request_2s.wav", 2), ("request_5s.wav", 5), ("request_9s.wav", 9)]
+
+
+def clip(seconds, rng):
+    t = np.arange(int(seconds * FS)) / FS
+    f0 = 120 + 30 * np.sin(2 * np.pi * 0.3 * t)  # slowly drifting pitch
+    phase = 2 * np.pi * np.cumsum(f0) / FS
+    tone = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, None)
+    pauses = (t % 1.5) < 1.2  # a 0.3 s pause every 1.5 s
+    return 6000 * syllables * pauses * tone / 2.6 + rng.normal(0, 60, len(t))
+
+
+def main():
+    rng = np.random.default_rng(17)
+    for name, seconds in CLIPS:
+        samples = np.clip(np.round(clip(seconds, rng)), -32768, 32767).astype("<i2")
+        with wave.open(os.path.join(HERE, name), "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(FS)
+            f.writeframes(samples.tobytes())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Offline cost benchmark: runs the meeting tools and full Runner turns against a
+local fake Calendar v3 server, a scripted fake chat-completions model and a
+local SMTP sink, so nothing touches Google, OpenRouter or a real mail server.
+
+For each operation it reports wall time, Calendar API calls (by method), HTTP
+round trips, bytes on the wire, LLM requests and emails delivered. It fails if
+any operation makes more Calendar API calls than benchmarks/offline_baseline.json,
+or if a flaky_* operation (the fake server injects 429/503 errors, or loses the
+response of a call it applied) does not recover through the client's retries.
+
+Usage:
+    python benchmarks/offline_bench.py [--events 200] [--json] [--update-baseline]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [ROOT, HERE]
+
+from fake_calendar import FakeCalendarServer  # noqa: E402
+from fake_llm import FakeChatServer  # noqa: E402
+from smtp_sink import SMTPSink  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "offline_baseline.json")
+PKT = datetime.timezone(datetime.timedelta(hours=5))
+SEED_HOURS = (9, 11, 14, 16)
+
+
+class Harness:
+    """
+    Starts the fake services, points the app at them and measures operations.
+    """
+
+    def __init__(self, events):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.calendar = FakeCalendarServer().start()
+        self.llm = FakeChatServer().start()
+        self.smtp = SMTPSink().start()
+        os.environ.update({
+            "CALENDAR_API_ROOT": self.calendar.url,
+            "SMTP_HOST": "127.0.0.1", "SMTP_PORT": str(self.smtp.port),
+            "SMTP_USER": "bench", "SMTP_PASS": "bench", "SMTP_USE_TLS": "0",
+            "EMAIL_FROM": "bot@example.com",
+            "OUTBOX_DB": os.path.join(self.tmp.name, "outbox.db"),
+            "CONTACTS_DB": os.path.join(self.tmp.name, "contacts.db"),
+            # Short backoffs keep the flaky_* operations quick
+            "CALENDAR_RETRY_BASE_DELAY": "0.05",
+        })
+        os.environ.pop("EVENT_STORE_DB", None)
+
+        # App modules read the environment on first use, so import them only now
+        from credential_store import DEFAULT_USER, get_credential_store
+        from google.oauth2.credentials import Credentials
+        # A static bearer token: the fake server does not check it and it never expires
+        get_credential_store().put_credentials(DEFAULT_USER, Credentials(token="offline-bench"), persist=False)
+
+        self.today = datetime.datetime.now(PKT).replace(minute=0, second=0, microsecond=0)
+        for i in range(events):
+            start = (self.today + datetime.timedelta(days=1 + i // len(SEED_HOURS))).replace(
+                hour=SEED_HOURS[i % len(SEED_HOURS)])
+            self.calendar.calendar.add_event({
+                "summary": f"Seed meeting {i + 1}",
+                "start": {"dateTime": start.isoformat(), "timeZone": "Asia/Karachi"},
+                "end": {"dateTime": (start + datetime.timedelta(hours=1)).isoformat(),
+                        "timeZone": "Asia/Karachi"},
+                "attendees": [{"email": f"person{i % 7}@example.com"}],
+            })
+
+    def close(self):
+        for server in (self.calendar, self.llm, self.smtp):
+            server.stop()
+        self.tmp.cleanup()
+
+    def measure(self, name, operation):
+        """
+        Runs one async operation and returns its cost report.
+        Emails are flushed after the clock stops (delivery is off the request path).
+        """
+        from calendar_setup import get_event_store
+        from notification_outbox import get_outbox
+
+        if not name.startswith("cold_"):
+            # Start every operation from an up-to-date mirror so counts are deterministic
+            get_event_store().sync(force=True)
+        for service in (self.calendar.calendar, self.llm.model):
+            service.reset_stats()
+        self.smtp.reset_stats()
+
+        start = time.perf_counter()
+        result = asyncio.run(operation())
+        wall = time.perf_counter() - start
+
+        outbox = get_outbox()
+        while outbox.pending_count():
+            outbox.dispatch_once()
+
+        stats = self.calendar.calendar.stats
+        calls = {k: v for k, v in sorted(stats["api_calls"].items()) if k != "batch_item"}
+        return {
+            "operation": name,
+            "wall_ms": round(wall * 1000, 1),
+            "api_calls": sum(calls.values()),
+            "api_calls_by_method": calls,
+            "round_trips": stats["round_trips"],
+            "faults": stats["faults"],
+            "bytes_in": stats["bytes_in"],
+            "bytes_out": stats["bytes_out"],
+            "llm_requests": self.llm.model.stats["requests"],
+            "llm_bytes": self.llm.model.stats["bytes_in"] + self.llm.model.stats["bytes_out"],
+            "emails": len(self.smtp.messages),
+            "result_status": _status_of(result),
+        }
+
+
+def _status_of(result):
+    if isinstance(result, dict):
+        return result.get("status")
+    if isinstance(result, str):
+        return "Text"
+    return type(result).__name__
+
+
+async def call_tool(tool, conversation_id, **arguments):
+    """
+    Invokes a @function_tool the way the Runner does, with a MeetingContext.
+    """
+    from agents.tool_context import ToolContext
+    from meeting_context import MeetingContext
+    raw = json.dumps(arguments)
+    ctx = ToolContext(context=MeetingContext(conversation_id), tool_name=tool.name,
+                      tool_call_id="bench", tool_arguments=raw)
+    result = await tool.on_invoke_tool(ctx, raw)
+    if isinstance(result, str):
+        try:
+            return json.loads(result)
+        except ValueError:
+            pass
+    return result
+
+
+def build_graph(base_url):
+    from agents import set_tracing_disabled
+    from agent_graph import AgentGraph, build_model
+    set_tracing_disabled(disabled=True)
+    return AgentGraph(build_model(api_key="offline-bench", base_url=base_url))
+
+
+def operations(harness):
+    """
+    Returns [(name, async callable)] in execution order.
+    """
+    from agents import Runner
+    from agents.handoffs import Handoff
+    from calendar_async import is_time_slot_free_async, list_upcoming_events_async
+    from meeting_context import MeetingContext
+    from my_agents import (cancel_meeting, cancel_meetings, find_contacts, reschedule_meeting,
+                           schedule_meeting, update_meeting)
+
+    graph = build_graph(harness.llm.url)
+    free_day = (harness.today + datetime.timedelta(days=60)).strftime("%Y-%m-%d")
+    new_day = (harness.today + datetime.timedelta(days=61)).strftime("%Y-%m-%d")
+    schedule_args = {
+        "organizer_name": "Sara",
+        "participants": [{"name": "Ali", "email": "ali@example.com"},
+                         {"name": "Hina", "email": "hina@example.com"}],
+        "meeting_date": free_day, "meeting_time": "11:00", "topic": "Budget",
+    }
+
+    async def pick_then(tool, conversation_id, **arguments):
+        # A user first sees the numbered list, then picks a meeting from it
+        await call_tool(tool, conversation_id)
+        return await call_tool(tool, conversation_id, selection_number=1, **arguments)
+
+    async def show_then(list_tool, tool, conversation_id, **arguments):
+        await call_tool(list_tool, conversation_id)
+        return await call_tool(tool, conversation_id, **arguments)
+
+    def flaky(operation, *faults):
+        # The fake server fails the next calls with (status, retry_after); the executor retries them
+        async def run():
+            for status, retry_after in faults:
+                harness.calendar.calendar.inject_fault(status, retry_after=retry_after)
+            return await operation()
+        return run
+
+    def lost_response(operation, summary=None):
+        # The next call is applied but answers 503, as if its response was lost; the
+        # retry must not repeat it (checked by counting events titled `summary`)
+        async def run():
+            harness.calendar.calendar.inject_fault(503, after=True)
+            result = await operation()
+            if summary is not None:
+                copies = [e for e in harness.calendar.calendar.events.values()
+                          if e["status"] != "cancelled" and e.get("summary") == summary]
+                if len(copies) != 1:
+                    return {"status": "Failed", "message": f"{len(copies)} copies of {summary!r}"}
+            return result
+        return run
+
+    def turn(message, conversation_id, *replies):
+        async def run():
+            harness.llm.model.queue(*replies)
+            result = await Runner.run(graph.manager, message, hooks=graph.hooks,
+                                      context=MeetingContext(conversation_id))
+            return result.final_output
+        return run
+
+    def handoff_to(key):
+        return {"tool": Handoff.default_tool_name(getattr(graph, key))}
+
+    slot = harness.today + datetime.timedelta(days=60, hours=2)
+    return [
+        # Before any sync, a clash check asks only for the slot's own window
+        ("cold_clash_check", lambda: is_time_slot_free_async(slot, slot + datetime.timedelta(hours=1))),
+        ("cold_sync", lambda: list_upcoming_events_async(max_results=10)),
+        ("list_upcoming", lambda: list_upcoming_events_async(max_results=10)),
+        # Seeded attendees are person0..person6@example.com
+        ("find_contacts", lambda: call_tool(find_contacts, "bench-contacts", names=["person3", "persn5", "nobody"])),
+        ("schedule_meeting", lambda: call_tool(schedule_meeting, "bench-schedule", **schedule_args)),
+        ("cancel_meeting", lambda: pick_then(cancel_meeting, "bench-cancel", reason="Conflict")),
+        ("reschedule_meeting", lambda: pick_then(
+            reschedule_meeting, "bench-reschedule", new_date=new_day, new_time="15:00")),
+        ("update_meeting", lambda: pick_then(
+            update_meeting, "bench-update", new_title="Roadmap review",
+            add_attendees=["zara@example.com"])),
+        ("flaky_schedule", flaky(
+            lambda: call_tool(schedule_meeting, "bench-flaky", **{**schedule_args, "meeting_time": "15:00"}),
+            (503, None), (429, 0))),
+        ("flaky_bulk_cancel", flaky(
+            lambda: show_then(cancel_meeting, cancel_meetings, "bench-flaky-bulk", selection_numbers=[1, 2, 3]),
+            (403, None))),
+        ("flaky_lost_insert", lost_response(
+            lambda: call_tool(schedule_meeting, "bench-lost-insert",
+                              **{**schedule_args, "meeting_time": "17:00", "topic": "Lost response"}),
+            summary="Meeting: Lost response")),
+        ("flaky_lost_delete", lost_response(
+            lambda: pick_then(cancel_meeting, "bench-lost-delete", reason="Conflict"))),
+        ("turn_view", turn(
+            "Show my upcoming meetings", "bench-turn-view",
+            handoff_to("viewer"), {"tool": "view_upcoming_meetings"},
+            {"content": "Here are your meetings."})),
+        ("turn_schedule", turn(
+            f"I'm Sara, schedule a meeting with Ali ali@example.com on {free_day} at 14:00 about Hiring",
+            "bench-turn-schedule",
+            handoff_to("scheduler"),
+            {"tool": "schedule_meeting", "arguments": {
+                **schedule_args, "meeting_time": "14:00", "topic": "Hiring",
+                "participants": [{"name": "Ali", "email": "ali@example.com"}]}},
+            {"content": "Scheduled."})),
+        ("turn_cancel", turn(
+            "Cancel meeting 1", "bench-turn-cancel",
+            handoff_to("canceller"),
+            {"tool": "cancel_meeting", "arguments": {"selection_number": 1}},
+            {"content": "Cancelled."})),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200, help="events seeded into the fake calendar")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help=f"write the current API call counts to {os.path.relpath(BASELINE_PATH, ROOT)}")
+    args = parser.parse_args()
+
+    harness = Harness(args.events)
+    try:
+        reports = [harness.measure(name, op) for name, op in operations(harness)]
+    finally:
+        harness.close()
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    regressions = [r for r in reports
+                   if r["operation"] in baseline and r["api_calls"] > baseline[r["operation"]]]
+    unrecovered = [r for r in reports
+                   if r["operation"].startswith("flaky_") and r["result_status"] in ("Failed", "Partial")]
+
+    if args.json:
+        print(json.dumps({"events": args.events, "operations": reports,
+                          "regressions": [r["operation"] for r in regressions],
+                          "unrecovered": [r["operation"] for r in unrecovered]}, indent=2))
+    else:
+        print(f"{'operation':<20} {'wall ms':>8} {'API':>4} {'trips':>5} {'fault':>5} {'bytes in':>9} "
+              f"{'bytes out':>10} {'LLM':>4} {'mails':>5}  status")
+        for r in reports:
+            print(f"{r['operation']:<20} {r['wall_ms']:>8.1f} {r['api_calls']:>4} {r['round_trips']:>5} "
+                  f"{r['faults']:>5} "
+                  f"{r['bytes_in']:>9} {r['bytes_out']:>10} {r['llm_requests']:>4} {r['emails']:>5}  "
+                  f"{r['result_status']}")
+
+    if args.update_baseline:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({r["operation"]: r["api_calls"] for r in reports}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {BASELINE_PATH}")
+        return
+
+    for r in regressions:
+        print(f"FAIL: {r['operation']} made {r['api_calls']} Calendar API calls "
+              f"(baseline {baseline[r['operation']]})")
+    for r in unrecovered:
+        print(f"FAIL: {r['operation']} did not recover from injected errors")
+    sys.exit(1 if regressions or unrecovered else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Local SMTP sink for offline benchmarks and tests: accepts every message and keeps it in memory.
+No TLS or AUTH beyond accepting AUTH PLAIN/LOGIN, so point the app at it with
+SMTP_HOST=127.0.0.1, SMTP_PORT=<sink.port> and SMTP_USE_TLS=0.
+"""
+import socket
+import socketserver
+import threading
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    sink = None  # set per server
+
+    def _reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def setup(self):
+        super().setup()
+        with self.sink.lock:
+            self.sink.open_sockets.add(self.connection)
+
+    def finish(self):
+        with self.sink.lock:
+            self.sink.open_sockets.discard(self.connection)
+        try:
+            super().finish()
+        except OSError:
+            pass  # dropped by drop_connections()
+
+    def handle(self):
+        with self.sink.lock:
+            self.sink.connections += 1
+        self._reply("220 sink ESMTP")
+        sender, recipients = None, []
+        while True:
+            try:
+                line = self.rfile.readline()
+            except OSError:
+                return
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self.wfile.write(b"250-sink\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == "AUTH":
+                self._reply("235 Authentication successful")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip("<>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip("<>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                data = []
+                for raw in self.rfile:
+                    if raw in (b".\r\n", b".\n"):
+                        break
+                    data.append(raw)
+                with self.sink.lock:
+                    self.sink.messages.append({"from": sender, "to": recipients, "data": b"".join(data)})
+                self._reply("250 OK queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    Threaded SMTP server on 127.0.0.1 that records delivered messages.
+    """
+
+    def __init__(self, port=0):
+        self.lock = threading.Lock()
+        self.messages = []
+        self.connections = 0
+        self.open_sockets = set()
+        handler = type("Handler", (_SMTPHandler,), {"sink": self})
+        self._server = _Server(("127.0.0.1", port), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def port(self):
+        return self._server.server_address[1]
+
+    def reset_stats(self):
+        with self.lock:
+            self.messages = []
+            self.connections = 0
+
+    def drop_connections(self):
+        """
+        Closes every open client connection, like a server timing out idle sessions.
+        """
+        with self.lock:
+            sockets = list(self.open_sockets)
+        for sock in sockets:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,85 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Runs main.py top to bottom in a fresh interpreter (Streamlit "bare" mode, no
+server) several times and reports wall-clock startup time. It also checks that
+heavy modules are not imported at startup.
+
+Usage:
+    python benchmarks/startup_bench.py [--runs 5] [--max-seconds 3.0] [--json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only be imported when actually used (mic button, first Calendar call)
+LAZY_MODULES = ["whisper", "faster_whisper", "torch", "sounddevice", "soundfile", "googleapiclient"]
+
+PROBE = """
+import runpy, sys, json, time
+start = time.perf_counter()
+runpy.run_path("main.py", run_name="__main__")
+elapsed = time.perf_counter() - start
+print("__BENCH__" + json.dumps({
+    "script_seconds": elapsed,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (LAZY_MODULES,)
+
+
+def run_once():
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"})
+    wall = time.perf_counter() - start
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            probe = json.loads(line[len("__BENCH__"):])
+            return {"wall_seconds": wall, **probe}
+    raise RuntimeError(f"main.py failed to start:\n{proc.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="fail if the median cold start exceeds this")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    walls = [r["wall_seconds"] for r in runs]
+    report = {
+        "runs": args.runs,
+        "median_seconds": statistics.median(walls),
+        "min_seconds": min(walls),
+        "max_seconds": max(walls),
+        "median_script_seconds": statistics.median(r["script_seconds"] for r in runs),
+        "eagerly_loaded": sorted({m for r in runs for m in r["loaded"]}),
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"cold start over {args.runs} runs: median {report['median_seconds']:.2f}s "
+              f"(min {report['min_seconds']:.2f}s, max {report['max_seconds']:.2f}s; "
+              f"script {report['median_script_seconds']:.2f}s)")
+        if report["eagerly_loaded"]:
+            print("heavy modules imported at startup:", ", ".join(report["eagerly_loaded"]))
+
+    failed = bool(report["eagerly_loaded"])
+    if args.max_seconds is not None and report["median_seconds"] > args.max_seconds:
+        print(f"FAIL: median cold start {report['median_seconds']:.2f}s > {args.max_seconds:.2f}s")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from bisect import bisect_left
+from event_store import parse_event_time
+
+
+class BusyIndex:
+    """
+    Sorted index over busy intervals for fast clash checks.
+    Built once per calendar change; ISO strings are parsed only at build time.
+
+    Intervals are sorted by start. For every prefix we keep the two latest
+    end times (from different events), so "does anything overlap [start, end)"
+    is a single binary search, even when one event is excluded (rescheduling).
+    """
+
+    def __init__(self, events):
+        self._intervals = sorted(
+            (parse_event_time(e["start"]), parse_event_time(e["end"]), e["id"])
+            for e in events
+        )
+        self._starts = [s for s, _, _ in self._intervals]
+        self._latest = []  # (end, event_id) with the latest end among intervals[:i + 1]
+        self._runner_up = []  # second latest end from a different event, or None
+
+        latest = runner_up = None
+        for _, end, event_id in self._intervals:
+            if latest is None or end > latest[0]:
+                latest, runner_up = (end, event_id), latest
+            elif runner_up is None or end > runner_up[0]:
+                runner_up = (end, event_id)
+            self._latest.append(latest)
+            self._runner_up.append(runner_up)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def is_free(self, start, end, exclude_event_id=None):
+        """
+        Returns True if no busy interval overlaps [start, end), in O(log n).
+        exclude_event_id: ignore a specific event (useful for rescheduling)
+        """
+        # Only intervals starting before `end` can overlap
+        i = bisect_left(self._starts, end)
+        if i == 0:
+            return True
+        candidate = self._latest[i - 1]
+        if exclude_event_id and candidate[1] == exclude_event_id:
+            candidate = self._runner_up[i - 1]
+        return candidate is None or candidate[0] <= start
+
+    def overlapping(self, start, end, exclude_event_id=None):
+        """
+        Returns (start, end, event_id) for every busy interval overlapping [start, end).
+        """
+        i = bisect_left(self._starts, end)
+        return [
+            iv for iv in self._intervals[:i]
+            if iv[1] > start and iv[2] != exclude_event_id
+        ]
+
+    def intervals(self, window_start=None, window_end=None):
+        """
+        Returns (start, end, event_id) intervals, optionally limited to those touching a window.
+        """
+        if window_start is None or window_end is None:
+            return list(self._intervals)
+        return self.overlapping(window_start, window_end)
@@ -0,0 +1,91 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import calendar_setup
+
+# Blocking googleapiclient calls run on a bounded pool so they never stall the event loop
+CALENDAR_WORKERS = int(os.getenv("CALENDAR_WORKERS", "8"))
+_executor = ThreadPoolExecutor(max_workers=CALENDAR_WORKERS, thread_name_prefix="calendar")
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking function on the calendar thread pool and awaits its result.
+    Context variables of the caller are carried over to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    ctx = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _executor, functools.partial(ctx.run, func, *args, **kwargs))
+
+
+async def create_event_async(*args, **kwargs):
+    return await run_blocking(calendar_setup.create_event, *args, **kwargs)
+
+
+async def list_upcoming_events_async(max_results=10, offset=0):
+    return await run_blocking(calendar_setup.list_upcoming_events, max_results=max_results, offset=offset)
+
+
+async def list_meetings_for_selection_async(max_results=10, offset=0):
+    return await run_blocking(
+        calendar_setup.list_meetings_for_selection, max_results=max_results, offset=offset)
+
+
+async def update_event_async(event_id, new_start, new_end):
+    return await run_blocking(calendar_setup.update_event, event_id, new_start, new_end)
+
+
+async def update_event_time_async(event_id, new_start, new_end=None):
+    return await run_blocking(calendar_setup.update_event_time, event_id, new_start, new_end)
+
+
+async def update_event_details_async(event_id, updates):
+    return await run_blocking(calendar_setup.update_event_details, event_id, updates)
+
+
+async def delete_event_async(event_id):
+    return await run_blocking(calendar_setup.delete_event, event_id)
+
+
+async def is_time_slot_free_async(start_datetime, end_datetime, exclude_event_id=None):
+    return await run_blocking(
+        calendar_setup.is_time_slot_free, start_datetime, end_datetime, exclude_event_id)
+
+
+async def busy_intervals_async(window_start, window_end, exclude_event_id=None):
+    return await run_blocking(
+        calendar_setup.busy_intervals, window_start, window_end, exclude_event_id)
+
+
+async def get_event_async(event_id):
+    """
+    Fetches a single event resource from Google Calendar.
+    """
+    return await run_blocking(calendar_setup.get_event, event_id)
+
+
+async def patch_event_async(event_id, body):
+    """
+    Patches only the given fields of an event and returns the updated event.
+    """
+    return await run_blocking(calendar_setup.patch_event, event_id, body)
+
+
+async def get_current_attendees_async(event_ids):
+    return await run_blocking(calendar_setup.get_current_attendees, event_ids)
+
+
+async def batch_delete_events_async(event_ids):
+    return await run_blocking(calendar_setup.batch_delete_events, event_ids)
+
+
+async def batch_patch_events_async(changes):
+    return await run_blocking(calendar_setup.batch_patch_events, changes)
+
+
+async def batch_update_event_times_async(changes):
+    return await run_blocking(calendar_setup.batch_update_event_times, changes)
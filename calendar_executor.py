@@ -0,0 +1,214 @@
+import email.utils
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from instrumentation import get_recorder
+
+# Every Calendar HTTP call (single request or batch) goes through one executor:
+# a token bucket per user and one for the whole project (the OAuth client) keep us
+# under Google's quotas, and rate-limit / server errors are retried with jittered
+# exponential backoff instead of surfacing as "Failed" to the agent.
+# A 5xx or timeout can arrive after Google committed the call, so every call sent
+# through here must be safe to repeat: inserts carry a client-generated event id
+# (a repeat answers 409) and deletes treat 404/410 as done (see calendar_setup.py).
+
+# Statuses worth retrying; 403 only when Google says it is a rate limit
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded")
+MAX_USER_BUCKETS = 4096
+
+
+class TokenBucket:
+    """
+    Allows `rate` calls per second on average with bursts of up to `burst`.
+    acquire() blocks until the calls fit; pause() stops all callers for a while (Retry-After).
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, cost):
+        # Takes the tokens now (possibly going negative) and returns how long to wait for them
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= cost
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def acquire(self, cost=1, sleep=time.sleep):
+        """
+        Takes `cost` tokens, sleeping until they are available. Returns the seconds waited.
+        """
+        wait = self._reserve(cost)
+        if wait > 0:
+            sleep(wait)
+        return wait
+
+    def pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def error_status(error):
+    return getattr(getattr(error, "resp", None), "status", None)
+
+
+def error_reason(error):
+    """
+    Returns Google's machine-readable reason (e.g. "rateLimitExceeded"), or None.
+    """
+    try:
+        content = error.content.decode() if isinstance(error.content, bytes) else error.content
+        return json.loads(content)["error"]["errors"][0]["reason"]
+    except Exception:
+        return None
+
+
+def is_retryable(error):
+    """
+    True for 429, 5xx and 403 rate-limit errors, plus network errors.
+    """
+    if error is None:
+        return False
+    status = error_status(error)
+    if status is None:
+        return isinstance(error, (OSError, TimeoutError))
+    if status == 403:
+        return error_reason(error) in RATE_LIMIT_REASONS
+    return status in RETRY_STATUSES
+
+
+def retry_after(error):
+    """
+    Seconds the server asked us to wait (Retry-After as seconds or an HTTP date), or None.
+    """
+    resp = getattr(error, "resp", None)
+    value = resp.get("retry-after") if hasattr(resp, "get") else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CalendarExecutor:
+    """
+    Runs Calendar calls under the per-user and per-project rate limits and retries
+    retryable failures up to `max_retries` times. Delays are "full jitter"
+    (random between 0 and base_delay * 2**attempt, capped at max_delay); a
+    Retry-After header overrides that and pauses the user's bucket for everyone.
+    """
+
+    def __init__(self, user_qps=10, user_burst=20, project_qps=100, project_burst=200,
+                 max_retries=5, base_delay=0.5, max_delay=32.0, sleep=time.sleep):
+        self.user_qps = user_qps
+        self.user_burst = user_burst
+        self.project = TokenBucket(project_qps, project_burst)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bucket(self, user_id):
+        with self._lock:
+            bucket = self._users.get(user_id)
+            if bucket is None:
+                bucket = self._users[user_id] = TokenBucket(self.user_qps, self.user_burst)
+            self._users.move_to_end(user_id)
+            while len(self._users) > MAX_USER_BUCKETS:
+                self._users.popitem(last=False)
+            return bucket
+
+    def throttle(self, user_id, cost=1):
+        """
+        Waits until `cost` calls fit into both the user's and the project's budget.
+        """
+        waited = self.bucket(user_id).acquire(cost, self._sleep)
+        waited += self.project.acquire(cost, self._sleep)
+        if waited > 0:
+            get_recorder().increment("calendar_throttled")
+
+    def retry_delay(self, error, attempt):
+        """
+        Seconds to wait before retry number `attempt` + 1, or None to give up.
+        """
+        if not is_retryable(error) or attempt >= self.max_retries:
+            return None
+        requested = retry_after(error)
+        if requested is not None:
+            return requested if requested <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def backoff(self, error, attempt, user_id):
+        """
+        Sleeps before retrying after `error`. Returns False if the call should not be retried.
+        """
+        delay = self.retry_delay(error, attempt)
+        labels = {"status": str(error_status(error) or type(error).__name__),
+                  "reason": error_reason(error) or ""}
+        if delay is None:
+            if is_retryable(error):
+                get_recorder().increment("calendar_retries_exhausted", **labels)
+            return False
+        get_recorder().increment("calendar_retries", **labels)
+        if retry_after(error) is not None:
+            self.bucket(user_id).pause(delay)
+        self._sleep(delay)
+        return True
+
+    def execute(self, call, user_id, cost=1, span=None):
+        """
+        Runs call() (e.g. request.execute) under the rate limits, retrying retryable errors.
+        `span`, if given, gets a "retries" attribute.
+        """
+        for attempt in range(self.max_retries + 1):
+            self.throttle(user_id, cost)
+            try:
+                return call()
+            except Exception as e:
+                # backoff() declines once attempts run out, so the last error is raised
+                if not self.backoff(e, attempt, user_id):
+                    raise
+                if span is not None:
+                    span.attributes["retries"] = attempt + 1
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_calendar_executor():
+    """
+    Process-wide executor configured from CALENDAR_USER_QPS, CALENDAR_PROJECT_QPS,
+    CALENDAR_MAX_RETRIES, CALENDAR_RETRY_BASE_DELAY and CALENDAR_RETRY_MAX_DELAY.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            user_qps = float(os.getenv("CALENDAR_USER_QPS", "10"))
+            project_qps = float(os.getenv("CALENDAR_PROJECT_QPS", "100"))
+            _executor = CalendarExecutor(
+                user_qps=user_qps, user_burst=2 * user_qps,
+                project_qps=project_qps, project_burst=2 * project_qps,
+                max_retries=int(os.getenv("CALENDAR_MAX_RETRIES", "5")),
+                base_delay=float(os.getenv("CALENDAR_RETRY_BASE_DELAY", "0.5")),
+                max_delay=float(os.getenv("CALENDAR_RETRY_MAX_DELAY", "32")),
+            )
+        return _executor
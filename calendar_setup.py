@@ -1,40 +1,155 @@
 from __future__ import print_function
 import datetime
+import functools
+import itertools
 import os.path
-from google.auth.transport.requests import Request
-# Imports the class that holds and refreshes your Google login tokens, letting your app securely access APIs like Google Calendar
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+from event_store import EVENT_FIELDS, LIST_FIELDS, EventStore, parse_event_time
+from busy_index import BusyIndex
+from instrumentation import span
+from credential_store import DEFAULT_USER, current_user_id, get_credential_store
+from calendar_executor import error_status, get_calendar_executor, is_retryable
+from contacts import ContactDirectory
 
 PKT = datetime.timezone(datetime.timedelta(hours=5))
 
-# It gives us the access to read/write to the users calendar
-SCOPES = ["https://www.googleapis.com/auth/calendar"]
+# Calendar calls act for the conversation's user (credential_store.current_user).
+# Each user gets a service, an event mirror and a busy index, kept together in a
+# bounded LRU by the credential store, so one process can serve many accounts.
+_service_lock = threading.RLock()
+# httplib2.Http is not thread-safe, so each thread keeps its own authorized connections (one per user)
+_thread_local = threading.local()
+MAX_THREAD_CONNECTIONS = 16
+# Calendar discovery document, read once and shared by every user's service
+_discovery_doc = None
+
+# CALENDAR_API_ROOT points the client at another Calendar v3 server
+# (e.g. benchmarks/fake_calendar.py); unset means Google's endpoint
+DEFAULT_API_ROOT = "https://www.googleapis.com/"
+
+
+def _api_root():
+    return os.getenv("CALENDAR_API_ROOT", DEFAULT_API_ROOT).rstrip("/") + "/"
 
 # Get valid credentials for google calendar API
 
 
-def get_credentials():
-    creds = None
-    # Load existing credentials
-    if os.path.exists("token.json"):
-        creds = Credentials.from_authorized_user_file("token.json", SCOPES)
+def get_credentials(user_id=None):
+    """
+    Returns the user's cached credentials (the current user by default),
+    refreshing (then saving) them only when the token has expired.
+    """
+    return get_credential_store().get_credentials(user_id or current_user_id())
+
+
+def _thread_http(user_id):
+    import httplib2
+    import google_auth_httplib2
+    creds = get_credentials(user_id)
+    connections = getattr(_thread_local, "connections", None)
+    if connections is None:
+        connections = _thread_local.connections = OrderedDict()
+    http = connections.get(user_id)
+    if http is None or http.credentials is not creds:
+        http = google_auth_httplib2.AuthorizedHttp(creds, http=httplib2.Http())
+        connections[user_id] = http
+    connections.move_to_end(user_id)
+    while len(connections) > MAX_THREAD_CONNECTIONS:
+        connections.popitem(last=False)
+    return http
+
+
+def _build_request(http, *args, user_id=None, **kwargs):
+    # Ignore the http object the service was built with and use this thread's own for the user
+    from googleapiclient.http import HttpRequest
+    request = HttpRequest(_thread_http(user_id), *args, **kwargs)
+    execute = request.execute
+
+    def timed_execute(*a, **kw):
+        # One "calendar_api" span per call (retries included), named after the API method (e.g. calendar.events.list)
+        with span("calendar_api", request.methodId or request.method) as current:
+            return get_calendar_executor().execute(
+                lambda: execute(*a, **kw), user_id or current_user_id(), span=current)
+
+    request.execute = timed_execute
+    return request
+
+
+class _UserCalendar:
+    """
+    A user's Calendar service with its local event mirror and busy index.
+    """
+
+    def __init__(self, user_id):
+        global _discovery_doc
+        from googleapiclient.discovery import build_from_document
+        from googleapiclient.discovery_cache import get_static_doc
+        with _service_lock:
+            if _discovery_doc is None:
+                _discovery_doc = get_static_doc("calendar", "v3")
+        creds = get_credentials(user_id)
+        self.service = build_from_document(
+            _discovery_doc, credentials=creds,
+            requestBuilder=functools.partial(_build_request, user_id=user_id),
+            client_options={"api_endpoint": _api_root() + "calendar/v3/"})
+        # Set EVENT_STORE_DB to a SQLite path to persist the mirrors between runs;
+        # EVENT_HISTORY_DAYS bounds how far back the mirror reaches
+        self.event_store = EventStore(
+            lambda: self.service, db_path=os.getenv("EVENT_STORE_DB"),
+            owner=None if user_id == DEFAULT_USER else user_id,
+            history_days=int(os.getenv("EVENT_HISTORY_DAYS", "90")))
+        self.busy_index = None  # (event store version, BusyIndex)
+        # Contacts from past events plus CSV/vCard imports (persisted in CONTACTS_DB)
+        self.contacts = ContactDirectory(os.getenv("CONTACTS_DB", "contacts.db"), owner=user_id)
+        self.lock = threading.Lock()
+
+
+def _user_calendar(user_id=None):
+    return get_credential_store().service(user_id or current_user_id(), _UserCalendar)
+
+
+def get_service(user_id=None):
+    """
+    Returns the user's Google Calendar service (the current user by default).
+    Services are cached per user; requests run on a per-thread authorized
+    connection, so a service is safe to use from any thread.
+    """
+    return _user_calendar(user_id).service
+
+
+def get_event_store(user_id=None):
+    """
+    Returns the local mirror of the user's primary calendar.
+    """
+    return _user_calendar(user_id).event_store
 
-    # If no credentials or invalid, refresh or login
-    if not creds or not creds.valid:
-        if creds and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            flow = InstalledAppFlow.from_client_secrets_file(
-                "D:/Eishal Work/6th Semester/Meeting-Agent/credentials.json", SCOPES)
-            creds = flow.run_local_server(port=0)
 
-        # Save new credentials
-        with open("token.json", "w") as token:
-            token.write(creds.to_json())
+def get_busy_index(user_id=None):
+    """
+    Returns the free/busy index over the user's mirrored events, rebuilt only when the calendar changed.
+    """
+    calendar = _user_calendar(user_id)
+    store = calendar.event_store
+    store.sync()
+    version, events = store.snapshot()
+    with calendar.lock:
+        if calendar.busy_index is None or calendar.busy_index[0] != version:
+            calendar.busy_index = (version, BusyIndex(events))
+        return calendar.busy_index[1]
 
-    return creds
+
+def get_contact_directory(user_id=None):
+    """
+    Returns the user's contact directory, refreshed from the event mirror when the calendar changed.
+    """
+    calendar = _user_calendar(user_id)
+    store = calendar.event_store
+    store.sync()
+    calendar.contacts.sync_events(*store.snapshot())
+    return calendar.contacts
 
 # Create an event in Google Calendar
 
@@ -43,11 +158,14 @@ def create_event(title, description, start_datetime, end_datetime, location=None
     """
     Adds a meeting to Google Calendar.
     start_datetime and end_datetime should be in datetime objects.
+    The event id is generated here, so a retried insert that Google already
+    committed answers 409 instead of creating (and inviting to) a second meeting.
     """
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
+    service = get_service()
 
     event = {
+        # Google event ids use base32hex characters (0-9, a-v); a uuid's hex digits qualify
+        "id": uuid.uuid4().hex,
         "summary": title,
         "location": location,
         "description": description,
@@ -72,12 +190,20 @@ def create_event(title, description, start_datetime, end_datetime, location=None
 
     # Try inserting the event and catch errors
     try:
-        created_event = service.events().insert(
-            calendarId="primary", body=event).execute()
+        try:
+            created_event = service.events().insert(
+                calendarId="primary", body=event, fields=EVENT_FIELDS).execute()
+        except Exception as e:
+            if error_status(e) != 409:
+                raise
+            # An earlier attempt went through but its response was lost
+            created_event = get_event(event["id"])
     except Exception as e:
         print("Error creating event:", e)
         return {"status": "Failed", "message": str(e)}
 
+    get_event_store().upsert(created_event)
+
     return {
         "event_id": created_event.get("id"),
         "htmlLink": created_event.get("htmlLink"),
@@ -86,35 +212,36 @@ def create_event(title, description, start_datetime, end_datetime, location=None
     }
 
 # for meeting selection (cancel_agent, reschedule_agent)
-def list_meetings_for_selection(max_results=10):
+def list_meetings_for_selection(max_results=10, offset=0):
     """
     Returns a numbered list of upcoming meetings with actual Google Calendar event_ids.
+    offset skips that many meetings, so page 2 continues the numbering at offset + 1.
     """
-    events = list_upcoming_events(max_results=max_results)
+    events = list_upcoming_events(max_results=max_results, offset=offset)
     selectable = []
-    for idx, e in enumerate(events, start=1):
+    for idx, e in enumerate(events, start=offset + 1):
         selectable.append({
             "index": idx,
             "label": f"{e['summary']} — {e['start']}",
-            "event_id": e["event_id"]  # ⚡ real Google event ID
+            "event_id": e["event_id"],  # ⚡ real Google event ID
+            "start": e["start"],
+            "end": e["end"],
+            "attendees": e["attendees"],
         })
     return selectable
 
 
 # List upcoming events
 
-def list_upcoming_events(max_results=10):
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
-
-    events_result = service.events().list(
-        calendarId="primary",
-        maxResults=max_results,
-        singleEvents=True,
-        orderBy="startTime"
-    ).execute()
-
-    events = events_result.get("items", [])
+def list_upcoming_events(max_results=10, offset=0):
+    """
+    Reads upcoming events (not yet ended) from the local mirror (synced incrementally) instead of the network.
+    """
+    store = get_event_store()
+    store.sync()
+    now = datetime.datetime.now(PKT)
+    upcoming = (e for e in store.events() if parse_event_time(e["end"]) > now)
+    events = itertools.islice(upcoming, offset, offset + max_results)
 
     return [{
         "event_id": e["id"],
@@ -122,9 +249,61 @@ def list_upcoming_events(max_results=10):
         "start": e["start"].get("dateTime", e["start"].get("date")),
         # ✅ added end time
         "end": e["end"].get("dateTime", e["end"].get("date")),
+        "attendees": e.get("attendees", []),
     } for e in events]
 
 
+def iter_events(start=None, end=None, page_size=50, user_id=None):
+    """
+    Yields the user's events overlapping [start, end) in start order, straight from Google Calendar.
+    Pages (timeMin/timeMax/pageToken) are fetched lazily, only as the caller consumes them.
+    """
+    params = {"calendarId": "primary", "singleEvents": True, "orderBy": "startTime",
+              "maxResults": page_size, "fields": LIST_FIELDS}
+    if start is not None:
+        params["timeMin"] = start.isoformat()
+    if end is not None:
+        params["timeMax"] = end.isoformat()
+    # Resolve the service now, in the caller's context, not on the first next()
+    return _iter_pages(get_service(user_id), params)
+
+
+def _iter_pages(service, params):
+    page_token = None
+    while True:
+        result = service.events().list(pageToken=page_token, **params).execute()
+        yield from result.get("items", [])
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return
+
+
+def get_event(event_id):
+    """
+    Fetches one event (only the mirrored fields) from Google Calendar.
+    """
+    return get_service().events().get(
+        calendarId="primary", eventId=event_id, fields=EVENT_FIELDS).execute()
+
+
+def patch_event(event_id, body):
+    """
+    Sends only the changed fields (PATCH) and returns the updated event.
+    Arrays such as attendees are replaced as a whole, so send the full new list.
+    """
+    updated_event = get_service().events().patch(
+        calendarId="primary", eventId=event_id, body=body, fields=EVENT_FIELDS).execute()
+    get_event_store().upsert(updated_event)
+    return updated_event
+
+
+def _time_patch(new_start, new_end):
+    return {
+        "start": {"dateTime": new_start.isoformat(), "timeZone": "Asia/Karachi"},
+        "end": {"dateTime": new_end.isoformat(), "timeZone": "Asia/Karachi"},
+    }
+
+
 # Reschedule using date + time (good for chatbot)
 def update_event_time(event_id, new_start, new_end=None):
     """
@@ -134,24 +313,14 @@ def update_event_time(event_id, new_start, new_end=None):
     if new_end is None:
         new_end = new_start + datetime.timedelta(hours=1)  # default 1 hour
 
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
-
     try:
-        event = service.events().get(calendarId="primary", eventId=event_id).execute()
-        event["start"]["dateTime"] = new_start.isoformat()
-        event["end"]["dateTime"] = new_end.isoformat()
-
-        updated_event = service.events().update(
-            calendarId="primary",
-            eventId=event_id,
-            body=event
-        ).execute()
+        updated_event = patch_event(event_id, _time_patch(new_start, new_end))
 
         return {
             "status": "Success",
             "event_id": event_id,
-            "htmlLink": updated_event.get("htmlLink")
+            "htmlLink": updated_event.get("htmlLink"),
+            "event": updated_event,
         }
 
     except Exception as e:
@@ -162,35 +331,17 @@ def update_event_time(event_id, new_start, new_end=None):
 
 def update_event(event_id, new_start, new_end):
     """
-    Fully updates an event's start and end datetime.
+    Updates an event's start and end datetime.
     Works with datetime.datetime objects.
     """
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
-
     try:
-        event = service.events().get(calendarId="primary", eventId=event_id).execute()
-
-        event['start'] = {
-            "dateTime": new_start.isoformat(),
-            "timeZone": "Asia/Karachi",
-        }
-
-        event['end'] = {
-            "dateTime": new_end.isoformat(),
-            "timeZone": "Asia/Karachi",
-        }
-
-        updated_event = service.events().update(
-            calendarId="primary",
-            eventId=event_id,
-            body=event
-        ).execute()
+        updated_event = patch_event(event_id, _time_patch(new_start, new_end))
 
         return {
             "status": "Success",
             "event_id": event_id,
-            "htmlLink": updated_event.get("htmlLink")
+            "htmlLink": updated_event.get("htmlLink"),
+            "event": updated_event,
         }
 
     except Exception as e:
@@ -199,18 +350,27 @@ def update_event(event_id, new_start, new_end):
 # Delete an event (delete_agent)
 
 
+def _already_deleted(error):
+    # A retried DELETE whose earlier attempt went through answers 404/410; the event is gone either way
+    return error_status(error) in (404, 410)
+
+
 def delete_event(event_id):
     """
     Deletes an event from Google Calendar.
     """
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
+    service = get_service()
 
     try:
-        service.events().delete(
-            calendarId="primary",
-            eventId=event_id
-        ).execute()
+        try:
+            service.events().delete(
+                calendarId="primary",
+                eventId=event_id
+            ).execute()
+        except Exception as e:
+            if not _already_deleted(e):
+                raise
+        get_event_store().remove(event_id)
 
         return {
             "status": "Cancelled",
@@ -230,31 +390,21 @@ def update_event_details(event_id, updates):
     """
     Updates event fields like summary (topic), location, description.
     """
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
-
-    try:
-        event = service.events().get(
-            calendarId="primary",
-            eventId=event_id
-        ).execute()
+    body = {}
+    if "topic" in updates:
+        body["summary"] = updates["topic"]
 
-        if "topic" in updates:
-            event["summary"] = updates["topic"]
+    if "description" in updates:
+        body["description"] = updates["description"]
 
-        if "description" in updates:
-            event["description"] = updates["description"]
-
-        updated_event = service.events().update(
-            calendarId="primary",
-            eventId=event_id,
-            body=event
-        ).execute()
+    try:
+        updated_event = patch_event(event_id, body)
 
         return {
             "status": "Updated",
             "event_id": event_id,
-            "htmlLink": updated_event.get("htmlLink")
+            "htmlLink": updated_event.get("htmlLink"),
+            "event": updated_event,
         }
 
     except Exception as e:
@@ -264,29 +414,156 @@ def update_event_details(event_id, updates):
         }
 
 
+# Batched operations (bulk cancel / reschedule / update)
+
+BATCH_LIMIT = 50  # Google Calendar accepts at most 50 calls per batch
+
+
+def _execute_batch(requests):
+    """
+    Sends requests as BatchHttpRequests, one round trip per 50 calls.
+    Items that fail with a retryable error (rate limit, 5xx) are sent again in a
+    new batch after a backoff.
+    Returns one (response, exception) per request, by position, so the same
+    event can appear more than once; an item with no answer gets a RuntimeError.
+    """
+    from googleapiclient.http import BatchHttpRequest
+    executor = get_calendar_executor()
+    user_id = current_user_id()
+    missing = RuntimeError("No response for this item in the batch reply")
+    results = [(None, missing)] * len(requests)
+
+    def callback(request_id, response, exception):
+        results[int(request_id)] = (response, exception)
+
+    pending = list(range(len(requests)))
+    for attempt in range(executor.max_retries + 1):
+        for offset in range(0, len(pending), BATCH_LIMIT):
+            chunk = pending[offset:offset + BATCH_LIMIT]
+            batch = BatchHttpRequest(callback=callback, batch_uri=_api_root() + "batch/calendar/v3")
+            for position in chunk:
+                batch.add(requests[position], request_id=str(position))
+            # Every call in a batch counts against the quota
+            with span("calendar_api", "batch", calls=len(chunk), attempt=attempt) as current:
+                executor.execute(batch.execute, user_id, cost=len(chunk), span=current)
+
+        retry = [position for position in pending if is_retryable(results[position][1])]
+        if not retry or not executor.backoff(results[retry[0]][1], attempt, user_id):
+            break
+        pending = retry
+    return results
+
+
+def batch_delete_events(event_ids):
+    """
+    Deletes several events in one batch.
+    Returns one result dict per event_id, in the same order.
+    """
+    service = get_service()
+    results = _execute_batch([
+        service.events().delete(calendarId="primary", eventId=event_id)
+        for event_id in event_ids
+    ])
+
+    output = []
+    for event_id, (_, error) in zip(event_ids, results):
+        if error and not _already_deleted(error):
+            output.append({"status": "Failed", "event_id": event_id, "message": str(error)})
+            continue
+        get_event_store().remove(event_id)
+        output.append({"status": "Cancelled", "event_id": event_id})
+    return output
+
+
+def get_current_attendees(event_ids):
+    """
+    Reads the current guest lists of several events from Google in one batch, for
+    patches that replace `attendees` as a whole (the mirror may be cold or up to
+    max_staleness seconds old). Returns {event_id: [attendee, ...]} for the events
+    that could be read; unreadable events are left out and must not be patched.
+    """
+    event_ids = list(dict.fromkeys(event_ids))
+    service = get_service()
+    results = _execute_batch([
+        service.events().get(calendarId="primary", eventId=event_id, fields="id,attendees")
+        for event_id in event_ids
+    ])
+    return {event_id: event.get("attendees", [])
+            for event_id, (event, error) in zip(event_ids, results) if event and not error}
+
+
+def batch_patch_events(changes):
+    """
+    Applies partial updates to several events in one batch.
+    changes: list of (event_id, body) where body holds only the fields to change.
+    Returns one result dict per change, in the same order.
+    """
+    service = get_service()
+    results = _execute_batch([
+        service.events().patch(
+            calendarId="primary", eventId=event_id, body=body, fields=EVENT_FIELDS)
+        for event_id, body in changes
+    ])
+
+    output = []
+    for (event_id, _), (updated_event, error) in zip(changes, results):
+        if error or not updated_event:
+            message = str(error) if error else "Empty response from Google Calendar"
+            output.append({"status": "Failed", "event_id": event_id, "message": message})
+            continue
+        get_event_store().upsert(updated_event)
+        output.append({
+            "status": "Success",
+            "event_id": event_id,
+            "htmlLink": updated_event.get("htmlLink"),
+            "event": updated_event,
+        })
+    return output
+
+
+def batch_update_event_times(changes):
+    """
+    Reschedules several events in one batch.
+    changes: list of (event_id, new_start, new_end) with datetime objects.
+    """
+    return batch_patch_events([
+        (event_id, _time_patch(new_start, new_end))
+        for event_id, new_start, new_end in changes
+    ])
+
+
+def busy_intervals(window_start, window_end, exclude_event_id=None):
+    """
+    Returns (start, end, event_id) for every event overlapping [window_start, window_end).
+    Uses the busy index once the mirror is synced; before that, queries only this
+    window instead of syncing the whole calendar.
+    """
+    if get_event_store().synced:
+        return get_busy_index().overlapping(window_start, window_end, exclude_event_id)
+    return [
+        (parse_event_time(e["start"]), parse_event_time(e["end"]), e["id"])
+        for e in iter_events(window_start, window_end)
+        if e["id"] != exclude_event_id
+    ]
+
+
 def is_time_slot_free(start_datetime, end_datetime, exclude_event_id=None):
     """
     Check if a given time slot is free in the user's calendar.
     exclude_event_id: ignore a specific event (useful for rescheduling)
     Returns True if free, False if there’s a clash.
     """
-    events = list_upcoming_events(max_results=50)
-    for e in events:
-        if exclude_event_id and e["event_id"] == exclude_event_id:
-            continue
-        existing_start = datetime.datetime.fromisoformat(
-            e["start"]).astimezone(PKT)
-        existing_end = datetime.datetime.fromisoformat(
-            e["end"]).astimezone(PKT)
-
-        # check overlap
-        if start_datetime < existing_end and end_datetime > existing_start:
-            return False
-    return True
+    if get_event_store().synced:
+        return get_busy_index().is_free(start_datetime, end_datetime, exclude_event_id)
+    # Cold mirror: a clash can only come from events inside the slot itself
+    return not busy_intervals(start_datetime, end_datetime, exclude_event_id)
 
 
 def main():
-    get_credentials()
+    # python calendar_setup.py [user_id]: connect a Google account for a user
+    user_id = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_USER
+    get_credential_store().authorize(user_id)
+    print(f"Google Calendar connected for {user_id!r}")
 
 
 if __name__ == "__main__":
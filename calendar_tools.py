@@ -1,4 +1,6 @@
-from calendar_setup import list_upcoming_events, list_meetings_for_selection
+from calendar_setup import list_upcoming_events, list_meetings_for_selection, is_time_slot_free
+from meeting_selector import get_selection_snapshot
+from contacts import contacts_in_text
 import datetime
 
 PKT = datetime.timezone(datetime.timedelta(hours=5))
@@ -10,24 +12,47 @@ def get_upcoming_meetings(max_results=10):
 
 def check_slot_free(new_start, new_end, exclude_event_id=None):
     """Check if a given time slot is free in the calendar."""
-    events = list_upcoming_events(max_results=50)
-    for e in events:
-        if exclude_event_id and e["event_id"] == exclude_event_id:
-            continue
-        existing_start = datetime.datetime.fromisoformat(
-            e["start"]).astimezone(PKT)
-        existing_end = datetime.datetime.fromisoformat(
-            e["end"]).astimezone(PKT)
-        if new_start < existing_end and new_end > existing_start:
-            return False
-    return True
-
-
-def resolve_meeting_by_index(index: int):
-    meetings = list_meetings_for_selection()
-    for m in meetings:
+    return is_time_slot_free(new_start, new_end, exclude_event_id=exclude_event_id)
+
+
+def _selection_list(conversation_id=None):
+    # Prefer the list this conversation was shown (even if all of it was cancelled since);
+    # fetch only if nothing was shown yet
+    snapshot = get_selection_snapshot(conversation_id)
+    return snapshot if snapshot is not None else list_meetings_for_selection()
+
+
+def resolve_selection(index: int, conversation_id=None):
+    """
+    Returns the meeting (index, event_id, label, start, end, attendees) the user picked, or None.
+    """
+    for m in _selection_list(conversation_id):
         if m["index"] == index:
-            return m["event_id"]  # ⚡ return actual event ID
+            return m
     return None
 
 
+def resolve_meeting_by_index(index: int, conversation_id=None):
+    m = resolve_selection(index, conversation_id)
+    return m["event_id"] if m else None  # ⚡ return actual event ID
+
+
+
+
+def resolve_meetings_by_index(indices, conversation_id=None):
+    """
+    Resolves several selection numbers against one meeting list.
+    Returns {index: meeting} for the valid indices.
+    """
+    meetings = {m["index"]: m for m in _selection_list(conversation_id)}
+    return {i: meetings[i] for i in indices if i in meetings}
+
+
+def event_attendees(event):
+    """
+    Returns the attendees of a Google Calendar event.
+    Falls back to emails found in the description if the attendee list is empty.
+    """
+    if not event:
+        return []
+    return event.get("attendees", []) or contacts_in_text(event.get("description"))
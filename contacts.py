@@ -0,0 +1,291 @@
+import csv
+import io
+import os
+import re
+import sqlite3
+import sys
+import threading
+import unicodedata
+from bisect import bisect_left
+
+EMAIL_RE = re.compile(r"[\w\.-]+@[\w\.-]+\.\w+")
+NAMED_EMAIL_RE = re.compile(r"([A-Za-z][\w .'-]*?)\s*<([\w\.-]+@[\w\.-]+\.\w+)>")
+
+# Lookups scoring below this are not returned
+MIN_SCORE = 0.3
+# resolve() reports "Found" only at or above this (a prefix hit scores 0.9, an exact word 1.0);
+# weaker fuzzy matches are "Ambiguous" so the user confirms them
+FOUND_SCORE = 0.85
+
+
+def contacts_in_text(text):
+    """
+    Returns the attendees mentioned in free text (e.g. an event description) as
+    [{"email", "displayName"?}], using "Name <email>" where it is given.
+    """
+    if not text:
+        return []
+    found = {}
+    for name, email in NAMED_EMAIL_RE.findall(text):
+        found[email.lower()] = {"email": email, "displayName": name.strip(" ,-")}
+    for email in EMAIL_RE.findall(text):
+        found.setdefault(email.lower(), {"email": email})
+    return [found[key] for key in sorted(found)]
+
+
+def _normalize(text):
+    # "José O'Neil" -> "jose o neil"
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text).split())
+
+
+def _jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def _trigrams(text):
+    grams = set()
+    for token in text.split():
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ContactDirectory:
+    """
+    Fuzzy name -> email index over one user's contacts.
+
+    Contacts come from the attendees (and "Name <email>" lines in descriptions) of
+    the user's mirrored events, ranked by how often they were met, plus CSV/vCard
+    imports, which are kept in SQLite when db_path is set. Lookups use a trigram
+    index for typos and a sorted token list for prefixes ("ali" -> Alice).
+    """
+
+    def __init__(self, db_path=None, owner="default"):
+        self.owner = owner
+        self._imported = {}      # email -> name
+        self._from_events = {}   # email -> (name, meetings)
+        self._events_version = None
+        self._contacts = []      # (email, name, meetings, trigram count, words)
+        self._grams = {}         # trigram -> {contact index}
+        self._tokens = []        # sorted (token, contact index)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS contacts (owner TEXT, email TEXT, name TEXT, "
+                "PRIMARY KEY (owner, email))")
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT email, name FROM contacts WHERE owner = ?", (owner,)).fetchall()
+            self._imported = {email: name for email, name in rows}
+        self._rebuild()
+
+    # ---------- Sources ----------
+
+    def sync_events(self, version, events):
+        """
+        Re-reads contacts from the event mirror if it changed since the last call.
+        """
+        with self._lock:
+            if version == self._events_version:
+                return
+            found = {}
+            for event in events:
+                attendees = [a for a in event.get("attendees") or []
+                             if not a.get("self") and not a.get("resource")]
+                for a in attendees or contacts_in_text(event.get("description")):
+                    email = (a.get("email") or "").lower()
+                    if not email:
+                        continue
+                    name, meetings = found.get(email, (None, 0))
+                    found[email] = (a.get("displayName") or name, meetings + 1)
+            self._from_events = found
+            self._events_version = version
+            self._rebuild()
+
+    def add(self, email, name=None):
+        """
+        Adds (or renames) an imported contact.
+        """
+        self.import_contacts([(name, email)])
+
+    def import_contacts(self, contacts):
+        """
+        Adds (name, email) pairs; returns how many had a valid email.
+        """
+        rows = [(name.strip() if name else None, email.strip().lower())
+                for name, email in contacts if email and EMAIL_RE.fullmatch(email.strip())]
+        with self._lock:
+            for name, email in rows:
+                self._imported[email] = name or self._imported.get(email)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO contacts (owner, email, name) VALUES (?, ?, ?)",
+                    [(self.owner, email, self._imported[email]) for _, email in rows])
+                self._db.commit()
+            self._rebuild()
+        return len(rows)
+
+    def import_csv(self, text):
+        """
+        Imports a CSV export (Google, Outlook or a plain name,email file). Returns the number imported.
+        """
+        reader = csv.DictReader(io.StringIO(text))
+        fields = reader.fieldnames or []
+        email_cols = [f for f in fields if "mail" in f.lower() and "type" not in f.lower()]
+        name_col = next((f for f in fields if f.lower() in ("name", "full name", "display name")), None)
+        first = next((f for f in fields if f.lower() in ("first name", "given name")), None)
+        last = next((f for f in fields if f.lower() in ("last name", "family name")), None)
+
+        contacts = []
+        for row in reader:
+            name = row.get(name_col) if name_col else " ".join(
+                v for v in (row.get(first), row.get(last)) if v)
+            for col in email_cols:
+                # Google exports several addresses in one cell as "a@x.com ::: b@y.com"
+                for email in EMAIL_RE.findall(row.get(col) or ""):
+                    contacts.append((name, email))
+        return self.import_contacts(contacts)
+
+    def import_vcard(self, text):
+        """
+        Imports FN/EMAIL entries from a .vcf file. Returns the number imported.
+        """
+        # Unfold continuation lines (RFC 6350: a line starting with a space continues the previous one)
+        text = re.sub(r"\r?\n[ \t]", "", text)
+        contacts = []
+        name, emails = None, []
+        for line in text.splitlines():
+            key, _, value = line.partition(":")
+            key = key.split(";")[0].upper()
+            if key == "BEGIN":
+                name, emails = None, []
+            elif key == "FN":
+                name = value.strip()
+            elif key == "EMAIL":
+                emails.append(value.strip())
+            elif key == "END":
+                contacts.extend((name, email) for email in emails)
+        return self.import_contacts(contacts)
+
+    def import_file(self, path):
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+        if path.lower().endswith((".vcf", ".vcard")):
+            return self.import_vcard(text)
+        return self.import_csv(text)
+
+    # ---------- Index ----------
+
+    def _rebuild(self):
+        # Imported names win over calendar display names
+        merged = dict(self._from_events)
+        for email, name in self._imported.items():
+            event_name, meetings = merged.get(email, (None, 0))
+            merged[email] = (name or event_name, meetings)
+
+        contacts, grams, tokens = [], {}, []
+        for email, (name, meetings) in merged.items():
+            text = _normalize(f"{name or ''} {email.split('@')[0]}")
+            contact_grams = _trigrams(text)
+            i = len(contacts)
+            contacts.append((email, name, meetings, len(contact_grams), tuple(set(text.split()))))
+            for gram in contact_grams:
+                grams.setdefault(gram, set()).add(i)
+            tokens.extend((token, i) for token in set(text.split()))
+        tokens.sort()
+        self._contacts, self._grams, self._tokens = contacts, grams, tokens
+
+    def __len__(self):
+        return len(self._contacts)
+
+    def _prefix_matches(self, token, exact=False):
+        # Contacts with a word starting with (or, if exact, equal to) token
+        i = bisect_left(self._tokens, (token,))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(token):
+            if not exact or self._tokens[i][0] == token:
+                yield self._tokens[i][1]
+            i += 1
+
+    def lookup(self, query, limit=5):
+        """
+        Returns up to `limit` contacts matching a name (or part of one / an email),
+        best first, as [{"name", "email", "score"}].
+        """
+        query = (query or "").strip()
+        if "@" in query:
+            with self._lock:
+                return [{"name": name, "email": email, "score": 1.0}
+                        for email, name, *_ in self._contacts if email == query.lower()]
+        text = _normalize(query)
+        if not text:
+            return []
+        query_grams = _trigrams(text)
+
+        with self._lock:
+            shared = {}
+            for gram in query_grams:
+                for i in self._grams.get(gram, ()):
+                    shared[i] = shared.get(i, 0) + 1
+            scores = {}
+            words = text.split()
+            word_grams = [_trigrams(word) for word in words]
+            for i, count in shared.items():
+                # Jaccard similarity of the whole trigram sets...
+                whole = count / (len(query_grams) + self._contacts[i][3] - count)
+                # ...or, per query word, of its best-matching contact word, so a typo in one
+                # word ("alcia" -> Alicia Keys) is not diluted by the contact's other words
+                per_word = sum(max(_jaccard(grams, _trigrams(w)) for w in self._contacts[i][4])
+                               for grams in word_grams) / len(words)
+                scores[i] = max(whole, per_word)
+            # Every query word is a word of the contact (1.0) or the start of one (0.9): "alice k"
+            prefix_hits = set(self._prefix_matches(words[0]))
+            exact_hits = set(self._prefix_matches(words[0], exact=True))
+            for word in words[1:]:
+                prefix_hits &= set(self._prefix_matches(word))
+                exact_hits &= set(self._prefix_matches(word, exact=True))
+            for i in prefix_hits:
+                scores[i] = max(scores.get(i, 0), 1.0 if i in exact_hits else 0.9)
+
+            # Break ties in favour of people met more often
+            ranked = sorted(
+                (i for i, score in scores.items() if score >= MIN_SCORE),
+                key=lambda i: (-round(scores[i], 2), -self._contacts[i][2], self._contacts[i][0]))
+            return [{"name": self._contacts[i][1], "email": self._contacts[i][0],
+                     "score": round(scores[i], 2)} for i in ranked[:limit]]
+
+    def resolve(self, names, limit=3):
+        """
+        Looks up several names at once. Each result is "Found" (one strong, clear match),
+        "Ambiguous" (several close matches, or only weak fuzzy ones to confirm) or "NotFound".
+        """
+        results = []
+        for name in names:
+            matches = self.lookup(name, limit)
+            if not matches:
+                status = "NotFound"
+            elif matches[0]["score"] >= FOUND_SCORE and (
+                    len(matches) == 1 or matches[0]["score"] - matches[1]["score"] >= 0.2):
+                status, matches = "Found", matches[:1]
+            else:
+                status = "Ambiguous"
+            results.append({"query": name, "status": status, "matches": matches})
+        return results
+
+
+def main():
+    # python contacts.py <contacts.csv|contacts.vcf> [user_id]: import contacts for a user
+    from credential_store import DEFAULT_USER
+    if len(sys.argv) < 2:
+        print("usage: python contacts.py <contacts.csv|contacts.vcf> [user_id]")
+        return
+    user_id = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_USER
+    directory = ContactDirectory(os.getenv("CONTACTS_DB", "contacts.db"), owner=user_id)
+    print(f"Imported {directory.import_file(sys.argv[1])} contacts for {user_id!r}")
+
+
+if __name__ == "__main__":
+    main()
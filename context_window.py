@@ -0,0 +1,128 @@
+import json
+import os
+from collections import deque
+
+# Prompt-history budgets (tokens) per model; CONTEXT_TOKEN_BUDGET overrides for any model
+MODEL_TOKEN_BUDGETS = {
+    "openai/gpt-4o-mini": 4000,
+    "openai/gpt-4o": 8000,
+}
+DEFAULT_TOKEN_BUDGET = 2000
+
+# Chat formatting overhead per message (role marker, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def budget_for_model(model_name):
+    override = os.getenv("CONTEXT_TOKEN_BUDGET")
+    if override:
+        return int(override)
+    return MODEL_TOKEN_BUDGETS.get(model_name, DEFAULT_TOKEN_BUDGET)
+
+
+_estimate_warned = False
+
+
+def _estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def get_token_counter(model_name):
+    """
+    Returns a function counting tokens in a string for the given model with tiktoken.
+    The encoding is loaded on the first call, not here, so importing or building a
+    conversation never downloads anything. If tiktoken is missing or its encoding
+    cannot be loaded (e.g. offline without TIKTOKEN_CACHE_DIR), it falls back to
+    ~4 characters per token and says so once.
+    """
+    encoding = None
+
+    def count(text):
+        nonlocal encoding
+        if encoding is None:
+            encoding = _load_encoding(model_name)
+        if encoding is False:
+            return _estimate_tokens(text)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count
+
+
+def _load_encoding(model_name):
+    global _estimate_warned
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(model_name.split("/")[-1])
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        if not _estimate_warned:
+            _estimate_warned = True
+            print(f"Token counting falls back to ~4 characters per token (tiktoken unavailable: {e})")
+        return False
+
+
+def item_tokens(item, count_tokens):
+    """
+    Tokens of one SDK input item (message, tool call or tool output) as serialized for the model.
+    """
+    content = item.get("content") if isinstance(item, dict) else None
+    text = content if isinstance(content, str) else json.dumps(item, default=str)
+    return count_tokens(text) + MESSAGE_OVERHEAD_TOKENS
+
+
+def trim_history(items, budget_tokens, count_tokens):
+    """
+    Returns the newest whole turns of SDK history items (each turn starts at a
+    user message, so tool calls stay with their outputs) that fit budget_tokens.
+    Only the kept turns plus one are tokenized, whatever the history length.
+    """
+    kept, total = [], 0
+    turn, turn_tokens = [], 0
+    for item in reversed(items):
+        turn.append(item)
+        turn_tokens += item_tokens(item, count_tokens)
+        if isinstance(item, dict) and item.get("role") == "user":
+            if total + turn_tokens > budget_tokens:
+                break
+            kept.extend(turn)
+            total += turn_tokens
+            turn, turn_tokens = [], 0
+    return kept[::-1]
+
+
+class ContextWindow:
+    """
+    Sliding window of chat messages kept under a token budget.
+    Each message is tokenized once on append; the running total is kept
+    incrementally and the oldest messages are evicted from the front.
+    """
+
+    def __init__(self, budget_tokens, count_tokens, on_evict=None):
+        self.budget_tokens = budget_tokens
+        self.count_tokens = count_tokens
+        # Called with each evicted message (e.g. to fold it into a summary)
+        self.on_evict = on_evict
+        self.total_tokens = 0
+        self._messages = deque()
+
+    def append(self, role, content):
+        content = content if isinstance(content, str) else str(content)
+        message = {"role": role, "content": content}
+        tokens = self.count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+        self._messages.append((message, tokens))
+        self.total_tokens += tokens
+
+        # Always keep the newest message, even if it alone exceeds the budget
+        while self.total_tokens > self.budget_tokens and len(self._messages) > 1:
+            evicted, evicted_tokens = self._messages.popleft()
+            self.total_tokens -= evicted_tokens
+            if self.on_evict:
+                self.on_evict(evicted)
+
+    def messages(self):
+        return [message for message, _ in self._messages]
+
+    def __len__(self):
+        return len(self._messages)
@@ -0,0 +1,289 @@
+import ast
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dotenv import load_dotenv
+from agents import RunConfig, Runner, SQLiteSession
+from openai.types.responses import ResponseTextDeltaEvent
+from agent_graph import MODEL_NAME
+from intent_router import route
+from meeting_context import MeetingContext
+from context_window import ContextWindow, budget_for_model, get_token_counter, item_tokens, trim_history
+from conversation_memory import ConversationMemory
+from instrumentation import span
+from credential_store import DEFAULT_USER, acting_as
+
+load_dotenv()
+
+# --- Memory Mode ---
+# "session": replay the newest SQLiteSession turns that fit the token budget (default)
+# "summary": send a running summary + collected details + the recent window instead
+MEMORY_MODE = os.getenv("MEMORY_MODE", "session")
+
+# SQLiteSession database shared by the Streamlit UI and the API server
+CONVERSATIONS_DB = os.getenv("CONVERSATIONS_DB", "conversations.db")
+
+SYSTEM_PROMPT = """You are MeetingBot 🤖.
+Handle scheduling, rescheduling, canceling, and updating meetings.
+Ask one question at a time.
+Be polite and concise.
+"""
+
+count_tokens = get_token_counter(MODEL_NAME)
+
+
+class ConversationDirectory:
+    """
+    Owner (and the sub-agent waiting for a reply) of every server conversation, kept
+    in conversations.db next to the SQLiteSession history so both survive eviction
+    from memory and restarts.
+    """
+
+    def __init__(self, db_path=None):
+        self._db = sqlite3.connect(db_path or CONVERSATIONS_DB, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS conversation_owners ("
+                "conversation_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, created_at REAL, "
+                "active_intent TEXT)")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(conversation_owners)")}
+            if "active_intent" not in columns:
+                self._db.execute("ALTER TABLE conversation_owners ADD COLUMN active_intent TEXT")
+            self._db.commit()
+
+    def _has_history(self, conversation_id):
+        try:
+            return self._db.execute(
+                "SELECT 1 FROM agent_sessions WHERE session_id = ?", (conversation_id,)).fetchone() is not None
+        except sqlite3.OperationalError:
+            # No SQLiteSession has been created in this database yet
+            return False
+
+    def claim(self, conversation_id, user_id):
+        """
+        Records user_id as the owner of a new conversation. Returns False if the id is
+        already taken, including by history that predates owner records.
+        """
+        with self._lock:
+            if self._has_history(conversation_id):
+                return False
+            try:
+                self._db.execute(
+                    "INSERT INTO conversation_owners (conversation_id, user_id, created_at) VALUES (?, ?, ?)",
+                    (conversation_id, user_id, time.time()))
+            except sqlite3.IntegrityError:
+                return False
+            self._db.commit()
+            return True
+
+    def owner(self, conversation_id):
+        """
+        Returns the user owning the conversation, or None if it does not exist.
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT user_id FROM conversation_owners WHERE conversation_id = ?",
+                (conversation_id,)).fetchone()
+        return row[0] if row else None
+
+    def active_intent(self, conversation_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT active_intent FROM conversation_owners WHERE conversation_id = ?",
+                (conversation_id,)).fetchone()
+        return row[0] if row else None
+
+    def set_active_intent(self, conversation_id, intent):
+        with self._lock:
+            self._db.execute(
+                "UPDATE conversation_owners SET active_intent = ? WHERE conversation_id = ?",
+                (intent, conversation_id))
+            self._db.commit()
+
+
+def _item_text(item):
+    # Text of a stored message item: a plain string or a list of output_text parts
+    content = item.get("content")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+class Conversation:
+    """
+    State of one chat: displayed history, token-budgeted context window, summary
+    memory, the sub-agent waiting for a reply and the SQLiteSession it persists to.
+    Calendar calls during its turns act for `user_id`. With a `directory`, the
+    waiting sub-agent is saved after every turn so restore() can pick it up again.
+    Used by both the Streamlit frontend and the API server.
+    """
+
+    def __init__(self, graph, conversation_id=None, memory_mode=None, db_path=None, user_id=None,
+                 directory=None):
+        self.graph = graph
+        self.directory = directory
+        self.conversation_id = conversation_id or str(uuid.uuid4())
+        self.user_id = user_id or DEFAULT_USER
+        self.memory_mode = memory_mode or MEMORY_MODE
+        self.history = []
+        # Summary of turns evicted from the context window, plus details collected so far
+        self.summary = ConversationMemory()
+        # Token-budgeted view of the history; the summary-mode prompt, and the budget
+        # that bounds the stored history replayed in session mode
+        self.window = ContextWindow(
+            budget_for_model(MODEL_NAME) - count_tokens(SYSTEM_PROMPT), count_tokens,
+            on_evict=self.summary.compact)
+        # Intent of the sub-agent that answered last (it may be waiting for a reply)
+        self.active_intent = None
+        self.db_session = SQLiteSession(self.conversation_id, db_path or CONVERSATIONS_DB)
+        self.last_result = None
+
+    def remember(self, role, content):
+        """
+        Appends a message to the history, the collected details and the context window.
+        """
+        self.history.append({"role": role, "content": content})
+        self.summary.observe(role, content)
+        self.window.append(role, content)
+
+    async def restore(self):
+        """
+        Rebuilds the history, context window and summary memory from the stored
+        SQLiteSession items (e.g. after the server evicted this conversation or
+        restarted), and the waiting sub-agent from the directory.
+        """
+        items = await self.db_session.get_items()
+        tool_names = {item.get("call_id"): item.get("name", "tool")
+                      for item in items if item.get("type") == "function_call"}
+        reply = None
+        for item in items:
+            if item.get("type") == "function_call_output":
+                output = item.get("output")
+                try:
+                    # Tool dicts are stored as their repr
+                    output = ast.literal_eval(output)
+                except (ValueError, SyntaxError, TypeError):
+                    pass
+                self.summary.record_outcome(tool_names.get(item.get("call_id"), "tool"), output)
+            elif item.get("role") == "user":
+                # Only the last assistant message of a turn is its reply (earlier ones preceded a handoff)
+                if reply is not None:
+                    self.remember("assistant", reply)
+                    reply = None
+                self.remember("user", _item_text(item))
+            elif item.get("role") == "assistant":
+                reply = _item_text(item)
+        if reply is not None:
+            self.remember("assistant", reply)
+        if self.directory is not None:
+            self.active_intent = self.directory.active_intent(self.conversation_id)
+
+    def _bounded_history(self, history, new_items):
+        """
+        session_input_callback: the SDK hands over the whole stored history, and only its
+        newest whole turns that fit the window budget (next to the new input) reach the model.
+        """
+        budget = self.window.budget_tokens - sum(item_tokens(item, count_tokens) for item in new_items)
+        return trim_history(history, budget, count_tokens) + new_items
+
+    def _agent_input(self, user_msg):
+        """
+        Returns (input, session) for the run according to the memory mode.
+        In summary mode the prompt is the compact memory plus the recent window;
+        in session mode the replayed history is trimmed to the same token budget.
+        Either way its size stays roughly constant however long the conversation gets.
+        """
+        if self.memory_mode != "summary":
+            return user_msg, self.db_session
+
+        items = []
+        memory_block = self.summary.render()
+        if memory_block:
+            items.append({"role": "system", "content": memory_block})
+        items.extend(self.window.messages())
+        return items, None
+
+    def _run_config(self):
+        return RunConfig(session_input_callback=self._bounded_history)
+
+    def _start_turn(self, user_msg):
+        self.remember("user", user_msg)
+        intent = route(user_msg, active_intent=self.active_intent)
+        agent = self.graph.agent_for(intent)
+        agent_input, session = self._agent_input(user_msg)
+        run_context = MeetingContext(
+            conversation_id=self.conversation_id,
+            messages=[{"role": "system", "content": SYSTEM_PROMPT}] + self.window.messages(),
+        )
+        return intent, agent, agent_input, session, run_context
+
+    async def _finish_turn(self, user_msg, result, session):
+        tool_names = {getattr(item.raw_item, "call_id", None): getattr(item.raw_item, "name", "tool")
+                      for item in result.new_items if item.type == "tool_call_item"}
+        for item in result.new_items:
+            if item.type == "tool_call_output_item":
+                self.summary.record_outcome(tool_names.get(item.call_id, "tool"), item.output)
+        if session is None:
+            # Summary mode still records the turn in the SQLiteSession
+            await self.db_session.add_items(
+                [{"role": "user", "content": user_msg}]
+                + [item.to_input_item() for item in result.new_items])
+        self.active_intent = self.graph.intent_of(result.last_agent)
+        if self.directory is not None:
+            self.directory.set_active_intent(self.conversation_id, self.active_intent)
+        self.remember("assistant", result.final_output)
+        return result
+
+    async def send(self, user_msg):
+        """
+        Runs one turn and returns the finished run result.
+        """
+        intent, agent, agent_input, session, run_context = self._start_turn(user_msg)
+        with acting_as(self.user_id), span("turn", agent.name, intent=intent or "manager", streamed=False):
+            try:
+                result = await Runner.run(agent, agent_input, context=run_context, session=session,
+                                          hooks=self.graph.hooks, run_config=self._run_config())
+            except BaseException as e:
+                self.graph.hooks.abort(run_context, e)
+                raise
+            return await self._finish_turn(user_msg, result, session)
+
+    async def stream(self, user_msg):
+        """
+        Runs one turn with streaming, yielding SDK stream events as they arrive.
+        The finished run result is left in self.last_result.
+        """
+        intent, agent, agent_input, session, run_context = self._start_turn(user_msg)
+        with acting_as(self.user_id), span("turn", agent.name, intent=intent or "manager", streamed=True):
+            result = Runner.run_streamed(agent, input=agent_input, context=run_context, session=session,
+                                         hooks=self.graph.hooks, run_config=self._run_config())
+            try:
+                async for event in result.stream_events():
+                    yield event
+            except BaseException as e:
+                # Also covers the consumer going away mid-stream (GeneratorExit)
+                self.graph.hooks.abort(run_context, e)
+                raise
+            self.last_result = await self._finish_turn(user_msg, result, session)
+
+
+def describe_event(event):
+    """
+    Reduces an SDK stream event to a small JSON-able dict for frontends, or None to skip it:
+    {"type": "delta", "text"}, {"type": "handoff", "agent"},
+    {"type": "tool_called", "tool"}, {"type": "tool_output", "emails"}.
+    """
+    if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+        return {"type": "delta", "text": event.data.delta}
+    if event.type == "agent_updated_stream_event":
+        return {"type": "handoff", "agent": event.new_agent.name}
+    if event.type == "run_item_stream_event" and event.name == "tool_called":
+        return {"type": "tool_called", "tool": getattr(event.item.raw_item, "name", "")}
+    if event.type == "run_item_stream_event" and event.name == "tool_output":
+        output = event.item.output
+        emails = len(output.get("email_results") or []) if isinstance(output, dict) else 0
+        return {"type": "tool_output", "emails": emails}
+    return None
@@ -0,0 +1,138 @@
+import re
+from collections import deque
+from intent_router import classify
+from contacts import EMAIL_RE, NAMED_EMAIL_RE
+
+ORGANIZER_RE = re.compile(
+    r"\b(?i:organi[sz]er is|it'?s me,?|i am|i'm|my name is|this is)\s+([A-Z][a-z]+(?: [A-Z][a-z]+)?)")
+WITH_NAMES_RE = re.compile(
+    r"\bwith ((?:[A-Z][a-z]+)(?:(?:, | and | & )(?:[A-Z][a-z]+))*)")
+DATE_RE = re.compile(
+    r"\b(\d{4}-\d{2}-\d{2}"
+    r"|\d{1,2} (?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]* \d{4}"
+    r"|today|tomorrow|(?:next )?(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday))\b",
+    re.IGNORECASE)
+TIME_RE = re.compile(r"\b(\d{1,2}:\d{2}\s*(?:am|pm)?|\d{1,2}\s*(?:am|pm))\b", re.IGNORECASE)
+TOPIC_RE = re.compile(
+    r"\b(?:topic|about|regarding|subject|agenda)\s*(?:is|:|will be)?\s+(.+?)\s*(?:[.?!]|$)",
+    re.IGNORECASE)
+
+SUMMARY_LINE_CHARS = 160
+OUTCOME_CHARS = 240
+
+
+def _shorten(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+class ConversationMemory:
+    """
+    Compact memory for long sessions, in bounded parts:
+    - a digest of the latest messages that fell out of the context window
+    - the outcome of each tool call (meeting scheduled, cancelled, listed...)
+    - the structured meeting details collected so far
+    Past the bounds the oldest digest lines and outcomes are dropped, and the
+    rendered memory says how many, so the prompt stays roughly constant per turn
+    without hiding that something was left out.
+    """
+
+    def __init__(self, max_summary_lines=8, max_outcomes=12):
+        self.summary = deque()
+        self.max_summary_lines = max_summary_lines
+        self.outcomes = deque()
+        self.max_outcomes = max_outcomes
+        # Messages and outcomes dropped from the bounded parts above
+        self.omitted_messages = 0
+        self.omitted_outcomes = 0
+        self.facts = {}
+        self.task_intent = None
+
+    def observe(self, role, content):
+        """
+        Updates the collected details from a new message.
+        A message that clearly starts a different task (e.g. cancel after schedule) resets them.
+        """
+        if role != "user":
+            return
+        intent, confidence = classify(content)
+        if intent and confidence >= 0.75 and intent != self.task_intent:
+            self.task_intent = intent
+            self.facts = {}
+
+        # participants: key (email, or lowercased name until an email is known) -> display name
+        participants = self.facts.setdefault("participants", {})
+        for names in WITH_NAMES_RE.findall(content):
+            for name in re.split(r", | and | & ", names):
+                if name not in participants.values():
+                    participants[name.lower()] = name
+        for name, email in NAMED_EMAIL_RE.findall(content):
+            name = name.strip(" ,")
+            participants.pop(name.lower(), None)
+            participants[email] = name
+        for email in EMAIL_RE.findall(content):
+            if email not in participants:
+                # "bob@x.com" after "with Bob": attach the address to the known name
+                participants[email] = participants.pop(email.split("@")[0].lower(), None)
+
+        for key, pattern in (("organizer", ORGANIZER_RE), ("date", DATE_RE),
+                             ("time", TIME_RE), ("topic", TOPIC_RE)):
+            match = pattern.search(content)
+            if match:
+                self.facts[key] = match.group(1).strip()
+
+    def compact(self, message):
+        """
+        Folds a message evicted from the context window into the running summary.
+        """
+        self.summary.append(f"{message['role']}: {_shorten(message['content'], SUMMARY_LINE_CHARS)}")
+        while len(self.summary) > self.max_summary_lines:
+            self.summary.popleft()
+            self.omitted_messages += 1
+
+    def record_outcome(self, tool, output):
+        """
+        Keeps what a tool call did (its status and message), which the chat text alone may not say.
+        """
+        if isinstance(output, dict):
+            text = " — ".join(str(output[key]) for key in ("status", "message", "display") if output.get(key))
+        else:
+            text = str(output)
+        if not text.strip():
+            return
+        self.outcomes.append(f"{tool}: {_shorten(text, OUTCOME_CHARS)}")
+        while len(self.outcomes) > self.max_outcomes:
+            self.outcomes.popleft()
+            self.omitted_outcomes += 1
+
+    def render(self):
+        """
+        Returns the memory as a system message body, or "" if there is nothing to add.
+        """
+        lines = []
+        if self.summary or self.omitted_messages:
+            header = "Earlier in this conversation (summary"
+            if self.omitted_messages:
+                header += f"; {self.omitted_messages} older messages are not included"
+            lines.append(header + "):")
+            lines.extend(f"- {line}" for line in self.summary)
+        if self.outcomes:
+            header = "Actions already taken (tool results"
+            if self.omitted_outcomes:
+                header += f"; {self.omitted_outcomes} older ones are not included"
+            lines.append(header + "):")
+            lines.extend(f"- {line}" for line in self.outcomes)
+
+        details = []
+        for key in ("organizer", "date", "time", "topic"):
+            if self.facts.get(key):
+                details.append(f"- {key}: {self.facts[key]}")
+        participants = self.facts.get("participants") or {}
+        if participants:
+            people = [f"{name} <{key}>" if name and "@" in key else (name or key)
+                      for key, name in participants.items()]
+            details.append(f"- participants: {', '.join(people)}")
+        if details:
+            lines.append("Details the user already provided (do not ask for these again):")
+            lines.extend(details)
+        return "\n".join(lines)
@@ -0,0 +1,176 @@
+import contextvars
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from urllib.parse import quote
+from instrumentation import span
+
+# It gives us the access to read/write to the users calendar
+SCOPES = ["https://www.googleapis.com/auth/calendar"]
+
+# User whose calendar is used when no conversation user is set (the single-user Streamlit app)
+DEFAULT_USER = os.getenv("DEFAULT_USER_ID", "default")
+
+# The user the current conversation/request acts for; calendar_async copies it into worker threads
+current_user = contextvars.ContextVar("current_user", default=DEFAULT_USER)
+
+
+def current_user_id():
+    return current_user.get()
+
+
+@contextmanager
+def acting_as(user_id):
+    """
+    Routes Calendar calls made inside the block to `user_id`'s account.
+    """
+    token = current_user.set(user_id or DEFAULT_USER)
+    try:
+        yield
+    finally:
+        current_user.reset(token)
+
+
+class CredentialsMissing(Exception):
+    """
+    The user has not connected a Google account yet.
+    """
+
+
+class CredentialStore:
+    """
+    Per-user Google credentials plus a bounded LRU of live per-user objects (Calendar services).
+
+    Tokens are stored as <token_dir>/<percent-encoded user>.json; the default user falls back to the
+    legacy ./token.json. Credentials are loaded on first use and refreshed only when
+    they have expired. Evicted services are simply rebuilt on the next request.
+    With `interactive` set, a default user without a token logs in through the
+    browser; servers turn it off so a request never blocks on a login.
+    """
+
+    def __init__(self, token_dir="tokens", client_secrets="credentials.json", max_services=256,
+                 interactive=True):
+        self.token_dir = token_dir
+        self.client_secrets = client_secrets
+        self.max_services = max_services
+        self.interactive = interactive
+        self._credentials = {}
+        self._services = OrderedDict()
+        self._user_locks = {}
+        self._lock = threading.Lock()
+
+    def token_path(self, user_id):
+        # Percent-encoding is reversible, so distinct users never share a file
+        # ("a/b" -> a%2Fb.json, "a_b" -> a_b.json); plain emails keep their readable name
+        safe = quote(user_id, safe="@")
+        path = os.path.join(self.token_dir, f"{safe}.json")
+        if user_id == DEFAULT_USER and not os.path.exists(path) and os.path.exists("token.json"):
+            return "token.json"
+        return path
+
+    def _user_lock(self, user_id):
+        with self._lock:
+            return self._user_locks.setdefault(user_id, threading.Lock())
+
+    def _save(self, user_id, creds):
+        path = self.token_path(user_id)
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        with open(path, "w") as token:
+            token.write(creds.to_json())
+
+    def get_credentials(self, user_id):
+        """
+        Returns valid credentials for the user, refreshing (then saving) them only when expired.
+        Only the default user may log in interactively (and only when `interactive`
+        is set); everyone else must be authorized first.
+        """
+        # Google client libraries are imported on first use to keep app startup fast
+        from google.auth.transport.requests import Request
+        # Imports the class that holds and refreshes your Google login tokens, letting your app securely access APIs like Google Calendar
+        from google.oauth2.credentials import Credentials
+
+        with self._user_lock(user_id):
+            creds = self._credentials.get(user_id)
+            # Load existing credentials
+            if creds is None and os.path.exists(self.token_path(user_id)):
+                creds = Credentials.from_authorized_user_file(self.token_path(user_id), SCOPES)
+
+            # If no credentials or invalid, refresh or login
+            if not creds or not creds.valid:
+                if creds and creds.refresh_token:
+                    with span("auth", "refresh"):
+                        creds.refresh(Request())
+                    self._save(user_id, creds)
+                elif user_id == DEFAULT_USER and self.interactive:
+                    creds = self.authorize(user_id)
+                else:
+                    raise CredentialsMissing(
+                        f"No Google Calendar access for user {user_id!r}; "
+                        f"run `python calendar_setup.py {user_id}` to connect an account.")
+
+            self._credentials[user_id] = creds
+            return creds
+
+    def authorize(self, user_id):
+        """
+        Runs the local OAuth consent flow for a user and stores the resulting token.
+        """
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        with span("auth", "login"):
+            flow = InstalledAppFlow.from_client_secrets_file(self.client_secrets, SCOPES)
+            creds = flow.run_local_server(port=0)
+        self._save(user_id, creds)
+        self._credentials[user_id] = creds
+        return creds
+
+    def put_credentials(self, user_id, creds, persist=True):
+        """
+        Registers credentials obtained elsewhere (e.g. a web OAuth callback).
+        """
+        with self._user_lock(user_id):
+            if persist:
+                self._save(user_id, creds)
+            self._credentials[user_id] = creds
+        self.evict(user_id)
+
+    def service(self, user_id, factory):
+        """
+        Returns the user's live object from the LRU, building it with factory(user_id) on a miss.
+        """
+        with self._lock:
+            if user_id in self._services:
+                self._services.move_to_end(user_id)
+                return self._services[user_id]
+        built = factory(user_id)
+        with self._lock:
+            built = self._services.setdefault(user_id, built)
+            self._services.move_to_end(user_id)
+            while len(self._services) > self.max_services:
+                evicted, _ = self._services.popitem(last=False)
+                self._credentials.pop(evicted, None)
+        return built
+
+    def evict(self, user_id):
+        with self._lock:
+            self._services.pop(user_id, None)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_credential_store():
+    """
+    Process-wide store configured from TOKEN_DIR, GOOGLE_CLIENT_SECRETS and MAX_CALENDAR_SERVICES.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = CredentialStore(
+                token_dir=os.getenv("TOKEN_DIR", "tokens"),
+                client_secrets=os.getenv("GOOGLE_CLIENT_SECRETS", "credentials.json"),
+                max_services=int(os.getenv("MAX_CALENDAR_SERVICES", "256")),
+            )
+        return _store
@@ -1,45 +1,180 @@
+import asyncio
 import os
+import queue
 import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from email.message import EmailMessage
 from dotenv import load_dotenv
+from instrumentation import instrumented
 
 
 load_dotenv()
 
 
+class SMTPPool:
+    """Pool of authenticated SMTP sessions.
+    Connections are opened lazily (EHLO, STARTTLS and LOGIN once) and reused for
+    later messages; send_bulk fans messages out over `size` worker threads.
+    Pass user/password=None and use_tls=False to talk to a local aiosmtpd stand-in.
+    """
+
+    def __init__(self, host, port, user=None, password=None, email_from=None,
+                 use_tls=None, size=4, timeout=30, max_idle_seconds=60):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.email_from = email_from or user
+        # Use SSL if port is 465, otherwise STARTTLS unless disabled
+        self.use_tls = port != 465 if use_tls is None else use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_idle_seconds = max_idle_seconds
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="smtp")
+
+    def _connect(self):
+        if self.port == 465:
+            smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+        else:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+        if self.user and self.password:
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def _acquire(self):
+        # Reuse the most recently used session unless the server has probably dropped it
+        while True:
+            try:
+                smtp, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect()
+            if time.monotonic() - last_used < self.max_idle_seconds:
+                return smtp
+            self._close(smtp)
+
+    def _release(self, smtp):
+        self._idle.put((smtp, time.monotonic()))
+
+    @staticmethod
+    def _close(smtp):
+        try:
+            smtp.quit()
+        except Exception:
+            pass
+
+    def build_message(self, to_email, subject, body):
+        msg = EmailMessage()
+        msg["Subject"] = subject
+        msg["From"] = self.email_from
+        msg["To"] = to_email
+        msg.set_content(body)
+        return msg
+
+    @instrumented("smtp", "send")
+    def send(self, to_email: str, subject: str, body: str) -> dict:
+        """Send one email on a pooled session. Returns dict with status and message."""
+        msg = self.build_message(to_email, subject, body)
+        with self._slots:
+            smtp = None
+            try:
+                smtp = self._acquire()
+                try:
+                    smtp.send_message(msg)
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    # Pooled session went stale; reconnect once and retry
+                    self._close(smtp)
+                    smtp = self._connect()
+                    smtp.send_message(msg)
+            except Exception as e:
+                if smtp is not None:
+                    self._close(smtp)
+                return {"status": "Failed", "message": str(e)}
+            self._release(smtp)
+
+        return {"status": "Sent", "message": f"Email sent to {to_email}"}
+
+    def send_bulk(self, messages) -> list:
+        """Send many emails concurrently over the pool.
+        messages: list of (to_email, subject, body). Returns one result dict per message, in order.
+        """
+        return list(self._executor.map(lambda m: self.send(*m), messages))
+
+    def close(self):
+        while True:
+            try:
+                smtp, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._close(smtp)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool():
+    """Return the process-wide pool built from environment vars:
+    SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_FROM, SMTP_POOL_SIZE,
+    SMTP_USE_TLS (0 disables STARTTLS, e.g. for a local sink)
+    Returns None if the SMTP configuration is missing.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            host = os.getenv("SMTP_HOST")
+            port = int(os.getenv("SMTP_PORT", "0"))
+            user = os.getenv("SMTP_USER")
+            password = os.getenv("SMTP_PASS")
+            if not host or not port or not user or not password:
+                return None
+            use_tls = os.getenv("SMTP_USE_TLS")
+            _default_pool = SMTPPool(
+                host, port, user, password,
+                email_from=os.getenv("EMAIL_FROM", user),
+                use_tls=None if use_tls is None else use_tls != "0",
+                size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+            )
+        return _default_pool
+
+
+# Not instrumented itself: SMTPPool.send records the one "smtp" span per email
 def send_email(to_email: str, subject: str, body: str) -> dict:
-    """Send a simple email using SMTP. SMTP configuration is read from environment vars:
+    """Send a simple email using the pooled SMTP sender. SMTP configuration is read from environment vars:
     SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, EMAIL_FROM
     Returns dict with status and message.
     """
-    host = os.getenv("SMTP_HOST")
-    port = int(os.getenv("SMTP_PORT", "0"))
-    user = os.getenv("SMTP_USER")
-    password = os.getenv("SMTP_PASS")
-    email_from = os.getenv("EMAIL_FROM", user)
-
-    if not host or not port or not user or not password:
+    pool = get_default_pool()
+    if pool is None:
         return {"status": "Failed", "message": "SMTP configuration missing in environment"}
+    return pool.send(to_email, subject, body)
 
-    msg = EmailMessage()
-    msg["Subject"] = subject
-    msg["From"] = email_from
-    msg["To"] = to_email
-    msg.set_content(body)
 
+def send_bulk(messages, pool=None) -> list:
+    """Send many emails, reusing authenticated sessions across a small worker pool.
+    messages: list of (to_email, subject, body). Returns one result dict per recipient, in order.
+    """
+    pool = pool or get_default_pool()
+    if pool is None:
+        return [{"status": "Failed", "message": "SMTP configuration missing in environment"}
+                for _ in messages]
+    return pool.send_bulk(messages)
+
+
+async def send_emails_async(messages) -> list:
+    """Send several emails without blocking the event loop.
+    messages: list of (to_email, subject, body). Returns one result dict per message, in order.
+    """
+    if not messages:
+        return []
     try:
-        # Use SSL if port is 465, otherwise try STARTTLS on 587
-        if port == 465:
-            with smtplib.SMTP_SSL(host, port) as smtp:
-                smtp.login(user, password)
-                smtp.send_message(msg)
-        else:
-            with smtplib.SMTP(host, port) as smtp:
-                smtp.ehlo()
-                smtp.starttls()
-                smtp.login(user, password)
-                smtp.send_message(msg)
+        return await asyncio.to_thread(send_bulk, messages)
     except Exception as e:
-        return {"status": "Failed", "message": str(e)}
-
-    return {"status": "Sent", "message": f"Email sent to {to_email}"}
+        return [{"status": "Failed", "message": str(e)} for _ in messages]
@@ -0,0 +1,220 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+
+PKT = datetime.timezone(datetime.timedelta(hours=5))
+
+# Partial-response selectors: the only event fields the app reads, so list/get/patch
+# payloads (and the mirror) carry nothing else. "status" marks deletions in delta syncs.
+# Attendees keep every property a guest can carry (comment, additionalGuests...), since
+# guest lists are written back whole; patches that replace them still re-read the
+# current list from Google first (calendar_setup.get_current_attendees).
+EVENT_FIELDS = ("id,status,summary,description,start,end,htmlLink,organizer(email),"
+                "attendees(email,displayName,optional,responseStatus,self,resource,organizer,"
+                "comment,additionalGuests,id)")
+LIST_FIELDS = f"items({EVENT_FIELDS}),nextPageToken,nextSyncToken"
+
+
+def parse_event_time(value):
+    """
+    Parses a Google Calendar start/end value (dateTime or all-day date) into an aware datetime in PKT.
+    """
+    if isinstance(value, dict):
+        value = value.get("dateTime", value.get("date"))
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=PKT)
+    return parsed.astimezone(PKT)
+
+
+class EventStore:
+    """
+    Local mirror of a Google Calendar.
+    Does one full sync of events ending in the last `history_days` days or later,
+    then pulls only changes using Google's syncToken.
+    Optionally persisted to SQLite so the mirror survives restarts.
+    """
+
+    def __init__(self, service_factory, calendar_id="primary", db_path=None, max_staleness=30, owner=None,
+                 history_days=90):
+        # service_factory returns the Calendar service (calendar_setup.get_service)
+        self._service_factory = service_factory
+        self.calendar_id = calendar_id
+        # Rows are stored under "<owner>/<calendar_id>" so several users can share one database
+        self._db_key = f"{owner}/{calendar_id}" if owner else calendar_id
+        self.max_staleness = max_staleness
+        self.history_days = history_days
+        self.version = 0
+        self._events = {}
+        self._sorted = None
+        self._sync_token = None
+        self._last_sync = 0.0
+        self._lock = threading.RLock()
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    # ---------- Persistence ----------
+
+    def _open_db(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events (calendar_id TEXT, event_id TEXT, data TEXT, "
+            "PRIMARY KEY (calendar_id, event_id))")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state (calendar_id TEXT PRIMARY KEY, sync_token TEXT, "
+            "history_days INTEGER)")
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(sync_state)")]
+        if "history_days" not in columns:
+            self._db.execute("ALTER TABLE sync_state ADD COLUMN history_days INTEGER")
+        self._db.commit()
+
+        rows = self._db.execute(
+            "SELECT data FROM events WHERE calendar_id = ?", (self._db_key,)).fetchall()
+        for (data,) in rows:
+            event = json.loads(data)
+            self._events[event["id"]] = event
+        row = self._db.execute(
+            "SELECT sync_token, history_days FROM sync_state WHERE calendar_id = ?",
+            (self._db_key,)).fetchone()
+        # A token from a sync with another window keeps following that window; start over
+        if row and row[1] == self.history_days:
+            self._sync_token = row[0]
+
+    def _persist(self, changed=(), removed=(), clear=False):
+        if self._db is None:
+            return
+        if clear:
+            self._db.execute("DELETE FROM events WHERE calendar_id = ?", (self._db_key,))
+        self._db.executemany(
+            "INSERT OR REPLACE INTO events (calendar_id, event_id, data) VALUES (?, ?, ?)",
+            [(self._db_key, e["id"], json.dumps(e)) for e in changed])
+        self._db.executemany(
+            "DELETE FROM events WHERE calendar_id = ? AND event_id = ?",
+            [(self._db_key, event_id) for event_id in removed])
+        self._db.execute(
+            "INSERT OR REPLACE INTO sync_state (calendar_id, sync_token, history_days) VALUES (?, ?, ?)",
+            (self._db_key, self._sync_token, self.history_days))
+        self._db.commit()
+
+    # ---------- Sync ----------
+
+    @property
+    def synced(self):
+        """
+        True once a full sync has completed (loaded from SQLite counts too).
+        """
+        return self._sync_token is not None
+
+    def sync(self, force=False):
+        """
+        Brings the mirror up to date.
+        Skipped if the last sync is younger than max_staleness seconds, unless force=True.
+        """
+        with self._lock:
+            fresh = time.monotonic() - self._last_sync < self.max_staleness
+            if self._sync_token and fresh and not force:
+                return
+            if self._sync_token is None:
+                self._full_sync()
+                return
+            try:
+                self._delta_sync()
+            except Exception as e:
+                # 410 Gone: the sync token expired, start over with a full sync
+                if getattr(getattr(e, "resp", None), "status", None) != 410:
+                    raise
+                self._sync_token = None
+                self._full_sync()
+
+    def _fetch_pages(self, **params):
+        service = self._service_factory()
+        page_token = None
+        items = []
+        while True:
+            result = service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=True,
+                pageToken=page_token,
+                fields=LIST_FIELDS,
+                **params
+            ).execute()
+            items.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return items, result.get("nextSyncToken")
+
+    def _full_sync(self):
+        # Only events ending after now - history_days: enough for upcoming meetings and
+        # for contacts from recent ones, without mirroring the calendar's whole history.
+        # Google rejects timeMin together with syncToken, and a sync token keeps following
+        # the window of the full sync that issued it, so changing history_days needs a new
+        # full sync (done on load when the stored window differs). Events that age out of
+        # the window stay mirrored until the next full sync.
+        time_min = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=self.history_days)
+        items, sync_token = self._fetch_pages(maxResults=250, timeMin=time_min.isoformat())
+        self._events = {e["id"]: e for e in items if e.get("status") != "cancelled"}
+        self._sync_token = sync_token
+        self._last_sync = time.monotonic()
+        self._changed()
+        self._persist(changed=self._events.values(), clear=True)
+
+    def _delta_sync(self):
+        items, sync_token = self._fetch_pages(syncToken=self._sync_token)
+        changed, removed = [], []
+        for e in items:
+            if e.get("status") == "cancelled":
+                if self._events.pop(e["id"], None) is not None:
+                    removed.append(e["id"])
+            else:
+                self._events[e["id"]] = e
+                changed.append(e)
+        self._sync_token = sync_token
+        self._last_sync = time.monotonic()
+        if changed or removed:
+            self._changed()
+        self._persist(changed=changed, removed=removed)
+
+    def _changed(self):
+        self.version += 1
+        self._sorted = None
+
+    # ---------- Local writes (keep the mirror coherent after our own mutations) ----------
+
+    def upsert(self, event):
+        with self._lock:
+            if not event or "id" not in event:
+                return
+            self._events[event["id"]] = event
+            self._changed()
+            self._persist(changed=[event])
+
+    def remove(self, event_id):
+        with self._lock:
+            if self._events.pop(event_id, None) is not None:
+                self._changed()
+                self._persist(removed=[event_id])
+
+    # ---------- Reads ----------
+
+    def get(self, event_id):
+        with self._lock:
+            return self._events.get(event_id)
+
+    def events(self):
+        """
+        Returns all mirrored events ordered by start time.
+        """
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """
+        Returns (version, events ordered by start time) as one consistent pair.
+        """
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(
+                    self._events.values(), key=lambda e: parse_event_time(e["start"]))
+            return self.version, self._sorted
@@ -0,0 +1,79 @@
+import datetime
+import math
+import numpy as np
+from event_store import PKT
+
+# Longest search window; the bitmap has days * 96 cells
+MAX_SEARCH_DAYS = 60
+
+
+def slot_request_error(duration_minutes, days, top_k):
+    """
+    Returns why a free-slot request is invalid (for tools to report), or None.
+    """
+    if duration_minutes <= 0:
+        return "The meeting length must be more than 0 minutes."
+    if not 1 <= days <= MAX_SEARCH_DAYS:
+        return f"Search between 1 and {MAX_SEARCH_DAYS} days."
+    if top_k < 1:
+        return "Ask for at least one slot."
+    return None
+
+
+def find_free_slots(busy, duration_minutes=60, days=5, top_k=5, start=None,
+                    work_start_hour=9, work_end_hour=18, slot_minutes=15):
+    """
+    Finds the earliest free slots of `duration_minutes` within working hours.
+
+    busy: iterable of (start, end) aware datetimes.
+    The window (today + `days` days) is laid out as a bitmap of `slot_minutes` cells;
+    busy intervals are painted with one difference-array cumsum and every candidate
+    start is tested at once with a sliding-window sum.
+    Returns up to top_k non-overlapping (start, end) datetimes in PKT.
+    Raises ValueError for the arguments slot_request_error() rejects.
+    """
+    error = slot_request_error(duration_minutes, days, top_k)
+    if error:
+        raise ValueError(error)
+    now = (start or datetime.datetime.now(PKT)).astimezone(PKT)
+    day0 = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    per_day = 24 * 60 // slot_minutes
+    total = days * per_day
+
+    # Paint busy intervals: +1 at each start cell, -1 after each end cell
+    diff = np.zeros(total + 1, dtype=np.int32)
+    offsets = np.array(
+        [((s - day0).total_seconds() / 60, (e - day0).total_seconds() / 60) for s, e in busy],
+        dtype=np.float64).reshape(-1, 2)
+    if len(offsets):
+        first = np.clip(np.floor(offsets[:, 0] / slot_minutes), 0, total).astype(np.int64)
+        last = np.clip(np.ceil(offsets[:, 1] / slot_minutes), 0, total).astype(np.int64)
+        np.add.at(diff, first, 1)
+        np.add.at(diff, last, -1)
+    busy_cells = np.cumsum(diff[:-1]) > 0
+
+    # Free = not busy, inside working hours, and not already in the past
+    cell_of_day = np.arange(per_day)
+    working = ((cell_of_day >= work_start_hour * 60 // slot_minutes)
+               & (cell_of_day < work_end_hour * 60 // slot_minutes))
+    free = (~busy_cells.reshape(days, per_day) & working).reshape(-1)
+    free[:math.ceil((now - day0).total_seconds() / 60 / slot_minutes)] = False
+
+    # A start cell fits if the next `need` cells are all free
+    need = max(1, math.ceil(duration_minutes / slot_minutes))
+    if need > total:
+        return []
+    runs = np.concatenate(([0], np.cumsum(free, dtype=np.int64)))
+    candidates = np.flatnonzero(runs[need:] - runs[:-need] == need)
+
+    slots = []
+    next_allowed = 0
+    for cell in candidates:
+        if cell < next_allowed:
+            continue
+        slot_start = day0 + datetime.timedelta(minutes=int(cell) * slot_minutes)
+        slots.append((slot_start, slot_start + datetime.timedelta(minutes=duration_minutes)))
+        next_allowed = cell + need
+        if len(slots) >= top_k:
+            break
+    return slots
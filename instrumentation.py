@@ -0,0 +1,299 @@
+import contextvars
+import functools
+import inspect
+import itertools
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# Spans are recorded by this module itself, so they work whether the Agents SDK
+# tracing is enabled or disabled with set_tracing_disabled(). It does not import
+# the SDK, so calendar and email code can record spans without loading it; the
+# runner hooks for agent and LLM spans live in instrumentation_hooks.py.
+#
+# Kinds: "turn" (one user message), "agent" (one agent's part of a run),
+# "llm" (one model call), "tool" (@function_tool), "calendar_api" (one Calendar
+# HTTP request or batch), "auth" (credential refresh/login), "smtp" (one email).
+#
+# Sinks, all optional (in-memory metrics are always kept):
+#   INSTRUMENTATION_JSONL  append one JSON line per span
+#   INSTRUMENTATION_DB     SQLite file with a `spans` table
+#   METRICS_PORT           serve Prometheus text at http://0.0.0.0:<port>/metrics
+
+# Histogram buckets (seconds) for the Prometheus endpoint
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Event counters (SpanRecorder.increment), exported as meeting_agent_<name>_total
+COUNTERS = {
+    "calendar_retries": "Calendar API calls retried after a rate-limit or server error.",
+    "calendar_retries_exhausted": "Calendar API calls that still failed after the last retry.",
+    "calendar_throttled": "Calendar API calls delayed by the client-side rate limiter.",
+}
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """
+    One timed operation. Nested spans share a trace_id and point at their parent,
+    which is the enclosing span() unless one is passed.
+    """
+
+    def __init__(self, kind, name, attributes=None, parent=None):
+        parent = parent or _current_span.get()
+        self.span_id = next(_span_ids)
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self.kind = kind
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.status = "ok"
+        self.error = None
+
+    def finish(self, error=None):
+        self.duration = time.perf_counter() - self._start
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        get_recorder().record(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "kind": self.kind, "name": self.name, "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3), "status": self.status,
+            "error": self.error, "attributes": self.attributes,
+        }
+
+
+class SpanRecorder:
+    """
+    Aggregates span metrics in memory and hands finished spans to a background
+    writer for the JSONL/SQLite sinks, so recording never blocks on disk.
+    """
+
+    def __init__(self, jsonl_path=None, db_path=None):
+        self.jsonl_path = jsonl_path
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # (kind, name) -> {"count", "errors", "sum", "buckets": [...]}
+        self._metrics = {}
+        # (counter name, ((label, value), ...)) -> count
+        self._counters = {}
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        if jsonl_path or db_path:
+            self._writer = threading.Thread(target=self._write_loop, daemon=True)
+            self._writer.start()
+
+    def record(self, span):
+        with self._lock:
+            metric = self._metrics.setdefault(
+                (span.kind, span.name), {"count": 0, "errors": 0, "sum": 0.0, "buckets": [0] * len(BUCKETS)})
+            metric["count"] += 1
+            metric["errors"] += span.status == "error"
+            metric["sum"] += span.duration
+            for i, bound in enumerate(BUCKETS):
+                if span.duration <= bound:
+                    metric["buckets"][i] += 1
+        if self._writer:
+            self._queue.put(span.to_dict())
+
+    def increment(self, name, amount=1, **labels):
+        """
+        Adds to an event counter (see COUNTERS), e.g. increment("calendar_retries", reason="backendError").
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def counters(self):
+        """
+        Returns {(name, ((label, value), ...)): count} (a copy).
+        """
+        with self._lock:
+            return dict(self._counters)
+
+    def _write_loop(self):
+        db = None
+        if self.db_path:
+            db = sqlite3.connect(self.db_path)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""CREATE TABLE IF NOT EXISTS spans (
+                trace_id INTEGER, span_id INTEGER, parent_id INTEGER, kind TEXT, name TEXT,
+                started_at REAL, duration_ms REAL, status TEXT, error TEXT, attributes TEXT)""")
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                if self.jsonl_path:
+                    with open(self.jsonl_path, "a", encoding="utf-8") as f:
+                        f.writelines(json.dumps(s) + "\n" for s in batch)
+                if db is not None:
+                    with db:
+                        db.executemany(
+                            "INSERT INTO spans VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            [(s["trace_id"], s["span_id"], s["parent_id"], s["kind"], s["name"],
+                              s["started_at"], s["duration_ms"], s["status"], s["error"],
+                              json.dumps(s["attributes"])) for s in batch])
+            except Exception as e:
+                print("Instrumentation sink error:", e)
+
+    def snapshot(self):
+        """
+        Returns {(kind, name): {"count", "errors", "sum", "buckets"}} (a copy).
+        """
+        with self._lock:
+            return {key: {**m, "buckets": list(m["buckets"])} for key, m in self._metrics.items()}
+
+    def render_prometheus(self):
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP meeting_agent_span_duration_seconds Duration of instrumented operations.",
+            "# TYPE meeting_agent_span_duration_seconds histogram",
+        ]
+        errors = []
+        for (kind, name), m in sorted(self.snapshot().items()):
+            labels = f'kind="{kind}",name="{_escape(name)}"'
+            for bound, count in zip(BUCKETS, m["buckets"]):
+                lines.append(f'meeting_agent_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'meeting_agent_span_duration_seconds_bucket{{{labels},le="+Inf"}} {m["count"]}')
+            lines.append(f"meeting_agent_span_duration_seconds_sum{{{labels}}} {m['sum']:.6f}")
+            lines.append(f"meeting_agent_span_duration_seconds_count{{{labels}}} {m['count']}")
+            errors.append(f"meeting_agent_span_errors_total{{{labels}}} {m['errors']}")
+        lines.append("# HELP meeting_agent_span_errors_total Instrumented operations that failed.")
+        lines.append("# TYPE meeting_agent_span_errors_total counter")
+        lines.extend(errors)
+
+        counters = self.counters()
+        for name in sorted({name for name, _ in counters}):
+            lines.append(f"# HELP meeting_agent_{name}_total {COUNTERS.get(name, name)}")
+            lines.append(f"# TYPE meeting_agent_{name}_total counter")
+            for (counter, labels), count in sorted(counters.items()):
+                if counter == name:
+                    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+                    lines.append(f"meeting_agent_{name}_total{{{rendered}}} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+def get_recorder():
+    """
+    Returns the process-wide recorder configured from INSTRUMENTATION_JSONL / INSTRUMENTATION_DB.
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = SpanRecorder(os.getenv("INSTRUMENTATION_JSONL"), os.getenv("INSTRUMENTATION_DB"))
+        return _recorder
+
+
+def current_span():
+    """
+    Returns the innermost open span() in this context, or None.
+    """
+    return _current_span.get()
+
+
+@contextmanager
+def span(kind, name, **attributes):
+    """
+    Times the enclosed block; nested spans (also across calendar_async worker threads) become children.
+    """
+    current = Span(kind, name, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def instrumented(kind, name=None):
+    """
+    Decorator recording a span per call; works for sync and async functions.
+    A returned {"status": "Failed"} dict counts as an error, like a raised exception.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        def close(current, result):
+            if isinstance(result, dict) and result.get("status") == "Failed":
+                current.status = "error"
+                current.error = result.get("message") or result.get("error")
+            return result
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(kind, span_name) as current:
+                    return close(current, await func(*args, **kwargs))
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(kind, span_name) as current:
+                return close(current, func(*args, **kwargs))
+        return wrapper
+    return decorator
+
+
+_metrics_server = None
+
+
+def start_metrics_server(port=None):
+    """
+    Serves the Prometheus text endpoint on /metrics from a daemon thread (once per process).
+    Uses METRICS_PORT when no port is given; does nothing if neither is set.
+    """
+    global _metrics_server
+    port = port or os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = get_recorder().render_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    with _recorder_lock:
+        if _metrics_server is None:
+            _metrics_server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+            threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+        return _metrics_server
@@ -0,0 +1,67 @@
+import threading
+from agents import RunHooks
+from instrumentation import Span, current_span
+
+# Agent and LLM spans come from Runner hooks, so this module imports the Agents SDK;
+# everything else records spans through instrumentation.py alone.
+
+
+class InstrumentationHooks(RunHooks):
+    """
+    Runner hooks recording one "agent" span per agent turn (the router and each
+    sub-agent after a handoff) and one "llm" span per model call.
+    Agent spans are children of the span around the run (the "turn"), LLM spans
+    of their agent's span. One instance serves concurrent runs, keyed by run context;
+    call abort() when a run raises so its open spans are closed.
+    """
+
+    def __init__(self):
+        self._open = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _context_id(context):
+        # The SDK may pass a different wrapper per hook; the run's own context object is stable
+        return id(getattr(context, "context", context))
+
+    def _key(self, kind, context, agent):
+        return kind, self._context_id(context), agent.name
+
+    def _start(self, kind, context, agent):
+        with self._lock:
+            parent = self._open.get(self._key("agent", context, agent)) if kind == "llm" else None
+            self._open[self._key(kind, context, agent)] = Span(
+                kind, agent.name, parent=parent or current_span())
+
+    def _finish(self, kind, context, agent):
+        with self._lock:
+            current = self._open.pop(self._key(kind, context, agent), None)
+        if current is not None:
+            current.finish()
+
+    def abort(self, context, error):
+        """
+        Finishes every span still open for the run with `context` as failed with `error`.
+        """
+        context_id = self._context_id(context)
+        with self._lock:
+            keys = [key for key in self._open if key[1] == context_id]
+            spans = [self._open.pop(key) for key in keys]
+        # LLM spans first, so children end before their agent
+        for current in sorted(spans, key=lambda s: s.kind != "llm"):
+            current.finish(error=error)
+
+    async def on_agent_start(self, context, agent):
+        self._start("agent", context, agent)
+
+    async def on_agent_end(self, context, agent, output):
+        self._finish("agent", context, agent)
+
+    async def on_handoff(self, context, from_agent, to_agent):
+        self._finish("agent", context, from_agent)
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        self._start("llm", context, agent)
+
+    async def on_llm_end(self, context, agent, response):
+        self._finish("llm", context, agent)
@@ -0,0 +1,109 @@
+import re
+
+# Keyword lists for routing. The manager agent's prompt is rendered from these
+# same lists, so the local router and the LLM router never disagree on vocabulary.
+INTENT_KEYWORDS = {
+    "view": [
+        "view my meetings", "feasible time slots", "show my calendar", "list my meetings",
+        "check my schedule", "what meetings do i have", "upcoming meetings", "display calendar",
+        "show events", "list events", "my agenda", "calendar status", "meeting list",
+        "see my meetings", "display my schedule", "show meetings", "view schedule",
+        "when am i free", "available slots", "busy times", "free time",
+        "my schedule", "my calendar", "what is on", "what's on", "am i free", "my meetings today",
+    ],
+    "schedule": [
+        "schedule", "book", "set up a meeting", "create a meeting", "plan a meeting",
+        "arrange meeting", "add meeting", "new meeting", "book a slot", "reserve time", "invite",
+        "setup meeting", "organize meeting", "make an appointment", "calendar invite",
+        "meeting with", "schedule with", "plan with", "arrange with", "set meeting",
+    ],
+    "cancel": [
+        "cancel", "delete", "get rid of", "remove meeting", "cancel meeting", "drop meeting",
+        "abandon meeting", "withdraw meeting", "cancel appointment", "rescind", "undo meeting",
+        "eliminate meeting", "kill meeting", "nix meeting", "scratch that", "scratch meeting",
+        "forget meeting", "never mind meeting", "skip meeting",
+    ],
+    "reschedule": [
+        "reschedule", "move", "change time", "change date", "postpone", "delay", "push back",
+        "shift meeting", "reschedule meeting", "move meeting", "shift time", "reschedule to",
+        "change to", "move to", "adjust time", "different time", "new time", "another time",
+        "reschedule for", "postpone to", "defer to",
+    ],
+    "update": [
+        "update", "modify", "change details", "add participant", "remove participant",
+        "change location", "change topic", "add attendee", "invite someone", "remove attendee",
+        "edit meeting", "update meeting", "modify meeting", "change description",
+        "update details", "change agenda", "modify details", "edit details", "change title",
+    ],
+}
+
+
+def _compile(keywords):
+    phrase_intent = {}
+    for intent, phrases in keywords.items():
+        for phrase in phrases:
+            phrase_intent.setdefault(phrase, intent)
+    # Longest phrases first, so "invite someone" wins over "invite" at the same position
+    alternatives = sorted(phrase_intent, key=len, reverse=True)
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(p) for p in alternatives) + r")\b")
+    return pattern, phrase_intent
+
+
+_PATTERN, _PHRASE_INTENT = _compile(INTENT_KEYWORDS)
+
+# Single words that are also everyday English ("my schedule", "update me", "book a room").
+# Alone they are weak evidence: they count only when a meeting-like object follows
+# ("book a call", "update the meeting"); otherwise the manager decides.
+AMBIGUOUS_KEYWORDS = {"schedule", "book", "update", "modify", "move", "delay", "invite"}
+_OBJECT = re.compile(
+    r"\s+(?:(?:a|an|the|my|our|this|that|another|new|it|up)\s+)?(?:\w+\s+)?"
+    r"(?:meeting|call|appointment|sync|session|slot|event|interview|standup|review)s?\b")
+# Confidence of an intent backed only by weak keywords; below route()'s threshold
+WEAK_CONFIDENCE = 0.5
+
+
+def classify(message):
+    """
+    Scores a message against the keyword lists.
+    Returns (intent, confidence) for the best intent, or (None, 0.0) if nothing matched.
+    Each intent scores the number of characters its phrases cover in the message;
+    a lone ambiguous word (see AMBIGUOUS_KEYWORDS) counts half and on its own
+    never reaches more than WEAK_CONFIDENCE.
+    """
+    text = message.lower()
+    scores, strong = {}, set()
+    for match in _PATTERN.finditer(text):
+        phrase = match.group(0)
+        intent = _PHRASE_INTENT[phrase]
+        weak = phrase in AMBIGUOUS_KEYWORDS and not _OBJECT.match(text, match.end())
+        scores[intent] = scores.get(intent, 0) + len(phrase) / (2 if weak else 1)
+        if not weak:
+            strong.add(intent)
+    if not scores:
+        return None, 0.0
+    intent = max(scores, key=scores.get)
+    confidence = scores[intent] / sum(scores.values())
+    return intent, confidence if intent in strong else min(confidence, WEAK_CONFIDENCE)
+
+
+def route(message, active_intent=None, min_confidence=0.75):
+    """
+    Picks a sub-agent intent locally when the message is unambiguous.
+    active_intent: intent of the sub-agent that handled the previous turn, if a task is in progress.
+    Returns None when the LLM manager should decide (no keyword, mixed intents,
+    or a different intent while another sub-agent is waiting for an answer).
+    """
+    intent, confidence = classify(message)
+    if intent is None or confidence < min_confidence:
+        return None
+    if active_intent is not None and intent != active_intent:
+        return None
+    return intent
+
+
+def keyword_list(intent):
+    """
+    Renders an intent's keywords for prompts, e.g. "'cancel', 'delete', ...".
+    """
+    return ", ".join(f"'{phrase}'" for phrase in INTENT_KEYWORDS[intent])
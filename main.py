@@ -1,83 +1,92 @@
 import asyncio
 import os
+import queue
 import streamlit as st
 from dotenv import load_dotenv
-import uuid
-from my_agents.Agent_manager import manager_agent
-from my_agents.meeting_canceller import meeting_canceller_agent
-from my_agents.meeting_rescheduler import meeting_rescheduler_agent
-from my_agents.meeting_update import meeting_update_agent
-from my_agents.meeting_scheduler import meeting_scheduler_agent
-from my_agents.meeting_viewer import meeting_viewer_agent
-from agents import Runner, AsyncOpenAI, OpenAIChatCompletionsModel, set_tracing_disabled, SQLiteSession
+from agents import set_tracing_disabled
 import nest_asyncio
-from voice_input import render_voice_input
+from voice_input import record_utterance
+from asr_pool import get_transcription_pool
+from agent_graph import get_agent_graph
+from conversation import Conversation, describe_event
+from instrumentation import start_metrics_server
+
+# Streamlit frontend. The agent graph and conversation logic live in agent_graph.py and
+# conversation.py and are shared with the headless API server (server.py).
 
 # --- Setup ---
 nest_asyncio.apply()
 load_dotenv()
 set_tracing_disabled(disabled=False)
-
-# --- OpenRouter Client ---
-client = AsyncOpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"),
-    base_url="https://openrouter.ai/api/v1"
-)
-
-# --- Model ---
-model = OpenAIChatCompletionsModel(
-    model="openai/gpt-4o-mini",
-    openai_client=client
-)
-
-# --- Agents ---
-viewer_agent_obj = meeting_viewer_agent(model=model)
-scheduler_agent_obj = meeting_scheduler_agent(model=model)
-canceller_agent_obj = meeting_canceller_agent(model=model)
-rescheduler_agent_obj = meeting_rescheduler_agent(model=model)
-updater_agent_obj = meeting_update_agent(model=model)
-
-# --- Main Agent Manager ---
-starting_agent = manager_agent(
-    model=model,
-    viewer=viewer_agent_obj,
-    scheduler=scheduler_agent_obj,
-    canceller=canceller_agent_obj,
-    rescheduler=rescheduler_agent_obj,
-    updater=updater_agent_obj,
-)
-
-# --- System Prompt ---
-SYSTEM_PROMPT = """You are MeetingBot 🤖.
-Handle scheduling, rescheduling, canceling, and updating meetings.
-Ask one question at a time.
-Be polite and concise.
-"""
+# Per-turn/agent/LLM/tool/Calendar/SMTP spans (independent of SDK tracing); METRICS_PORT serves /metrics
+start_metrics_server()
+
+# --- Agents: built once per process and shared by every browser session ---
+graph = get_agent_graph()
+
+# --- Streaming: render tokens and tool progress as they arrive (STREAM_RESPONSES=0 to disable) ---
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "1") != "0"
+
+TOOL_PROGRESS = {
+    "view_upcoming_meetings": "Checking calendar…",
+    "show_upcoming_meetings": "Checking calendar…",
+    "suggest_free_slots": "Looking for free slots…",
+    "find_contacts": "Looking up contacts…",
+    "schedule_meeting": "Checking calendar and booking the meeting…",
+    "cancel_meeting": "Cancelling meeting…",
+    "cancel_meetings": "Cancelling meetings…",
+    "reschedule_meeting": "Checking calendar and rescheduling…",
+    "reschedule_meetings": "Checking calendar and rescheduling meetings…",
+    "update_meeting": "Updating meeting…",
+    "update_meetings": "Updating meetings…",
+}
 
 # --- Streamlit Setup ---
 st.set_page_config(page_title="🚀 AI Meeting Assistant", layout="wide")
 st.title("👋 Meeting Bot 🤖")
 
-# --- Session State ---
-if "memory" not in st.session_state:
-    st.session_state.memory = []
-
-if "system_prompt" not in st.session_state:
-    st.session_state.system_prompt = SYSTEM_PROMPT
-
-if "runner" not in st.session_state:
-    st.session_state.runner = Runner()
+# --- Session State: one Conversation (history, context window, memory, SQLiteSession) per browser session ---
+if "conversation" not in st.session_state:
+    st.session_state.conversation = Conversation(graph)
+
+conversation = st.session_state.conversation
+
+
+async def stream_agent_reply(user_msg):
+    """
+    Runs the turn with streaming, rendering text deltas and
+    tool/handoff progress as they arrive. Returns the finished run result.
+    """
+    status = st.status("Thinking…", expanded=False)
+    placeholder = st.empty()
+    text = ""
+
+    async for event in conversation.stream(user_msg):
+        update = describe_event(event)
+        if update is None:
+            continue
+        if update["type"] == "delta":
+            text += update["text"]
+            placeholder.markdown(text + "▌")
+        elif update["type"] == "handoff":
+            # Show only the answering agent's text, not whatever preceded a handoff
+            text = ""
+            status.update(label=f"Handing off to {update['agent']}…")
+        elif update["type"] == "tool_called":
+            label = TOOL_PROGRESS.get(update["tool"], f"Running {update['tool']}…")
+            status.update(label=label)
+            status.write(label)
+        elif update["type"] == "tool_output" and update["emails"]:
+            status.write(f"Sending {update['emails']} notifications…")
+
+    result = conversation.last_result
+    status.update(label="Done", state="complete")
+    placeholder.markdown(result.final_output)
+    return result
 
-if "conversation_id" not in st.session_state:
-    st.session_state.conversation_id = str(uuid.uuid4())
-
-if "db_session" not in st.session_state:
-    st.session_state.db_session = SQLiteSession(
-        st.session_state.conversation_id, "conversations.db"
-    )
 
 # --- Initial Greeting ---
-if not st.session_state.memory:
+if not conversation.history:
     greeting = """👋 Hello! I'm your Meeting Bot 🤖.
 I can help you with:
 - Schedule a meeting
@@ -86,54 +95,31 @@ I can help you with:
 - Reschedule a meeting
 How can I assist you today?
 """
-    st.session_state.memory.append({"role": "assistant", "content": greeting})
+    conversation.remember("assistant", greeting)
 
 # --- Helper: Process User Message ---
 
 
 def process_user_message(user_msg: str):
-    st.session_state.memory.append({"role": "user", "content": user_msg})
     with st.chat_message("user"):
         st.markdown(user_msg)
 
-    # --- Context trimming ---
-    MAX_TOTAL_CHARS = 4096
-    context_for_agent = [
-        {"role": "system", "content": st.session_state.system_prompt}]
-    total_chars = len(st.session_state.system_prompt)
-
-    for msg in reversed(st.session_state.memory):
-        msg_content = msg["content"] if isinstance(
-            msg["content"], str) else str(msg["content"])
-        msg_len = len(msg_content)
-        if total_chars + msg_len > MAX_TOTAL_CHARS:
-            break
-        context_for_agent.append({"role": msg["role"], "content": msg_content})
-        total_chars += msg_len
-
-    context_for_agent = context_for_agent[:1] + context_for_agent[1:][::-1]
-
     # --- Run Agent ---
     with st.chat_message("assistant"):
         try:
-            result = st.session_state.runner.run_sync(
-                starting_agent=starting_agent,
-                input=user_msg,
-                context=context_for_agent,
-                session=st.session_state.db_session
-            )
-            final_output = result.final_output
-            st.write(final_output)
-            st.session_state.memory.append(
-                {"role": "assistant", "content": final_output})
+            loop = asyncio.get_event_loop()
+            if STREAM_RESPONSES:
+                loop.run_until_complete(stream_agent_reply(user_msg))
+            else:
+                result = loop.run_until_complete(conversation.send(user_msg))
+                st.write(result.final_output)
         except Exception as e:
             st.error(f"An error occurred: {e}")
-            st.session_state.memory.append(
-                {"role": "assistant", "content": f"Sorry, I encountered an error: {e}"})
+            conversation.remember("assistant", f"Sorry, I encountered an error: {e}")
 
 
 # --- Display Chat History ---
-for msg in st.session_state.memory:
+for msg in conversation.history:
     with st.chat_message(msg["role"]):
         st.markdown(msg["content"])
 
@@ -148,8 +134,25 @@ with col2:
 
 # --- Handle Mic Input ---
 if mic_pressed:
-    with st.spinner("Recording for 8 seconds... Speak now!"):
-        spoken_text = render_voice_input(duration=8)
+    with st.spinner("Listening... Speak now, recording stops when you pause."):
+        audio = record_utterance(duration=15)
+    spoken_text = ""
+    if audio.size:
+        # Transcription runs in the ASR worker processes; this session only polls
+        pool = get_transcription_pool()
+        try:
+            job_id = pool.submit(audio)
+        except queue.Full:
+            st.warning("Voice transcription is busy right now, please try again or type your message.")
+        else:
+            queued = pool.metrics()["queued"]
+            label = f"Transcribing... ({queued} ahead of you)" if queued else "Transcribing..."
+            with st.spinner(label):
+                result = pool.wait(job_id)
+            if result["status"] == "Done":
+                spoken_text = result["text"]
+            else:
+                st.error(result["message"])
     if spoken_text:
         process_user_message(spoken_text)
 
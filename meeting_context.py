@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class MeetingContext:
+    """
+    Local run context passed to Runner (never sent to the model).
+    Tools read it through RunContextWrapper to know which conversation they serve.
+    """
+    conversation_id: str
+    messages: list = field(default_factory=list)
+
+
+def conversation_id_of(ctx):
+    """
+    Returns the conversation_id from a tool's RunContextWrapper, or None if the run has no MeetingContext.
+    """
+    return getattr(getattr(ctx, "context", None), "conversation_id", None)
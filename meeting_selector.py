@@ -1,21 +1,122 @@
+import threading
+from collections import OrderedDict
 from agents import function_tool
 from calendar_setup import list_meetings_for_selection
 
-def show_meeting_selection():
+# Last meeting list shown in each conversation: conversation_id -> [meeting, ...]
+# Later tool calls resolve "meeting 2" against exactly what the user saw, with no API call.
+MAX_SNAPSHOTS = 1024
+# Meetings shown per page; later pages are read only when the user asks for them
+PAGE_SIZE = 10
+_snapshots = OrderedDict()
+_snapshots_lock = threading.Lock()
+
+
+def save_selection_snapshot(conversation_id, meetings):
+    """
+    Stores the displayed list (index → event_id, label, start/end, attendees) for a conversation.
+    """
+    if not conversation_id:
+        return
+    with _snapshots_lock:
+        _snapshots[conversation_id] = list(meetings)
+        _snapshots.move_to_end(conversation_id)
+        while len(_snapshots) > MAX_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+
+
+def refresh_selection_snapshot(conversation_id, removed=(), updated=()):
+    """
+    Applies a conversation's own changes to the list it was shown: `removed` event ids
+    (cancelled) are dropped and `updated` events (as returned by Google) replace the
+    title, times and attendees of their entries. Other entries are left as they are
+    and the numbers keep what the user saw.
+    """
+    meetings = get_selection_snapshot(conversation_id)
+    if meetings is None:
+        return
+    removed = set(removed)
+    updated = {event["id"]: event for event in updated if event}
+    refreshed = []
+    for m in meetings:
+        if m["event_id"] in removed:
+            continue
+        event = updated.get(m["event_id"])
+        if event is None:
+            refreshed.append(m)
+            continue
+        start = event["start"].get("dateTime", event["start"].get("date"))
+        refreshed.append({
+            **m,
+            "label": f"{event.get('summary', 'No Title')} — {start}",
+            "start": start,
+            "end": event["end"].get("dateTime", event["end"].get("date")),
+            "attendees": event.get("attendees", []),
+        })
+    save_selection_snapshot(conversation_id, refreshed)
+
+
+def get_selection_snapshot(conversation_id):
+    """
+    Returns the last list shown in a conversation, or None if nothing was shown yet.
+    """
+    if not conversation_id:
+        return None
+    with _snapshots_lock:
+        return _snapshots.get(conversation_id)
+
+
+def load_selection_page(conversation_id, page=1):
+    """
+    Lists one page of upcoming meetings and remembers the list for the conversation.
+    Earlier pages are re-read from the mirror in the same pass, so the remembered list
+    is one consistent listing rather than pages taken at different times.
+    Returns (meetings to show, has_more, changed); changed means the earlier pages no
+    longer match what the conversation was shown. Then, or when the conversation has no
+    list to continue, the earlier pages are included in the meetings with their numbers.
+    """
+    offset = (max(1, page) - 1) * PAGE_SIZE
+    # One extra meeting tells whether a next page exists
+    listed = list_meetings_for_selection(max_results=offset + PAGE_SIZE + 1)
+    has_more = len(listed) > offset + PAGE_SIZE
+    listed = listed[:offset + PAGE_SIZE]
+    shown = listed[offset:]
+    if not shown:
+        return [], False, False
+    changed = False
+    if offset:
+        snapshot = get_selection_snapshot(conversation_id)
+        seen = [m["event_id"] for m in snapshot or [] if m["index"] <= offset]
+        if seen != [m["event_id"] for m in listed[:offset]]:
+            changed = snapshot is not None
+            shown = listed
+    save_selection_snapshot(conversation_id, listed)
+    return shown, has_more, changed
+
+
+def show_meeting_selection(conversation_id=None, page=1):
     """
     Returns a formatted list of upcoming meetings for user selection.
     Used by cancel, reschedule, update agents.
+    The list is remembered per conversation so the numbers can be resolved later.
+    page: 1-based page of PAGE_SIZE meetings; numbering continues across pages.
     """
-    meetings = list_meetings_for_selection()
+    page = max(1, page)
+    meetings, has_more, changed = load_selection_page(conversation_id, page)
     if not meetings:
         return {
             "status": "Failed",
-            "message": "No upcoming meetings found."
+            "message": "No upcoming meetings found." if page == 1 else "No more upcoming meetings."
         }
 
-    message = "Here are your upcoming meetings:\n"
+    if changed:
+        message = "Your meetings changed since the last list, so here is the updated list:\n"
+    else:
+        message = "Here are your upcoming meetings:\n"
     for m in meetings:
         message += f"{m['index']}) {m['label']}\n"
 
+    if has_more:
+        message += f"\nMore meetings are available (page {page + 1})."
     message += "\nPlease select the number of the meeting."
-    return message
\ No newline at end of file
+    return message
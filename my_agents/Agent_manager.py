@@ -1,10 +1,11 @@
 from agents import Agent
+from intent_router import keyword_list
 
 
 def manager_agent(model, viewer, scheduler, canceller, rescheduler, updater):
     return Agent(
         name="Manager Agent",
-        instructions="""
+        instructions=f"""
         You are the central router and conversational flow manager for all meeting-related actions.
         
         **CRITICAL TASK:** Review the entire conversation history (provided in the context) to determine the user's intent and whether a multi-turn task is already in progress.
@@ -14,19 +15,19 @@ def manager_agent(model, viewer, scheduler, canceller, rescheduler, updater):
         1. *MAINTAIN CONTEXT:* If the previous turn resulted in a handoff to a specific sub-agent (e.g., Scheduler) and that sub-agent asked a follow-up question requiring user input (for example: asking for a date or selection), do NOT immediately re-handoff in a loop. Instead present the sub-agent's follow-up question to the user and wait for the user's reply. Only route again to the sub-agent after the user responds with the requested information.
         
         2. *NEW INTENT ROUTING:* If the message is a new request or confirms a new intent, route based on keywords:
-            - *VIEW SCHEDULE:* If the user mentions 'view my meetings','feasible time slots', 'show my calendar', 'list my meetings', 'check my schedule' ,'view my meetings', 'show my calendar', 'list my meetings', 'check my schedule', 'what meetings do i have', 'upcoming meetings', 'display calendar', 'show events', 'list events', 'my agenda', 'calendar status', 'meeting list', 'see my meetings', 'display my schedule', 'show meetings', 'view schedule', 'feasible time slots', 'when am i free', 'available slots', 'busy times', 'free time' → **Handoff to viewer agent.**
+            - *VIEW SCHEDULE:* If the user mentions {keyword_list('view')} → **Handoff to viewer agent.**
             → *Handoff to viewer agent.*
-            - **SCHEDULING:** If the user mentions 'schedule', 'book', 'set up a meeting', 'create a meeting' 'schedule', 'book', 'set up a meeting', 'create a meeting', 'plan a meeting', 'arrange meeting', 'add meeting', 'new meeting', 'book a slot', 'reserve time', 'invite', 'setup meeting', 'organize meeting', 'make an appointment', 'calendar invite', 'meeting with', 'schedule with', 'plan with', 'arrange with', 'set meeting' → **Handoff to scheduler agent.**
-            - **CANCELLATION:** If the user mentions 'cancel', 'delete', 'get rid of' a meeting 'cancel', 'delete', 'get rid of', 'remove meeting', 'cancel meeting', 'drop meeting', 'abandon meeting', 'withdraw meeting', 'cancel appointment', 'rescind', 'undo meeting', 'eliminate meeting', 'kill meeting', 'nix meeting', 'scratch that', 'scratch meeting', 'forget meeting', 'never mind meeting', 'skip meeting' → **Handoff to canceller agent.**
-            - **RESCHEDULING:** If the user mentions 'reschedule', 'move', 'change time', 'change date' 'reschedule', 'move', 'change time', 'change date', 'postpone', 'delay', 'push back', 'shift meeting', 'reschedule meeting', 'move meeting', 'shift time', 'reschedule to', 'change to', 'move to', 'adjust time', 'different time', 'new time', 'another time', 'reschedule for', 'postpone to', 'defer to' → **Handoff to rescheduler agent.**
-            - **UPDATE/MODIFY:** If the user mentions 'update', 'modify', 'change details', 'add participant', 'change location','update', 'modify', 'change details', 'add participant', 'remove participant', 'change location', 'change topic', 'add attendee', 'invite someone', 'remove attendee', 'edit meeting', 'update meeting', 'modify meeting', 'change description', 'update details', 'change agenda', 'modify details', 'edit details', 'change title' → **Handoff to updater agent.**
+            - **SCHEDULING:** If the user mentions {keyword_list('schedule')} → **Handoff to scheduler agent.**
+            - **CANCELLATION:** If the user mentions {keyword_list('cancel')} → **Handoff to canceller agent.**
+            - **RESCHEDULING:** If the user mentions {keyword_list('reschedule')} → **Handoff to rescheduler agent.**
+            - **UPDATE/MODIFY:** If the user mentions {keyword_list('update')} → **Handoff to updater agent.**
         
         3. **DEFAULT RESPONSE:** If the message does not match an ongoing conversation or any of the above categories, politely and concisely reply:
            "I can only assist with scheduling, rescheduling, updating, and cancelling meetings. How can I help you manage your calendar today?"
 
         4. *HANDLE EDGE CASES:* Handle all edge cases and these are 2 of them:
 
-            - if user is asking for feasible timings so reply with scheduled meeting list and reply , only these are the busy slots you can schedule meeting anytime other than that.
+            - if user is asking for feasible timings, hand off to the viewer agent, which finds free slots with suggest_free_slots().
             - don't handle past dates (Example: current date is 8-jan-2026 , if user inputs 6-jan-2024 throw exception error)
         """,
         handoffs=[
@@ -1,14 +1,16 @@
-from .meeting_scheduler import meeting_scheduler_agent, schedule_meeting
-from .meeting_canceller import meeting_canceller_agent, cancel_meeting
-from .meeting_rescheduler import meeting_rescheduler_agent, reschedule_meeting
-from .meeting_update import meeting_update_agent, update_meeting
+from .meeting_scheduler import meeting_scheduler_agent, schedule_meeting, find_contacts
+from .meeting_canceller import meeting_canceller_agent, cancel_meeting, cancel_meetings
+from .meeting_rescheduler import meeting_rescheduler_agent, reschedule_meeting, reschedule_meetings
+from .meeting_update import meeting_update_agent, update_meeting, update_meetings
+from .meeting_viewer import meeting_viewer_agent, view_upcoming_meetings, suggest_free_slots
 from .Agent_manager import manager_agent
 
 __all__ = [
-    'meeting_scheduler_agent', 'schedule_meeting',
-    'meeting_canceller_agent', 'cancel_meeting',
-    'meeting_rescheduler_agent', 'reschedule_meeting',
-    'meeting_update_agent', 'update_meeting',
+    'meeting_scheduler_agent', 'schedule_meeting', 'find_contacts',
+    'meeting_canceller_agent', 'cancel_meeting', 'cancel_meetings',
+    'meeting_rescheduler_agent', 'reschedule_meeting', 'reschedule_meetings',
+    'meeting_update_agent', 'update_meeting', 'update_meetings',
+    'meeting_viewer_agent', 'view_upcoming_meetings', 'suggest_free_slots',
     'manager_agent'
 ]
 
@@ -1,22 +1,30 @@
-from agents import Agent, function_tool
-from calendar_tools import resolve_meeting_by_index
-from calendar_setup import delete_event, list_meetings_for_selection, PKT, get_credentials
-from email_utils import send_email
-from googleapiclient.discovery import build
-from meeting_selector import show_meeting_selection
+from agents import Agent, RunContextWrapper, function_tool
+from instrumentation import instrumented
+from calendar_tools import resolve_selection, resolve_meetings_by_index, event_attendees
+from calendar_setup import PKT, get_event_store
+from calendar_async import run_blocking, delete_event_async, batch_delete_events_async
+from notification_outbox import queue_emails_async
+from meeting_selector import load_selection_page, refresh_selection_snapshot, show_meeting_selection
+from meeting_context import MeetingContext, conversation_id_of
 from datetime import datetime
 
 
 @function_tool
-def show_upcoming_meetings():
+@instrumented("tool")
+async def show_upcoming_meetings(ctx: RunContextWrapper[MeetingContext], page: int = 1):
     """
     Returns upcoming meetings for the user to select from.
-    Uses list_meetings_for_selection() from calendar_setup.py
+    Uses load_selection_page() from meeting_selector.py
     and formats the start time in PKT.
+    page: which page of meetings to show (ask for 2, 3... only if the user wants more).
+    has_more / next_page tell whether another page exists; list_changed means the
+    earlier pages changed and are included again with their new numbers.
     """
-    meetings = list_meetings_for_selection()
+    page = max(1, page)
+    meetings, has_more, changed = await run_blocking(load_selection_page, conversation_id_of(ctx), page)
     if not meetings:
-        return {"status": "Failed", "message": "No upcoming meetings found."}
+        return {"status": "Failed",
+                "message": "No upcoming meetings found." if page == 1 else "No more upcoming meetings."}
 
     display_list = []
     for m in meetings:
@@ -30,78 +38,122 @@ def show_upcoming_meetings():
             display_label = f"{m['index']}. {m['label']}"
         display_list.append(display_label)
 
-    return {"status": "Success", "meetings": meetings, "display": "\n".join(display_list)}
+    if has_more:
+        display_list.append(f"More meetings are available (page {page + 1}).")
+    return {"status": "Success", "meetings": meetings, "display": "\n".join(display_list),
+            "has_more": has_more, "next_page": page + 1 if has_more else None, "list_changed": changed}
 
 
 @function_tool
-def cancel_meeting(selection_number: int | None = None, reason: str | None = None):
+@instrumented("tool")
+async def cancel_meeting(ctx: RunContextWrapper[MeetingContext],
+                         selection_number: int | None = None, reason: str | None = None):
     """
     Cancels a meeting from Google Calendar.
     Allows user to select a meeting by number from show_meeting_selection().
     """
+    conversation_id = conversation_id_of(ctx)
+
     # Step 1: If no selection, show meeting list
     if selection_number is None:
-        return show_meeting_selection()
+        return await run_blocking(show_meeting_selection, conversation_id)
 
-    # Step 2: Resolve index → actual event_id
-    event_id = resolve_meeting_by_index(selection_number)
-    if not event_id:
+    # Step 2: Resolve index → meeting from the list this conversation was shown
+    meeting = await run_blocking(resolve_selection, selection_number, conversation_id)
+    if not meeting:
         return {"status": "Failed", "message": "Invalid meeting selection."}
+    event_id = meeting["event_id"]
 
-    # Step 3: Get meeting label for confirmation
-    meeting_label = None
-    meetings = list_meetings_for_selection()
-    for m in meetings:
-        if m["event_id"] == event_id:
-            meeting_label = m.get("label")
-            break
+    # Step 3: Label and attendees (to notify after deletion) come from the selection and local mirror
+    meeting_label = meeting.get("label")
+    attendees = event_attendees(get_event_store().get(event_id)) or meeting.get("attendees", [])
 
     # Step 4: Cancel the meeting
-    # Fetch attendees before deletion so we can notify them
-    try:
-        creds = get_credentials()
-        service = build("calendar", "v3", credentials=creds)
-        event_obj = service.events().get(calendarId="primary", eventId=event_id).execute()
-        attendees = event_obj.get("attendees", [])
-        # Fallback: parse emails from description if attendees missing
-        if not attendees:
-            import re
-            desc = event_obj.get("description", "") or ""
-            emails = re.findall(r"[\w\.-]+@[\w\.-]+", desc)
-            attendees = [{"email": e} for e in sorted(set(emails))]
-    except Exception:
-        attendees = []
-
-    result = delete_event(event_id)
+    result = await delete_event_async(event_id)
     if result["status"] == "Failed":
         return {"status": "Failed", "event_id": event_id, "message": result["message"]}
+    # The list the user was shown must not offer the cancelled meeting again
+    refresh_selection_snapshot(conversation_id, removed=[event_id])
 
     # Notify attendees about cancellation
     email_subject = f"Meeting Cancelled: {meeting_label or event_id}"
-    email_results = []
-    for a in attendees:
-        to_email = a.get("email")
-        if not to_email:
+    body = (
+        f"Hello,\n\n"
+        f"The meeting '{meeting_label or event_id}' has been cancelled.\n"
+        f"Reason: {reason or 'Not specified'}\n\n"
+        f"If you have questions, contact the organizer.\n\n"
+        f"Regards,\nMeeting Bot"
+    )
+    recipients = [a.get("email") for a in attendees if a.get("email")]
+    queued = await queue_emails_async([(to_email, email_subject, body) for to_email in recipients])
+    email_results = [{"email": to_email, "result": res} for to_email, res in zip(recipients, queued)]
+
+    return {
+        "meeting_id": event_id,
+        "status": "Cancelled",
+        "reason": reason or "Not specified",
+        "message": f"✅ Meeting '{meeting_label or event_id}' cancelled successfully.",
+        "email_results": email_results,
+    }
+
+
+@function_tool
+@instrumented("tool")
+async def cancel_meetings(ctx: RunContextWrapper[MeetingContext],
+                          selection_numbers: list[int], reason: str | None = None):
+    """
+    Cancels several meetings at once (e.g. clearing a day).
+    selection_numbers are the numbers from show_meeting_selection().
+    All deletions are sent as one batch; returns a result per meeting.
+    """
+    # Results are keyed by selection number, so a repeated number is one meeting
+    selection_numbers = list(dict.fromkeys(selection_numbers))
+    selected = await run_blocking(
+        resolve_meetings_by_index, selection_numbers, conversation_id_of(ctx))
+    invalid = [n for n in selection_numbers if n not in selected]
+    if not selected:
+        return {"status": "Failed", "message": "Invalid meeting selection.", "invalid_selections": invalid}
+
+    # Attendees come from the local mirror, so no per-meeting events().get is needed
+    store = get_event_store()
+    attendees_by_event = {
+        m["event_id"]: event_attendees(store.get(m["event_id"])) for m in selected.values()
+    }
+
+    results = await batch_delete_events_async([m["event_id"] for m in selected.values()])
+    refresh_selection_snapshot(
+        conversation_id_of(ctx), removed=[r["event_id"] for r in results if r["status"] == "Cancelled"])
+
+    items = []
+    for (number, meeting), result in zip(selected.items(), results):
+        label = meeting.get("label")
+        if result["status"] == "Failed":
+            items.append({"selection_number": number, "status": "Failed",
+                          "meeting": label, "message": result["message"]})
             continue
+
+        email_subject = f"Meeting Cancelled: {label}"
         body = (
             f"Hello,\n\n"
-            f"The meeting '{meeting_label or event_id}' has been cancelled.\n"
+            f"The meeting '{label}' has been cancelled.\n"
             f"Reason: {reason or 'Not specified'}\n\n"
             f"If you have questions, contact the organizer.\n\n"
             f"Regards,\nMeeting Bot"
         )
-        try:
-            res = send_email(to_email, email_subject, body)
-        except Exception as e:
-            res = {"status": "Failed", "message": str(e)}
-        email_results.append({"email": to_email, "result": res})
+        recipients = [a.get("email") for a in attendees_by_event[meeting["event_id"]] if a.get("email")]
+        queued = await queue_emails_async([(to_email, email_subject, body) for to_email in recipients])
+        email_results = [{"email": to_email, "result": res} for to_email, res in zip(recipients, queued)]
+
+        items.append({"selection_number": number, "status": "Cancelled",
+                      "meeting": label, "email_results": email_results})
 
+    cancelled = sum(1 for i in items if i["status"] == "Cancelled")
     return {
-        "meeting_id": event_id,
-        "status": "Cancelled",
+        "status": "Cancelled" if cancelled == len(items) and not invalid else "Partial",
         "reason": reason or "Not specified",
-        "message": f"✅ Meeting '{meeting_label or event_id}' cancelled successfully.",
-        "email_results": email_results,
+        "message": f"✅ Cancelled {cancelled} of {len(selection_numbers)} meetings.",
+        "results": items,
+        "invalid_selections": invalid,
     }
 
 
@@ -119,7 +171,12 @@ def meeting_canceller_agent(model):
         - Proceed even if the user does not give a reason.
         - Never block cancellation due to missing reason.
         - Confirm cancellation clearly.
+        - If show_upcoming_meetings says has_more and the user wants to see more, call it
+          with next_page. If list_changed is true, the numbers changed: show the whole list again.
+        - If the user wants to cancel several meetings (e.g. "clear my Friday"), use
+          cancel_meetings(selection_numbers, reason) once with all the numbers instead of
+          calling cancel_meeting repeatedly, then report the result for each meeting.
         """,
-        tools=[show_upcoming_meetings, cancel_meeting],
+        tools=[show_upcoming_meetings, cancel_meeting, cancel_meetings],
         model=model
     )
@@ -1,12 +1,15 @@
 # my_agents/meeting_rescheduler.py
 
-from agents import Agent, function_tool
-from calendar_setup import update_event, list_meetings_for_selection, get_credentials
-from email_utils import send_email
-from googleapiclient.discovery import build
-from calendar_tools import check_slot_free, resolve_meeting_by_index
-from meeting_selector import show_meeting_selection
+from agents import Agent, RunContextWrapper, function_tool
+from instrumentation import instrumented
+from calendar_setup import get_busy_index, get_event_store
+from calendar_async import run_blocking, update_event_async, batch_update_event_times_async
+from notification_outbox import queue_emails_async
+from calendar_tools import check_slot_free, resolve_selection, resolve_meetings_by_index, event_attendees
+from meeting_selector import refresh_selection_snapshot, show_meeting_selection
+from meeting_context import MeetingContext, conversation_id_of
 from dateutil import parser
+from pydantic import BaseModel
 import datetime
 
 
@@ -14,32 +17,31 @@ PKT = datetime.timezone(datetime.timedelta(hours=5))
 
 
 @function_tool
-def reschedule_meeting(selection_number: int | None = None,
-                       new_date: str | None = None,
-                       new_time: str | None = None):
+@instrumented("tool")
+async def reschedule_meeting(ctx: RunContextWrapper[MeetingContext],
+                             selection_number: int | None = None,
+                             new_date: str | None = None,
+                             new_time: str | None = None):
     """
     Reschedule an existing meeting:
-    1. Fetch upcoming meetings
-    2. Display list if no selection_number is provided
+    1. Display list if no selection_number is provided
+    2. Resolve the meeting from the list the user was shown
     3. Parse new date/time
     4. Check for conflicts
     5. Update the meeting in Google Calendar
     """
-    # Step 1: Fetch upcoming meetings
-    meetings = list_meetings_for_selection()
-    if not meetings:
-        return {"status": "Failed", "message": "No upcoming meetings found."}
+    conversation_id = conversation_id_of(ctx)
 
-    # Step 2: If selection_number not provided, reuse shared selector
+    # Step 1: If selection_number not provided, reuse shared selector
     if selection_number is None:
-        return show_meeting_selection()
+        return await run_blocking(show_meeting_selection, conversation_id)
 
-    # Step 3: Resolve event_id and get old event info
-    event_id = resolve_meeting_by_index(int(selection_number))
-    if not event_id:
+    # Step 2: Resolve event_id and get old event info from the conversation's selection
+    old_event = await run_blocking(resolve_selection, int(selection_number), conversation_id)
+    if not old_event:
         return {"status": "Failed", "message": "Invalid meeting selection."}
 
-    old_event = meetings[int(selection_number) - 1]
+    event_id = old_event["event_id"]
     title = old_event.get("label", "No Title")
     description = old_event.get("description", "")
 
@@ -69,48 +71,32 @@ def reschedule_meeting(selection_number: int | None = None,
 
     new_end = new_start + datetime.timedelta(hours=1)
     # Step 5: Check for conflicts
-    if not check_slot_free(new_start, new_end, exclude_event_id=event_id):
+    if not await run_blocking(check_slot_free, new_start, new_end, exclude_event_id=event_id):
         return {"status": "Failed", "message": "Time slot clashes with another meeting."}
 
     # Step 6: Update the meeting in place
-    result = update_event(event_id, new_start, new_end)
+    result = await update_event_async(event_id, new_start, new_end)
     if result.get("status") != "Success":
         return {"status": "Failed", "message": "Failed to update the meeting."}
+    # The list the user was shown now carries the new time
+    refresh_selection_snapshot(conversation_id, updated=[result.get("event")])
 
-    # Fetch updated event details to notify attendees
-    email_results = []
-    try:
-        creds = get_credentials()
-        service = build("calendar", "v3", credentials=creds)
-        event_obj = service.events().get(calendarId="primary", eventId=event_id).execute()
-        attendees = event_obj.get("attendees", [])
-        html_link = event_obj.get("htmlLink")
-        # Fallback: if attendees empty, try to parse emails from description
-        if not attendees:
-            import re
-            desc = event_obj.get("description", "") or ""
-            emails = re.findall(r"[\w\.-]+@[\w\.-]+", desc)
-            attendees = [{"email": e} for e in sorted(set(emails))]
-    except Exception:
-        attendees = []
-        html_link = result.get("htmlLink")
+    # The updated event is already in the local mirror, so notifying attendees needs no fetch
+    event_obj = get_event_store().get(event_id) or {}
+    # Fallback: if attendees empty, try to parse emails from description
+    attendees = event_attendees(event_obj) or old_event.get("attendees", [])
+    html_link = event_obj.get("htmlLink") or result.get("htmlLink")
 
     email_subject = f"Meeting Rescheduled: {title}"
-    for a in attendees:
-        to_email = a.get("email")
-        if not to_email:
-            continue
-        body = (
-            f"Hello,\n\n"
-            f"The meeting '{title}' has been rescheduled to {new_start.strftime('%b %d, %Y, %H:%M')} PKT.\n"
-            f"Link: {html_link}\n\n"
-            f"Regards,\nMeeting Bot"
-        )
-        try:
-            res = send_email(to_email, email_subject, body)
-        except Exception as e:
-            res = {"status": "Failed", "message": str(e)}
-        email_results.append({"email": to_email, "result": res})
+    body = (
+        f"Hello,\n\n"
+        f"The meeting '{title}' has been rescheduled to {new_start.strftime('%b %d, %Y, %H:%M')} PKT.\n"
+        f"Link: {html_link}\n\n"
+        f"Regards,\nMeeting Bot"
+    )
+    recipients = [a.get("email") for a in attendees if a.get("email")]
+    queued = await queue_emails_async([(to_email, email_subject, body) for to_email in recipients])
+    email_results = [{"email": to_email, "result": res} for to_email, res in zip(recipients, queued)]
 
     return {
         "status": "Rescheduled",
@@ -120,6 +106,146 @@ def reschedule_meeting(selection_number: int | None = None,
     }
 
 
+async def _rescheduled_item(meeting, new_start, result):
+    """
+    Notifies the attendees of one batch-rescheduled meeting and returns its result entry.
+    """
+    title = meeting.get("label", "No Title")
+    if result["status"] != "Success":
+        return {"status": "Failed", "meeting": title, "message": "Failed to update the meeting."}
+
+    html_link = result.get("htmlLink")
+    email_subject = f"Meeting Rescheduled: {title}"
+    body = (
+        f"Hello,\n\n"
+        f"The meeting '{title}' has been rescheduled to {new_start.strftime('%b %d, %Y, %H:%M')} PKT.\n"
+        f"Link: {html_link}\n\n"
+        f"Regards,\nMeeting Bot"
+    )
+    recipients = [a.get("email") for a in event_attendees(result.get("event")) if a.get("email")]
+    queued = await queue_emails_async([(to_email, email_subject, body) for to_email in recipients])
+    email_results = [{"email": to_email, "result": res} for to_email, res in zip(recipients, queued)]
+    return {
+        "status": "Rescheduled",
+        "meeting": title,
+        "new_start": new_start.strftime('%b %d, %Y, %H:%M'),
+        "calendar_link": html_link,
+        "email_results": email_results,
+    }
+
+
+class MeetingTimeChange(BaseModel):
+    selection_number: int
+    new_date: str
+    new_time: str
+
+
+@function_tool
+@instrumented("tool")
+async def reschedule_meetings(ctx: RunContextWrapper[MeetingContext],
+                              changes: list[MeetingTimeChange]):
+    """
+    Reschedules several meetings at once (e.g. moving a recurring block).
+    Each change has a selection_number from show_meeting_selection(), a new_date and a new_time.
+    Updates are sent as one batch (more only when a meeting moves into another's old slot);
+    returns a result per meeting.
+    """
+    # Results are keyed by selection number: a repeated identical change is one move,
+    # while a meeting asked to move to two different times is not moved at all
+    items = {}
+    unique = {}
+    for change in changes:
+        first = unique.setdefault(change.selection_number, change)
+        if (first.new_date, first.new_time) != (change.new_date, change.new_time):
+            items[change.selection_number] = {
+                "status": "Failed", "message": "Conflicting changes for the same meeting."}
+    changes = [c for n, c in unique.items() if n not in items]
+
+    selected = await run_blocking(
+        resolve_meetings_by_index, [c.selection_number for c in changes], conversation_id_of(ctx))
+    today = datetime.datetime.now(PKT).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+
+    planned = []  # (change, meeting, new_start, new_end)
+    for change in changes:
+        meeting = selected.get(change.selection_number)
+        if meeting is None:
+            items[change.selection_number] = {"status": "Failed", "message": "Invalid meeting selection."}
+            continue
+        try:
+            new_start = parser.parse(f"{change.new_date} {change.new_time}").replace(tzinfo=PKT)
+        except Exception as e:
+            items[change.selection_number] = {"status": "Failed", "message": f"Invalid date/time format: {e}"}
+            continue
+        if new_start < today:
+            items[change.selection_number] = {"status": "Failed", "message": f"❌ {change.new_date} is in the past."}
+            continue
+        planned.append((change, meeting, new_start, new_start + datetime.timedelta(hours=1)))
+
+    # New slots must not overlap each other (the first request wins)
+    accepted = []
+    for plan in planned:
+        _, _, new_start, new_end = plan
+        if any(s < new_end and e > new_start for _, _, s, e in accepted):
+            items[plan[0].selection_number] = {"status": "Failed", "message": "Time slot clashes with another meeting."}
+            continue
+        accepted.append(plan)
+
+    # Another meeting's old slot only counts as free if that meeting is moved too,
+    # so drop clashing moves until the accepted set no longer changes
+    index = await run_blocking(get_busy_index)
+    while True:
+        moving = {m["event_id"] for _, m, _, _ in accepted}
+        rejected = [plan for plan in accepted
+                    if any(iv[2] not in moving for iv in index.overlapping(plan[2], plan[3]))]
+        if not rejected:
+            break
+        for plan in rejected:
+            items[plan[0].selection_number] = {"status": "Failed", "message": "Time slot clashes with another meeting."}
+            accepted.remove(plan)
+
+    # A meeting moving into another one's old slot is only sent after that one has
+    # moved, so a failed update never leaves two meetings in the same slot
+    moving = {m["event_id"] for _, m, _, _ in accepted}
+    waits_for = {m["event_id"]: {iv[2] for iv in index.overlapping(s, e)} & moving - {m["event_id"]}
+                 for _, m, s, e in accepted}
+    moved, failed = set(), set()
+    moved_events = []
+    pending = accepted
+    while pending:
+        blocked = [plan for plan in pending if waits_for[plan[1]["event_id"]] & failed]
+        for change, meeting, _, _ in blocked:
+            failed.add(meeting["event_id"])
+            items[change.selection_number] = {
+                "status": "Failed", "meeting": meeting.get("label", "No Title"),
+                "message": "Time slot is still taken by a meeting that could not be moved."}
+        pending = [plan for plan in pending if plan not in blocked]
+        # Meetings that wait for each other (e.g. a swap) can only go together
+        wave = [plan for plan in pending if waits_for[plan[1]["event_id"]] <= moved] or pending
+        pending = [plan for plan in pending if plan not in wave]
+        if not wave:
+            break
+
+        results = await batch_update_event_times_async(
+            [(m["event_id"], new_start, new_end) for _, m, new_start, new_end in wave])
+        for (change, meeting, new_start, _), result in zip(wave, results):
+            if result["status"] == "Success":
+                moved.add(meeting["event_id"])
+                moved_events.append(result.get("event"))
+            else:
+                failed.add(meeting["event_id"])
+            items[change.selection_number] = await _rescheduled_item(meeting, new_start, result)
+
+    if moved:
+        refresh_selection_snapshot(conversation_id_of(ctx), updated=moved_events)
+    rescheduled = sum(1 for i in items.values() if i["status"] == "Rescheduled")
+    return {
+        "status": "Rescheduled" if rescheduled == len(items) else "Partial",
+        "message": f"✅ Rescheduled {rescheduled} of {len(items)} meetings.",
+        "results": [{"selection_number": n, **r} for n, r in items.items()],
+    }
+
+
 def meeting_rescheduler_agent(model):
     return Agent(
         name="Meeting Rescheduler",
@@ -138,7 +264,9 @@ def meeting_rescheduler_agent(model):
         - If the user tries to reschedule to a past date, ask them to provide a future date instead.
         - Format required: YYYY-MM-DD (e.g., 2026-01-15)
         - Handle errors gracefully and inform the user.
+        - To move several meetings at once, call reschedule_meetings(changes) once with one
+          entry per meeting instead of calling reschedule_meeting repeatedly.
         """,
-        tools=[reschedule_meeting],
+        tools=[reschedule_meeting, reschedule_meetings],
         model=model
     )
@@ -1,16 +1,20 @@
 from tracemalloc import start
 from agents import Agent, function_tool
-from calendar_setup import create_event
+from instrumentation import instrumented
+from calendar_async import run_blocking, create_event_async
+from calendar_setup import get_contact_directory
 from calendar_tools import check_slot_free
 import random
 import datetime
-from email_utils import send_email
+from notification_outbox import queue_emails_async
+from .meeting_viewer import suggest_free_slots
 
 PKT = datetime.timezone(datetime.timedelta(hours=5))
 
 
 @function_tool
-def schedule_meeting(organizer_name: str,
+@instrumented("tool")
+async def schedule_meeting(organizer_name: str,
                      participants: list | None,
                      participant_name: str | None = None,
                      participant_email: str | None = None,
@@ -59,7 +63,7 @@ def schedule_meeting(organizer_name: str,
     end = start + datetime.timedelta(hours=1)
 
     # 🔧 FIX 4: Clash check
-    if not check_slot_free(start, end):
+    if not await run_blocking(check_slot_free, start, end):
         return {"status": "Failed", "message": "Time slot clashes with another meeting."}
 
     # -------------------------
@@ -71,7 +75,7 @@ def schedule_meeting(organizer_name: str,
     for p in participants_list:
         attendees.append({"email": p.get("email"), "name": p.get("name")})
 
-    google_event = create_event(
+    google_event = await create_event_async(
         title=f"Meeting: {topic or 'General Discussion'}",
         description=(f"Organizer: {organizer_name}\n" +
                      "Participants:\n" +
@@ -92,7 +96,7 @@ def schedule_meeting(organizer_name: str,
 
     # Send emails to all participants and collect results
     email_subject = f"Meeting Scheduled: {topic or 'Discussion'} on {meeting_date}"
-    email_results = []
+    messages = []
     for p in participants_list:
         name = p.get("name")
         email = p.get("email")
@@ -105,8 +109,9 @@ def schedule_meeting(organizer_name: str,
             f"Time: {meeting_time} PKT\n"
             f"Regards,\nMeeting Bot"
         )
-        res = send_email(email, email_subject, email_body)
-        email_results.append({"email": email, "result": res})
+        messages.append((email, email_subject, email_body))
+    queued = await queue_emails_async(messages)
+    email_results = [{"email": m[0], "result": res} for m, res in zip(messages, queued)]
 
     return {
         "meeting_id": meeting_id,
@@ -117,6 +122,19 @@ def schedule_meeting(organizer_name: str,
     }
 
 
+@function_tool
+@instrumented("tool")
+async def find_contacts(names: list[str]):
+    """
+    Looks up participants' email addresses by name (full, partial or misspelled) in the
+    user's contacts: people from past meetings plus imported address books.
+    Pass all names at once, e.g. ["Alice", "Bob K"].
+    Each result is Found (use its email), Ambiguous (ask the user to pick) or NotFound (ask for the email).
+    """
+    directory = await run_blocking(get_contact_directory)
+    return {"status": "Success", "contacts": directory.resolve(names)}
+
+
 def meeting_scheduler_agent(model):
     return Agent(
         name="Scheduler",
@@ -129,12 +147,17 @@ def meeting_scheduler_agent(model):
         - **Do not ask for details already provided in the history.**
         - Ask for missing details one by one.
         - Ask short and clear questions.
+        - When the user names participants without emails, call find_contacts() once with all their names
+          and use the Found emails directly. Ask only about Ambiguous ones (offer the matches) and
+          NotFound ones (ask for the email).
         - When there are multiple participants, collect a list of participant names and emails (e.g., name<email@example.com>), or ask for them one-by-one.
         - Once all required fields are collected, call the schedule_meeting() tool with `participants` as a list of objects: [{"name":..., "email":...}, ...].
         - Confirm with a clear message when the meeting is booked.
         - Accept time in both 24-hour (11:00) and 12-hour (11:00 AM) formats.
         - Never ask the user to reconfirm time format once provided.
         - Normalize time internally before calling the tool.
+        - If the user has no time in mind or the slot clashes, call suggest_free_slots() for the
+          meeting date and offer the returned slots.
 
         Example flow:
         User: "I want to schedule a meeting with Alice."
@@ -143,6 +166,6 @@ def meeting_scheduler_agent(model):
         Agent: "I see. What specific time on tomorrow would you like the meeting to start? (e.g., 10:00)"
 
         """,
-        tools=[schedule_meeting],
+        tools=[schedule_meeting, find_contacts, suggest_free_slots],
         model=model
     )
@@ -1,26 +1,31 @@
-from agents import Agent, function_tool
-from calendar_setup import list_meetings_for_selection, get_credentials
-from calendar_tools import resolve_meeting_by_index
-from meeting_selector import show_meeting_selection
-from googleapiclient.discovery import build
-from email_utils import send_email
+from agents import Agent, RunContextWrapper, function_tool
+from instrumentation import instrumented
+from calendar_async import run_blocking, get_current_attendees_async, patch_event_async, batch_patch_events_async
+from calendar_tools import resolve_meeting_by_index, resolve_meetings_by_index, event_attendees
+from meeting_selector import refresh_selection_snapshot, show_meeting_selection
+from meeting_context import MeetingContext, conversation_id_of
+from notification_outbox import queue_emails_async
 
 
 @function_tool
-def update_meeting(selection_number: int | None = None,
-                   new_title: str | None = None,
-                   add_attendees: list[str] | None = None,
-                   remove_attendees: list[str] | None = None):
+@instrumented("tool")
+async def update_meeting(ctx: RunContextWrapper[MeetingContext],
+                         selection_number: int | None = None,
+                         new_title: str | None = None,
+                         add_attendees: list[str] | None = None,
+                         remove_attendees: list[str] | None = None):
     """
     Update a meeting's title or participants.
     Returns the updated meeting details.
     """
+    conversation_id = conversation_id_of(ctx)
+
     # List meetings if selection_number not provided
     if selection_number is None:
-        return show_meeting_selection()
+        return await run_blocking(show_meeting_selection, conversation_id)
 
-    # Resolve event_id
-    event_id = resolve_meeting_by_index(int(selection_number))
+    # Resolve event_id from the list this conversation was shown
+    event_id = await run_blocking(resolve_meeting_by_index, int(selection_number), conversation_id)
     if not event_id:
         return {"status": "Failed", "message": "Invalid meeting selection."}
 
@@ -28,42 +33,36 @@ def update_meeting(selection_number: int | None = None,
     if not new_title and not add_attendees and not remove_attendees:
         return {"status": "Failed", "message": "No updates provided. Please provide a new title or participants to add/remove."}
 
-    # Access Google Calendar
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
-    event = service.events().get(calendarId="primary", eventId=event_id).execute()
-
-    # Prepare update body
-    update_body = {
-        "start": event["start"],  # preserve start time
-        "end": event["end"],      # preserve end time
-        "summary": new_title if new_title else event.get("summary", "")
-    }
+    # Patch only what changed
+    update_body = {}
+    if new_title:
+        update_body["summary"] = new_title
 
-    # Preserve existing attendees
-    attendees = event.get("attendees", [])
+    if add_attendees or remove_attendees:
+        # Attendees are replaced as a whole, so start from Google's current list
+        current = await get_current_attendees_async([event_id])
+        if event_id not in current:
+            return {"status": "Failed", "message": "Could not read the meeting's current participants."}
+        attendees = list(current[event_id])
 
-    # Remove attendees if requested
-    if remove_attendees:
-        attendees = [a for a in attendees if a["email"]
-                     not in remove_attendees]
+        # Remove attendees if requested
+        if remove_attendees:
+            attendees = [a for a in attendees if a["email"]
+                         not in remove_attendees]
 
-    # Add new attendees if requested
-    if add_attendees:
-        existing_emails = {a["email"] for a in attendees}
-        for email in add_attendees:
-            if email not in existing_emails:
-                attendees.append({"email": email})
+        # Add new attendees if requested
+        if add_attendees:
+            existing_emails = {a["email"] for a in attendees}
+            for email in add_attendees:
+                if email not in existing_emails:
+                    attendees.append({"email": email})
 
-    # Always include attendees field to preserve existing participants
-    update_body["attendees"] = attendees
+        update_body["attendees"] = attendees
 
     # Execute the update
-    updated_event = service.events().update(
-        calendarId="primary",
-        eventId=event_id,
-        body=update_body
-    ).execute()
+    updated_event = await patch_event_async(event_id, update_body)
+    # The list the user was shown now carries the new title and participants
+    refresh_selection_snapshot(conversation_id, updated=[updated_event])
 
     # Prepare updated details
     updated_details = {
@@ -76,40 +75,128 @@ def update_meeting(selection_number: int | None = None,
     }
 
     # Notify attendees about update
-    attendees = updated_event.get("attendees", []) or []
     # Fallback: parse emails from description if attendees missing
-    if not attendees:
-        import re
-        desc = updated_event.get("description", "") or ""
-        emails = re.findall(r"[\w\.-]+@[\w\.-]+", desc)
-        attendees = [{"email": e} for e in sorted(set(emails))]
-    email_results = []
+    attendees = event_attendees(updated_event)
     email_subject = f"Meeting Updated: {updated_details['Title']}"
-    for a in attendees:
-        to_email = a.get("email")
-        if not to_email:
+    body = (
+        f"Hello,\n\n"
+        f"The meeting '{updated_details['Title']}' has been updated.\n\n"
+        f"Updated details:\n"
+        f"Title: {updated_details['Title']}\n"
+        f"Start: {updated_details['Start']}\n"
+        f"End: {updated_details['End']}\n"
+        f"Link: {updated_details['Calendar Link']}\n\n"
+        f"Regards,\nMeeting Bot"
+    )
+    recipients = [a.get("email") for a in attendees if a.get("email")]
+    queued = await queue_emails_async([(to_email, email_subject, body) for to_email in recipients])
+    email_results = [{"email": to_email, "result": res} for to_email, res in zip(recipients, queued)]
+
+    return {
+        "status": "Updated",
+        "message": "✅ Meeting has been updated successfully.",
+        "details": updated_details,
+        "email_results": email_results,
+    }
+
+
+@function_tool
+@instrumented("tool")
+async def update_meetings(ctx: RunContextWrapper[MeetingContext],
+                          selection_numbers: list[int],
+                          new_title: str | None = None,
+                          add_attendees: list[str] | None = None,
+                          remove_attendees: list[str] | None = None):
+    """
+    Applies the same title or participant change to several meetings at once.
+    selection_numbers are the numbers from show_meeting_selection().
+    All updates are sent as one batch; returns a result per meeting.
+    """
+    if not new_title and not add_attendees and not remove_attendees:
+        return {"status": "Failed", "message": "No updates provided. Please provide a new title or participants to add/remove."}
+
+    # Results are keyed by selection number, so a repeated number is one meeting
+    selection_numbers = list(dict.fromkeys(selection_numbers))
+    selected = await run_blocking(
+        resolve_meetings_by_index, selection_numbers, conversation_id_of(ctx))
+    invalid = [n for n in selection_numbers if n not in selected]
+    if not selected:
+        return {"status": "Failed", "message": "Invalid meeting selection.", "invalid_selections": invalid}
+
+    # Attendees are replaced as a whole, so start from Google's current lists (one batch
+    # read); a meeting whose list could not be read is not patched
+    current = {}
+    if add_attendees or remove_attendees:
+        current = await get_current_attendees_async([m["event_id"] for m in selected.values()])
+    items = []
+    patched, changes = [], []
+    for number, meeting in selected.items():
+        if (add_attendees or remove_attendees) and meeting["event_id"] not in current:
+            items.append({"selection_number": number, "status": "Failed", "meeting": meeting.get("label"),
+                          "message": "Could not read the meeting's current participants."})
+            continue
+        body = {}
+        if new_title:
+            body["summary"] = new_title
+        if add_attendees or remove_attendees:
+            attendees = [a for a in current[meeting["event_id"]]
+                         if a.get("email") not in (remove_attendees or [])]
+            existing_emails = {a.get("email") for a in attendees}
+            for email in add_attendees or []:
+                if email not in existing_emails:
+                    attendees.append({"email": email})
+            body["attendees"] = attendees
+        patched.append((number, meeting))
+        changes.append((meeting["event_id"], body))
+
+    results = await batch_patch_events_async(changes) if changes else []
+    refresh_selection_snapshot(
+        conversation_id_of(ctx), updated=[r["event"] for r in results if r["status"] == "Success"])
+
+    for (number, meeting), result in zip(patched, results):
+        if result["status"] != "Success":
+            items.append({"selection_number": number, "status": "Failed",
+                          "meeting": meeting.get("label"), "message": result["message"]})
             continue
+
+        updated_event = result["event"]
+        title = updated_event.get("summary", "")
+        start = updated_event["start"].get("dateTime", updated_event["start"].get("date"))
+        end = updated_event["end"].get("dateTime", updated_event["end"].get("date"))
+        email_subject = f"Meeting Updated: {title}"
         body = (
             f"Hello,\n\n"
-            f"The meeting '{updated_details['Title']}' has been updated.\n\n"
+            f"The meeting '{title}' has been updated.\n\n"
             f"Updated details:\n"
-            f"Title: {updated_details['Title']}\n"
-            f"Start: {updated_details['Start']}\n"
-            f"End: {updated_details['End']}\n"
-            f"Link: {updated_details['Calendar Link']}\n\n"
+            f"Title: {title}\n"
+            f"Start: {start}\n"
+            f"End: {end}\n"
+            f"Link: {updated_event.get('htmlLink')}\n\n"
             f"Regards,\nMeeting Bot"
         )
-        try:
-            res = send_email(to_email, email_subject, body)
-        except Exception as e:
-            res = {"status": "Failed", "message": str(e)}
-        email_results.append({"email": to_email, "result": res})
-
+        recipients = [a.get("email") for a in event_attendees(updated_event) if a.get("email")]
+        queued = await queue_emails_async([(to_email, email_subject, body) for to_email in recipients])
+        email_results = [{"email": to_email, "result": res} for to_email, res in zip(recipients, queued)]
+
+        items.append({
+            "selection_number": number,
+            "status": "Updated",
+            "details": {
+                "Title": title,
+                "Participants": [a["email"] for a in updated_event.get("attendees", [])],
+                "Start": start,
+                "End": end,
+                "Calendar Link": updated_event.get("htmlLink"),
+            },
+            "email_results": email_results,
+        })
+
+    updated = sum(1 for i in items if i["status"] == "Updated")
     return {
-        "status": "Updated",
-        "message": "✅ Meeting has been updated successfully.",
-        "details": updated_details,
-        "email_results": email_results,
+        "status": "Updated" if updated == len(items) and not invalid else "Partial",
+        "message": f"✅ Updated {updated} of {len(selection_numbers)} meetings.",
+        "results": items,
+        "invalid_selections": invalid,
     }
 
 
@@ -124,7 +211,9 @@ def meeting_update_agent(model):
         - Only update fields the user provides.
         - Preserve start/end times unless the user wants to change them.
         - Return full updated meeting details including organizer, participants, start/end times, and calendar link.
+        - To apply the same change to several meetings, call update_meetings(selection_numbers, ...)
+          once instead of calling update_meeting repeatedly.
         """,
-        tools=[update_meeting],
+        tools=[update_meeting, update_meetings],
         model=model
     )
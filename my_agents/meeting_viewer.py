@@ -1,13 +1,60 @@
-from agents import Agent, function_tool
+import datetime
+from agents import Agent, RunContextWrapper, function_tool
+from instrumentation import instrumented
 from meeting_selector import show_meeting_selection
+from meeting_context import MeetingContext, conversation_id_of
+from calendar_async import run_blocking, busy_intervals_async
+from calendar_setup import PKT
+from free_slots import find_free_slots, slot_request_error
 
 @function_tool
-def view_upcoming_meetings():
+@instrumented("tool")
+async def view_upcoming_meetings(ctx: RunContextWrapper[MeetingContext], page: int = 1):
     """
     Returns upcoming meetings in a readable format for viewing only.
     DO NOT ask the user to select a meeting number.
+    page: which page of meetings to show (1 = the next ones; ask for 2, 3... only if the user wants more).
     """
-    return show_meeting_selection()
+    return await run_blocking(show_meeting_selection, conversation_id_of(ctx), page)
+
+
+@function_tool
+@instrumented("tool")
+async def suggest_free_slots(duration_minutes: int = 60,
+                             days: int = 5,
+                             top_k: int = 5,
+                             start_date: str | None = None):
+    """
+    Finds free time slots of the requested duration within working hours (09:00-18:00 PKT).
+    start_date: YYYY-MM-DD to start searching from (default: now).
+    days: how many days to search (1-60). top_k: how many slots to return (at least 1).
+    """
+    error = slot_request_error(duration_minutes, days, top_k)
+    if error:
+        return {"status": "Failed", "message": error}
+    if start_date:
+        try:
+            start = datetime.datetime.strptime(start_date.strip(), "%Y-%m-%d").replace(tzinfo=PKT)
+        except ValueError:
+            return {"status": "Failed", "message": "Invalid date format. Please use YYYY-MM-DD format."}
+        start = max(start, datetime.datetime.now(PKT))
+    else:
+        start = datetime.datetime.now(PKT)
+
+    window_end = start + datetime.timedelta(days=days + 1)
+    busy = [(s, e) for s, e, _ in await busy_intervals_async(start, window_end)]
+    slots = find_free_slots(busy, duration_minutes=duration_minutes, days=days,
+                            top_k=top_k, start=start)
+    if not slots:
+        return {"status": "Failed", "message": "No free slots found in the requested window."}
+
+    display = [f"{i}) {s.strftime('%a %b %d, %H:%M')} - {e.strftime('%H:%M')} PKT"
+               for i, (s, e) in enumerate(slots, start=1)]
+    return {
+        "status": "Success",
+        "slots": [{"start": s.isoformat(), "end": e.isoformat()} for s, e in slots],
+        "display": "\n".join(display),
+    }
 
 
 def meeting_viewer_agent(model):
@@ -20,7 +67,10 @@ def meeting_viewer_agent(model):
         - Use show_meeting_selection() to get and display meetings.
         - Format the output nicely with numbers for each meeting.
         - Inform the user if there are no upcoming meetings.
+        - If the user asks to see more meetings, call view_upcoming_meetings with the next page.
+        - When the user asks when they are free or for feasible/available time slots,
+          use suggest_free_slots() (pass the meeting length and start date if given) and list the slots.
         """,
-        tools=[view_upcoming_meetings],
+        tools=[view_upcoming_meetings, suggest_free_slots],
         model=model
     )
\ No newline at end of file
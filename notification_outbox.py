@@ -0,0 +1,213 @@
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from email_utils import send_bulk
+
+
+class NotificationOutbox:
+    """
+    Durable SQLite outbox for attendee notifications.
+    Tools enqueue messages and return immediately; a background dispatcher
+    drains the outbox with retries and jittered exponential backoff.
+    """
+
+    def __init__(self, db_path, sender=send_bulk, max_attempts=5, base_delay=2.0,
+                 max_delay=300.0, poll_interval=5.0, batch_size=50, claim_timeout=600.0):
+        self.db_path = db_path
+        self.sender = sender  # callable(list of (to, subject, body)) -> list of result dicts
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS outbox (
+                    id TEXT PRIMARY KEY,
+                    to_email TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    body TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    next_attempt_at REAL NOT NULL,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    sent_at REAL
+                )""")
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at)")
+
+    @contextmanager
+    def _connect(self):
+        # Autocommit connection; closing it rolls back anything left uncommitted
+        db = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    # ---------- Producer side ----------
+
+    def enqueue(self, messages):
+        """
+        Stores messages (list of (to_email, subject, body)) and returns their IDs.
+        """
+        now = time.time()
+        rows = [(uuid.uuid4().hex, to_email, subject, body, now, now)
+                for to_email, subject, body in messages]
+        if not rows:
+            return []
+        with self._connect() as db:
+            db.executemany(
+                "INSERT INTO outbox (id, to_email, subject, body, status, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, 'Queued', ?, ?)", rows)
+        self.start()
+        self._wakeup.set()
+        return [row[0] for row in rows]
+
+    def status(self, message_ids):
+        """
+        Returns {id: {"status", "attempts", "last_error"}} for the given message IDs.
+        """
+        if not message_ids:
+            return {}
+        placeholders = ",".join("?" * len(message_ids))
+        with self._connect() as db:
+            rows = db.execute(
+                f"SELECT id, status, attempts, last_error FROM outbox WHERE id IN ({placeholders})",
+                list(message_ids)).fetchall()
+        return {r[0]: {"status": r[1], "attempts": r[2], "last_error": r[3]} for r in rows}
+
+    def pending_count(self):
+        with self._connect() as db:
+            return db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE status IN ('Queued', 'Sending')").fetchone()[0]
+
+    # ---------- Dispatcher ----------
+
+    def _claim_due(self):
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            # Messages claimed by a dispatcher that died mid-send become due again
+            db.execute(
+                "UPDATE outbox SET status = 'Queued' WHERE status = 'Sending' AND next_attempt_at < ?",
+                (now - self.claim_timeout,))
+            rows = db.execute(
+                "SELECT id, to_email, subject, body, attempts FROM outbox "
+                "WHERE status = 'Queued' AND next_attempt_at <= ? "
+                "ORDER BY next_attempt_at LIMIT ?", (now, self.batch_size)).fetchall()
+            db.executemany(
+                "UPDATE outbox SET status = 'Sending', next_attempt_at = ? WHERE id = ?",
+                [(now, r[0]) for r in rows])
+            db.execute("COMMIT")
+        return rows
+
+    def _backoff(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.5)
+
+    def dispatch_once(self):
+        """
+        Sends every message that is due. Returns the number of messages attempted.
+        """
+        rows = self._claim_due()
+        if not rows:
+            return 0
+        try:
+            results = self.sender([(r[1], r[2], r[3]) for r in rows])
+        except Exception as e:
+            results = [{"status": "Failed", "message": str(e)} for _ in rows]
+
+        now = time.time()
+        updates = []
+        for (message_id, _, _, _, attempts), result in zip(rows, results):
+            attempts += 1
+            if result.get("status") == "Sent":
+                updates.append(("Sent", attempts, now, None, now, message_id))
+            elif attempts >= self.max_attempts:
+                updates.append(("Failed", attempts, now, result.get("message"), None, message_id))
+            else:
+                updates.append(("Queued", attempts, now + self._backoff(attempts),
+                                result.get("message"), None, message_id))
+        with self._connect() as db:
+            db.executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, "
+                "sent_at = ? WHERE id = ?", updates)
+        return len(rows)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            # Clear before draining: a message queued while we dispatch sets the event
+            # again and the wait below returns at once instead of sleeping past it
+            self._wakeup.clear()
+            try:
+                sent = self.dispatch_once()
+            except Exception as e:
+                print("Outbox dispatcher error:", e)
+                sent = 0
+            if sent < self.batch_size:
+                self._wakeup.wait(self.poll_interval)
+
+    def start(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="notification-outbox", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """
+    Returns the process-wide outbox (OUTBOX_DB, default outbox.db); its dispatcher starts on first use.
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = NotificationOutbox(
+                os.getenv("OUTBOX_DB", "outbox.db"),
+                max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5")),
+            )
+            _outbox.start()
+        return _outbox
+
+
+def queue_emails(messages):
+    """
+    Queues emails for background delivery.
+    messages: list of (to_email, subject, body). Returns one result dict per message, in order.
+    """
+    try:
+        message_ids = get_outbox().enqueue(messages)
+    except Exception as e:
+        return [{"status": "Failed", "message": str(e)} for _ in messages]
+    return [{"status": "Queued", "message_id": message_id} for message_id in message_ids]
+
+
+async def queue_emails_async(messages):
+    if not messages:
+        return []
+    return await asyncio.to_thread(queue_emails, messages)
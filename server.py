@@ -0,0 +1,319 @@
+"""
+Headless API server for the meeting assistant.
+
+Serves many conversations concurrently on one event loop, with the same agent
+graph (agent_graph.py), conversation logic and SQLiteSession persistence
+(conversation.py) as the Streamlit frontend. Plain ASGI, so any ASGI server works:
+
+    uvicorn server:app --host 0.0.0.0 --port 8000
+
+HTTP:
+    Requests act for the user in the X-User-Id header (401 if absent); their
+    Calendar calls use that user's stored Google token. The token is checked
+    before a turn runs, so a user without one gets 401 (WebSocket close 4401)
+    instead of an interactive login or a model reply about the failure.
+
+    POST /conversations                      {"conversation_id"?} -> {"conversation_id"}
+                                             (409 if the requested id is taken)
+    POST /conversations/{id}/messages        {"message"} -> {"conversation_id", "reply", "agent"}
+    GET  /conversations/{id}/messages        -> {"conversation_id", "messages"}
+    Unknown conversations are 404, other users' conversations 403.
+    GET  /healthz, GET /metrics (Prometheus text)
+WebSocket:
+    /conversations/{id}/stream               send {"message"}; receive the describe_event()
+                                             updates, then {"type": "done", "reply", "agent"}
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import OrderedDict
+from dotenv import load_dotenv
+from agents import set_tracing_disabled
+from agent_graph import get_agent_graph
+from calendar_async import run_blocking
+from conversation import Conversation, ConversationDirectory, describe_event
+from instrumentation import get_recorder
+from credential_store import CredentialsMissing, get_credential_store
+
+load_dotenv()
+set_tracing_disabled(disabled=False)
+# Never start a browser login inside a server worker; accounts are connected with calendar_setup.py
+get_credential_store().interactive = False
+
+# Conversations kept in memory; older ones are evicted and rebuilt when they come back
+MAX_CONVERSATIONS = int(os.getenv("MAX_CONVERSATIONS", "1000"))
+MAX_BODY_BYTES = 64 * 1024
+
+
+class ConversationNotFound(LookupError):
+    """
+    No conversation with this id exists.
+    """
+
+
+class ConversationExists(Exception):
+    """
+    A client asked to create a conversation under an id that is already taken.
+    """
+
+
+class ConversationRegistry:
+    """
+    LRU of live conversations. Turns within one conversation run one at a time;
+    different conversations run concurrently. Owners are recorded in the
+    ConversationDirectory, so they are checked again when a conversation is rebuilt.
+    """
+
+    def __init__(self, graph, max_conversations=MAX_CONVERSATIONS, directory=None):
+        self.graph = graph
+        self.max_conversations = max_conversations
+        self.directory = directory or ConversationDirectory()
+        self._conversations = OrderedDict()  # conversation_id -> (Conversation, asyncio.Lock)
+
+    def create(self, user_id, conversation_id=None):
+        """
+        Starts a new conversation owned by user_id and returns (conversation, lock).
+        Raises ConversationExists if a client-chosen id is already taken.
+        """
+        if conversation_id is not None and not isinstance(conversation_id, str):
+            raise ValueError("conversation_id must be a string")
+        conversation_id = conversation_id or str(uuid.uuid4())
+        if conversation_id in self._conversations or not self.directory.claim(conversation_id, user_id):
+            raise ConversationExists(f"Conversation {conversation_id!r} already exists")
+        return self._add(Conversation(self.graph, conversation_id, user_id=user_id, directory=self.directory))
+
+    async def get(self, conversation_id, user_id):
+        """
+        Returns (conversation, lock), rebuilding the conversation (history, context
+        window, summary memory, waiting sub-agent) from conversations.db if it is not live.
+        Raises ConversationNotFound for unknown ids and PermissionError if the
+        conversation belongs to another user.
+        """
+        entry = self._conversations.get(conversation_id)
+        owner = entry[0].user_id if entry else self.directory.owner(conversation_id)
+        if owner is None:
+            raise ConversationNotFound(f"No conversation {conversation_id!r}")
+        if owner != user_id:
+            raise PermissionError("Conversation belongs to another user")
+        if entry is None:
+            conversation = Conversation(self.graph, conversation_id, user_id=user_id, directory=self.directory)
+            await conversation.restore()
+            # Another request may have rebuilt it while this one was reading the history
+            entry = self._conversations.get(conversation_id) or self._add(conversation)
+        self._conversations.move_to_end(conversation_id)
+        return entry
+
+    def _add(self, conversation):
+        entry = (conversation, asyncio.Lock())
+        self._conversations[conversation.conversation_id] = entry
+        self._evict()
+        return entry
+
+    def _evict(self):
+        # Never drop a conversation that is mid-turn
+        for conversation_id in list(self._conversations):
+            if len(self._conversations) <= self.max_conversations:
+                return
+            if not self._conversations[conversation_id][1].locked():
+                del self._conversations[conversation_id]
+
+    def __len__(self):
+        return len(self._conversations)
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = ConversationRegistry(get_agent_graph())
+    return _registry
+
+
+# ---------- HTTP helpers ----------
+
+async def _read_body(receive):
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError("Request body too large")
+        if not message.get("more_body"):
+            return body
+
+
+async def _respond(send, status, payload, content_type="application/json"):
+    body = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+    await send({"type": "http.response.start", "status": status,
+                "headers": [(b"content-type", content_type.encode()),
+                            (b"content-length", str(len(body)).encode())]})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _json_object(body):
+    """
+    Parses a request body that must be a JSON object (an empty body counts as {}).
+    """
+    data = json.loads(body) if body and body.strip() else {}
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    return data
+
+
+def _message_from(body):
+    message = _json_object(body).get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise ValueError('Expected JSON body {"message": "..."}')
+    return message.strip()
+
+
+class Unauthenticated(Exception):
+    """
+    The request carries no X-User-Id.
+    """
+
+
+def _user_of(scope):
+    """
+    The calling user, from the X-User-Id header (set by the authenticating proxy in front of this server).
+    Requests without one are refused rather than acting as the deployer's default account.
+    """
+    for name, value in scope.get("headers", []):
+        if name == b"x-user-id" and value.strip():
+            return value.decode().strip()
+    raise Unauthenticated("Missing X-User-Id header")
+
+
+def _route(path):
+    """
+    Splits /conversations/{id}/{action} into (id, action); other paths return (None, None).
+    """
+    parts = [p for p in path.split("/") if p]
+    if parts[:1] != ["conversations"]:
+        return None, None
+    if len(parts) == 1:
+        return "", ""
+    if len(parts) == 3:
+        return parts[1], parts[2]
+    return None, None
+
+
+async def _require_credentials(user_id):
+    # Calendar tools run inside the agent run, where the SDK turns a CredentialsMissing
+    # into a tool error for the model; check up front so the client gets a 401 instead
+    await run_blocking(get_credential_store().get_credentials, user_id)
+
+
+async def handle_http(scope, receive, send):
+    method, path = scope["method"], scope["path"]
+    if path == "/healthz":
+        return await _respond(send, 200, {"status": "ok", "conversations": len(get_registry())})
+    if path == "/metrics":
+        return await _respond(send, 200, get_recorder().render_prometheus(),
+                              "text/plain; version=0.0.4")
+
+    conversation_id, action = _route(path)
+    try:
+        user_id = _user_of(scope)
+        if conversation_id == "" and method == "POST":
+            body = await _read_body(receive)
+            requested = _json_object(body).get("conversation_id")
+            conversation, _ = get_registry().create(user_id, requested)
+            return await _respond(send, 201, {"conversation_id": conversation.conversation_id})
+
+        if conversation_id and action == "messages" and method == "GET":
+            conversation, _ = await get_registry().get(conversation_id, user_id)
+            messages = conversation.history or await conversation.db_session.get_items()
+            return await _respond(send, 200, {"conversation_id": conversation_id, "messages": messages})
+
+        if conversation_id and action == "messages" and method == "POST":
+            user_msg = _message_from(await _read_body(receive))
+            conversation, lock = await get_registry().get(conversation_id, user_id)
+            await _require_credentials(user_id)
+            async with lock:
+                result = await conversation.send(user_msg)
+            return await _respond(send, 200, {
+                "conversation_id": conversation_id,
+                "reply": result.final_output,
+                "agent": result.last_agent.name,
+            })
+    except ValueError as e:
+        return await _respond(send, 400, {"status": "Failed", "message": str(e)})
+    except PermissionError as e:
+        return await _respond(send, 403, {"status": "Failed", "message": str(e)})
+    except ConversationNotFound as e:
+        return await _respond(send, 404, {"status": "Failed", "message": str(e)})
+    except ConversationExists as e:
+        return await _respond(send, 409, {"status": "Failed", "message": str(e)})
+    except (Unauthenticated, CredentialsMissing) as e:
+        return await _respond(send, 401, {"status": "Failed", "message": str(e)})
+    except Exception as e:
+        return await _respond(send, 500, {"status": "Failed", "message": str(e)})
+
+    return await _respond(send, 404, {"status": "Failed", "message": f"No route for {method} {path}"})
+
+
+async def handle_websocket(scope, receive, send):
+    conversation_id, action = _route(scope["path"])
+    if not conversation_id or action != "stream":
+        return await send({"type": "websocket.close", "code": 4404})
+
+    try:
+        user_id = _user_of(scope)
+        conversation, lock = await get_registry().get(conversation_id, user_id)
+        await _require_credentials(user_id)
+    except (Unauthenticated, CredentialsMissing):
+        return await send({"type": "websocket.close", "code": 4401})
+    except PermissionError:
+        return await send({"type": "websocket.close", "code": 4403})
+    except ConversationNotFound:
+        return await send({"type": "websocket.close", "code": 4404})
+    await send({"type": "websocket.accept"})
+
+    async def send_json(payload):
+        await send({"type": "websocket.send", "text": json.dumps(payload)})
+
+    while True:
+        message = await receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        if message["type"] != "websocket.receive":
+            continue
+        try:
+            user_msg = _message_from(message.get("text") or message.get("bytes"))
+        except ValueError as e:
+            await send_json({"type": "error", "message": str(e)})
+            continue
+        try:
+            async with lock:
+                async for event in conversation.stream(user_msg):
+                    update = describe_event(event)
+                    if update is not None:
+                        await send_json(update)
+                result = conversation.last_result
+            await send_json({"type": "done", "reply": result.final_output, "agent": result.last_agent.name})
+        except Exception as e:
+            await send_json({"type": "error", "message": str(e)})
+
+
+async def handle_lifespan(scope, receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            get_registry()  # build the agent graph before the first request
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http":
+        await handle_http(scope, receive, send)
+    elif scope["type"] == "websocket":
+        await handle_websocket(scope, receive, send)
+    elif scope["type"] == "lifespan":
+        await handle_lifespan(scope, receive, send)
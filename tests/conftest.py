@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app modules are flat top-level files; the local stand-in servers live in benchmarks/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
@@ -0,0 +1,55 @@
+"""
+Regenerates the WAV fixtures used by tests/test_voice_input.py.
+
+The clips are synthetic and deterministic: a voiced burst (a 140 Hz harmonic
+series with a syllable-rate envelope) between stretches of low background noise.
+
+Usage:
+    python tests/fixtures/make_fixtures.py
+"""
+import os
+import wave
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def noise(seconds, fs, rng, level=60):
+    return rng.normal(0, level, int(seconds * fs))
+
+
+def voiced(seconds, fs, f0=140.0):
+    t = np.arange(int(seconds * fs)) / fs
+    tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 8))
+    envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)  # ~4 syllables per second
+    return 6000 * envelope * tone / 2.6
+
+
+def write(name, samples, fs=16000, channels=1):
+    samples = np.clip(np.round(samples), -32768, 32767).astype("<i2")
+    with wave.open(os.path.join(HERE, name), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(fs)
+        f.writeframes(samples.tobytes())
+
+
+def main():
+    rng = np.random.default_rng(15)
+    fs = 16000
+    # 0.6 s noise, 0.9 s speech, 1.5 s noise
+    write("speech_pause.wav", np.concatenate(
+        [noise(0.6, fs, rng), voiced(0.9, fs) + noise(0.9, fs, rng), noise(1.5, fs, rng)]))
+    write("silence.wav", noise(2.0, fs, rng))
+    # Shorter than one 30 ms frame
+    write("short.wav", voiced(0.01, fs))
+    write("empty.wav", np.zeros(0))
+    # Stereo at 44.1 kHz: 0.5 s noise, 0.5 s speech on both channels, 0.5 s noise
+    fs = 44100
+    mono = np.concatenate(
+        [noise(0.5, fs, rng), voiced(0.5, fs) + noise(0.5, fs, rng), noise(0.5, fs, rng)])
+    write("stereo_44k.wav", np.stack([mono, mono], axis=1).ravel(), fs=fs, channels=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import datetime
+import pytest
+from busy_index import BusyIndex
+from event_store import EventStore
+
+PKT = datetime.timezone(datetime.timedelta(hours=5))
+
+
+def at(hour, minute=0, day=5):
+    return datetime.datetime(2026, 1, day, hour, minute, tzinfo=PKT)
+
+
+def event(event_id, start, end):
+    return {"id": event_id, "start": {"dateTime": start.isoformat()}, "end": {"dateTime": end.isoformat()}}
+
+
+def all_day(event_id, day, days=1):
+    return {"id": event_id, "start": {"date": f"2026-01-{day:02d}"},
+            "end": {"date": f"2026-01-{day + days:02d}"}}
+
+
+def test_an_empty_index_is_free_everywhere():
+    index = BusyIndex([])
+
+    assert len(index) == 0
+    assert index.is_free(at(9), at(10))
+    assert index.overlapping(at(0), at(23)) == []
+    assert index.intervals() == []
+
+
+@pytest.mark.parametrize("start, end, free", [
+    (at(8), at(9), True),  # ends as the meeting starts
+    (at(10), at(11), True),  # starts as the meeting ends
+    (at(8), at(9, 1), False),
+    (at(9, 59), at(11), False),
+    (at(9, 15), at(9, 45), False),  # inside
+    (at(8), at(11), False),  # around
+])
+def test_touching_intervals_do_not_clash(start, end, free):
+    index = BusyIndex([event("standup", at(9), at(10))])
+
+    assert index.is_free(start, end) is free
+    assert (index.overlapping(start, end) == []) is free
+
+
+def test_a_long_earlier_meeting_still_clashes():
+    # The latest end among earlier starts is what matters, not the nearest start
+    index = BusyIndex([event("offsite", at(8), at(17)), event("lunch", at(12), at(13))])
+
+    assert not index.is_free(at(15), at(16))
+    assert [iv[2] for iv in index.overlapping(at(15), at(16))] == ["offsite"]
+
+
+def test_excluding_the_meeting_being_moved():
+    index = BusyIndex([event("review", at(9), at(12)), event("sync", at(10), at(11))])
+
+    assert index.is_free(at(11), at(12), exclude_event_id="review")
+    assert not index.is_free(at(10, 30), at(11, 30), exclude_event_id="review")
+    assert index.is_free(at(9), at(10), exclude_event_id="review")
+    assert [iv[2] for iv in index.overlapping(at(9), at(12), exclude_event_id="sync")] == ["review"]
+
+
+def test_all_day_events_block_the_whole_day_in_local_time():
+    index = BusyIndex([all_day("holiday", 6)])
+
+    assert not index.is_free(at(0, day=6), at(1, day=6))
+    assert not index.is_free(at(23, day=6), at(23, 30, day=6))
+    assert index.is_free(at(23, day=5), at(0, day=6))
+    assert index.is_free(at(0, day=7), at(9, day=7))
+
+
+def test_a_multi_day_event_covers_every_day():
+    index = BusyIndex([all_day("conference", 6, days=3)])
+
+    assert [d for d in (5, 6, 7, 8, 9) if not index.is_free(at(12, day=d), at(13, day=d))] == [6, 7, 8]
+
+
+def test_intervals_in_a_window():
+    index = BusyIndex([event("a", at(9), at(10)), event("b", at(11), at(12)),
+                       event("c", at(9, day=6), at(10, day=6))])
+
+    assert [iv[2] for iv in index.intervals()] == ["a", "b", "c"]
+    assert [iv[2] for iv in index.intervals(at(9, 30), at(11, 30))] == ["a", "b"]
+
+
+def test_rebuilding_from_the_mirror_follows_add_update_and_remove():
+    store = EventStore(lambda: None)
+
+    def index():
+        return BusyIndex(store.snapshot()[1])
+
+    store.upsert(event("sync", at(9), at(10)))
+    assert not index().is_free(at(9), at(10))
+
+    store.upsert(event("sync", at(14), at(15)))  # rescheduled
+    assert index().is_free(at(9), at(10))
+    assert not index().is_free(at(14, 30), at(15, 30))
+    assert len(index()) == 1
+
+    store.remove("sync")
+    assert len(index()) == 0
+    assert index().is_free(at(14), at(15))
@@ -0,0 +1,261 @@
+import datetime
+import email.utils
+import json
+import pytest
+
+pytest.importorskip("googleapiclient")
+import httplib2
+from googleapiclient.errors import HttpError
+import calendar_executor
+from calendar_executor import CalendarExecutor
+from instrumentation import get_recorder
+
+NOW = 1_800_000_000.0
+
+
+def http_error(status, retry_after=None, reason="backendError"):
+    headers = {"status": str(status)}
+    if retry_after is not None:
+        headers["retry-after"] = retry_after
+    content = json.dumps({"error": {"code": status, "errors": [{"reason": reason}]}}).encode()
+    return HttpError(httplib2.Response(headers), content)
+
+
+class FlakyCall:
+    """
+    Raises the given errors on the first calls, then returns "ok".
+    """
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+class Clock:
+    """
+    A monotonic clock that only moves when the executor sleeps.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(calendar_executor.time, "monotonic", clock.monotonic)
+    return clock
+
+
+@pytest.fixture
+def sleeps(clock):
+    return clock.sleeps
+
+
+@pytest.fixture
+def executor(clock, monkeypatch):
+    # Jitter always picks the upper bound, so the waits are exact
+    monkeypatch.setattr(calendar_executor.random, "uniform", lambda low, high: high)
+    # Bursts large enough that throttling never sleeps
+    return CalendarExecutor(user_burst=1000, project_burst=1000, max_retries=3,
+                            base_delay=0.5, max_delay=32.0, sleep=clock.sleep)
+
+
+def counter(name, status):
+    return sum(count for (counter, labels), count in get_recorder().counters().items()
+               if counter == name and ("status", status) in labels)
+
+
+def test_429_with_retry_after_waits_that_long_and_pauses_the_user(executor, sleeps):
+    call = FlakyCall(http_error(429, retry_after="3", reason="rateLimitExceeded"))
+    retries = counter("calendar_retries", "429")
+
+    assert executor.execute(call, "ann") == "ok"
+
+    assert call.calls == 2
+    assert sleeps == [3.0]
+    assert executor.bucket("ann")._paused_until == 3.0
+    assert executor.bucket("bob")._paused_until == 0.0
+    assert counter("calendar_retries", "429") == retries + 1
+
+
+def test_429_with_an_http_date_retry_after_uses_the_clock(executor, sleeps, monkeypatch):
+    monkeypatch.setattr(calendar_executor.time, "time", lambda: NOW)
+    call = FlakyCall(http_error(429, retry_after=email.utils.formatdate(NOW + 5, usegmt=True)))
+
+    assert executor.execute(call, "ann") == "ok"
+
+    assert sleeps == [5.0]
+
+
+def test_429_without_retry_after_backs_off_exponentially(executor, sleeps):
+    call = FlakyCall(http_error(429), http_error(429), http_error(429))
+
+    assert executor.execute(call, "ann") == "ok"
+
+    assert call.calls == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_retry_after_beyond_max_delay_is_not_waited_for(executor, sleeps):
+    call = FlakyCall(http_error(429, retry_after="120"))
+
+    with pytest.raises(HttpError):
+        executor.execute(call, "ann")
+
+    assert call.calls == 1
+    assert sleeps == []
+
+
+def test_503_gives_up_after_max_retries(executor, sleeps):
+    call = FlakyCall(*[http_error(503) for _ in range(10)])
+    exhausted = counter("calendar_retries_exhausted", "503")
+
+    with pytest.raises(HttpError) as raised:
+        executor.execute(call, "ann")
+
+    assert raised.value.resp.status == 503
+    assert call.calls == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert counter("calendar_retries_exhausted", "503") == exhausted + 1
+
+
+@pytest.mark.parametrize("status, reason", [(400, "badRequest"), (403, "forbidden"), (404, "notFound")])
+def test_client_errors_are_not_retried(executor, sleeps, status, reason):
+    call = FlakyCall(http_error(status, reason=reason))
+
+    with pytest.raises(HttpError):
+        executor.execute(call, "ann")
+
+    assert call.calls == 1
+    assert sleeps == []
+
+
+def test_403_rate_limit_is_retried(executor, sleeps):
+    call = FlakyCall(http_error(403, reason="userRateLimitExceeded"))
+
+    assert executor.execute(call, "ann") == "ok"
+
+    assert sleeps == [0.5]
+
+
+class FakeCalendar:
+    """
+    Just enough of service.events() for create_event/delete_event. Every request runs
+    through the executor; `lost` is the number of calls that Google commits but whose
+    response is lost (answered 503).
+    """
+
+    def __init__(self, executor, lost=1, gone_status=404):
+        self.executor = executor
+        self.lost = lost
+        self.gone_status = gone_status
+        self.events_by_id = {}
+        self.inserts = 0
+
+    def events(self):
+        return self
+
+    def _request(self, call):
+        def execute():
+            return self.executor.execute(call, "ann")
+        return type("Request", (), {"execute": staticmethod(execute)})()
+
+    def _committed(self, result):
+        if self.lost:
+            self.lost -= 1
+            raise http_error(503)
+        return result
+
+    def insert(self, calendarId, body, fields=None):
+        def call():
+            self.inserts += 1
+            if body["id"] in self.events_by_id:
+                raise http_error(409, reason="duplicate")
+            self.events_by_id[body["id"]] = dict(body, htmlLink=f"https://calendar/{body['id']}")
+            return self._committed(self.events_by_id[body["id"]])
+        return self._request(call)
+
+    def get(self, calendarId, eventId, fields=None):
+        return self._request(lambda: self.events_by_id[eventId])
+
+    def delete(self, calendarId, eventId):
+        def call():
+            if eventId not in self.events_by_id:
+                raise http_error(self.gone_status, reason="deleted")
+            del self.events_by_id[eventId]
+            return self._committed("")
+        return self._request(call)
+
+
+class FakeStore:
+    def __init__(self):
+        self.upserted = []
+        self.removed = []
+
+    def upsert(self, event):
+        self.upserted.append(event)
+
+    def remove(self, event_id):
+        self.removed.append(event_id)
+
+
+@pytest.fixture
+def calendar(executor, monkeypatch):
+    import calendar_setup
+    fake, store = FakeCalendar(executor), FakeStore()
+    monkeypatch.setattr(calendar_setup, "get_service", lambda user_id=None: fake)
+    monkeypatch.setattr(calendar_setup, "get_event_store", lambda user_id=None: store)
+    fake.store = store
+    return fake
+
+
+def test_a_repeated_insert_answers_409_and_returns_the_first_event(calendar, sleeps):
+    from calendar_setup import create_event
+
+    start = datetime.datetime(2031, 3, 3, 9, 0)
+    result = create_event("Sync", "", start, start + datetime.timedelta(hours=1))
+
+    assert result["status"] == "Created"
+    assert list(calendar.events_by_id) == [result["event_id"]]
+    assert calendar.inserts == 2
+    assert sleeps == [0.5]
+    assert [e["id"] for e in calendar.store.upserted] == [result["event_id"]]
+
+
+@pytest.mark.parametrize("gone_status", [404, 410])
+def test_a_repeated_delete_of_a_gone_event_counts_as_cancelled(calendar, sleeps, gone_status):
+    from calendar_setup import delete_event
+
+    calendar.gone_status = gone_status
+    calendar.events_by_id["abc"] = {"id": "abc"}
+
+    result = delete_event("abc")
+
+    assert result == {"status": "Cancelled", "event_id": "abc"}
+    assert calendar.events_by_id == {}
+    assert sleeps == [0.5]
+    assert calendar.store.removed == ["abc"]
+
+
+def test_deleting_an_event_that_never_existed_is_not_retried(calendar, sleeps):
+    from calendar_setup import delete_event
+
+    calendar.lost = 0
+
+    assert delete_event("missing") == {"status": "Cancelled", "event_id": "missing"}
+    assert sleeps == []
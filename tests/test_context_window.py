@@ -0,0 +1,65 @@
+import sys
+import context_window
+from context_window import get_token_counter, trim_history
+
+
+class FakeEncoding:
+    def encode(self, text, disallowed_special=()):
+        return text.split()
+
+
+class FakeTiktoken:
+    loads = 0
+
+    @classmethod
+    def encoding_for_model(cls, model):
+        cls.loads += 1
+        if model != "gpt-4o-mini":
+            raise KeyError(model)
+        return FakeEncoding()
+
+    @classmethod
+    def get_encoding(cls, name):
+        cls.loads += 1
+        return FakeEncoding()
+
+
+def test_counter_uses_tiktoken_by_default_and_loads_it_lazily(monkeypatch):
+    monkeypatch.setitem(sys.modules, "tiktoken", FakeTiktoken)
+    FakeTiktoken.loads = 0
+
+    count = get_token_counter("openai/gpt-4o-mini")
+    assert FakeTiktoken.loads == 0
+    assert count("one two three") == 3
+    assert count("four five") == 2
+    assert FakeTiktoken.loads == 1
+    assert get_token_counter("some/unknown-model")("a b") == 2
+
+
+def test_counter_falls_back_to_the_estimate_and_says_so_once(monkeypatch, capsys):
+    monkeypatch.setitem(sys.modules, "tiktoken", None)  # import fails
+    monkeypatch.setattr(context_window, "_estimate_warned", False)
+
+    assert get_token_counter("openai/gpt-4o-mini")("x" * 40) == 11
+    assert get_token_counter("openai/gpt-4o")("x" * 8) == 3
+    assert capsys.readouterr().out.count("falls back") == 1
+
+
+def test_trim_history_keeps_the_newest_whole_turns():
+    def count(text):
+        return len(text.split())
+
+    history = [
+        {"role": "user", "content": "first question here"},
+        {"role": "assistant", "content": "first answer"},
+        {"role": "user", "content": "second question"},
+        {"type": "function_call", "name": "lookup", "arguments": "{}"},
+        {"role": "assistant", "content": "second answer"},
+    ]
+    # Each message costs its words plus 4 tokens of overhead
+    newest_turn = history[2:]
+    budget = sum(context_window.item_tokens(item, count) for item in newest_turn)
+
+    assert trim_history(history, budget, count) == newest_turn
+    assert trim_history(history, budget - 1, count) == []
+    assert trim_history(history, 10_000, count) == history
@@ -0,0 +1,75 @@
+import pytest
+import email_utils
+from email_utils import SMTPPool, send_bulk, send_email
+from instrumentation import get_recorder
+from smtp_sink import SMTPSink
+
+
+@pytest.fixture
+def sink():
+    sink = SMTPSink().start()
+    yield sink
+    sink.stop()
+
+
+def make_pool(sink, size=1):
+    return SMTPPool("127.0.0.1", sink.port, "bot", "secret", email_from="bot@example.com",
+                    use_tls=False, size=size, timeout=5)
+
+
+def test_reuses_one_session_for_sequential_messages(sink):
+    pool = make_pool(sink)
+    try:
+        results = [pool.send(f"user{i}@example.com", "Hi", "Body") for i in range(3)]
+    finally:
+        pool.close()
+
+    assert [r["status"] for r in results] == ["Sent"] * 3
+    assert len(sink.messages) == 3
+    assert sink.connections == 1
+
+
+def test_reconnects_after_server_drops_the_session(sink):
+    pool = make_pool(sink)
+    try:
+        assert pool.send("a@example.com", "First", "Body")["status"] == "Sent"
+        sink.drop_connections()
+        result = pool.send("b@example.com", "Second", "Body")
+    finally:
+        pool.close()
+
+    assert result["status"] == "Sent"
+    assert [m["to"] for m in sink.messages] == [["a@example.com"], ["b@example.com"]]
+    assert sink.connections == 2
+
+
+def test_send_bulk_delivers_every_message_in_order(sink):
+    pool = make_pool(sink, size=4)
+    messages = [(f"user{i}@example.com", f"Subject {i}", "Body") for i in range(20)]
+    try:
+        results = send_bulk(messages, pool=pool)
+    finally:
+        pool.close()
+
+    assert [r["message"] for r in results] == [f"Email sent to {to}" for to, _, _ in messages]
+    assert sorted(m["to"][0] for m in sink.messages) == sorted(to for to, _, _ in messages)
+    assert sink.connections <= 4
+
+
+def test_send_reports_failure_when_server_is_unreachable(sink):
+    pool = make_pool(sink)
+    sink.stop()
+    assert pool.send("a@example.com", "Hi", "Body")["status"] == "Failed"
+
+
+def test_send_email_records_one_smtp_span(sink, monkeypatch):
+    pool = make_pool(sink)
+    monkeypatch.setattr(email_utils, "_default_pool", pool)
+    spans = []
+    monkeypatch.setattr(get_recorder(), "record", spans.append)
+    try:
+        assert send_email("a@example.com", "Hi", "Body")["status"] == "Sent"
+    finally:
+        pool.close()
+
+    assert [(s.kind, s.name) for s in spans] == [("smtp", "send")]
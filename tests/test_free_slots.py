@@ -0,0 +1,43 @@
+import datetime
+import pytest
+from free_slots import MAX_SEARCH_DAYS, find_free_slots, slot_request_error
+
+PKT = datetime.timezone(datetime.timedelta(hours=5))
+MONDAY_8AM = datetime.datetime(2026, 1, 5, 8, 0, tzinfo=PKT)
+
+
+def at(hour, minute=0, day=0):
+    return MONDAY_8AM.replace(hour=hour, minute=minute) + datetime.timedelta(days=day)
+
+
+def test_earliest_slots_skip_busy_time_and_stay_in_working_hours():
+    busy = [(at(9), at(10, 30))]
+
+    slots = find_free_slots(busy, duration_minutes=60, days=1, top_k=3, start=MONDAY_8AM)
+
+    assert slots == [(at(10, 30), at(11, 30)), (at(11, 30), at(12, 30)), (at(12, 30), at(13, 30))]
+
+
+def test_full_day_moves_to_the_next_day():
+    busy = [(at(9), at(18))]
+
+    slots = find_free_slots(busy, duration_minutes=30, days=2, top_k=1, start=MONDAY_8AM)
+
+    assert slots == [(at(9, day=1), at(9, 30, day=1))]
+
+
+@pytest.mark.parametrize("args", [
+    {"days": 0}, {"days": -3}, {"days": MAX_SEARCH_DAYS + 1},
+    {"top_k": 0}, {"top_k": -1},
+    {"duration_minutes": 0}, {"duration_minutes": -30},
+])
+def test_invalid_requests_are_rejected(args):
+    request = {"duration_minutes": 60, "days": 5, "top_k": 5, **args}
+
+    assert slot_request_error(**request)
+    with pytest.raises(ValueError):
+        find_free_slots([], start=MONDAY_8AM, **request)
+
+
+def test_valid_request_has_no_error():
+    assert slot_request_error(duration_minutes=30, days=1, top_k=1) is None
@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+
+pytest.importorskip("agents")
+from instrumentation import get_recorder, span
+from instrumentation_hooks import InstrumentationHooks
+
+
+class Agent:
+    def __init__(self, name):
+        self.name = name
+
+
+class RunContext:
+    pass
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    spans = []
+    monkeypatch.setattr(get_recorder(), "record", spans.append)
+    return spans
+
+
+def test_agent_and_llm_spans_nest_under_the_turn(recorded):
+    hooks, context, agent = InstrumentationHooks(), RunContext(), Agent("Scheduler")
+
+    async def run():
+        with span("turn", "Scheduler"):
+            await hooks.on_agent_start(context, agent)
+            await hooks.on_llm_start(context, agent, "", [])
+            await hooks.on_llm_end(context, agent, None)
+            await hooks.on_agent_end(context, agent, "done")
+
+    asyncio.run(run())
+    llm, agent_span, turn = recorded
+    assert (llm.kind, agent_span.kind, turn.kind) == ("llm", "agent", "turn")
+    assert llm.parent_id == agent_span.span_id
+    assert agent_span.parent_id == turn.span_id
+    assert llm.trace_id == agent_span.trace_id == turn.trace_id
+
+
+def test_abort_closes_the_failed_runs_spans_only(recorded):
+    hooks, agent = InstrumentationHooks(), Agent("Canceller")
+    failed, other = RunContext(), RunContext()
+
+    async def run():
+        for context in (failed, other):
+            await hooks.on_agent_start(context, agent)
+            await hooks.on_llm_start(context, agent, "", [])
+        hooks.abort(failed, RuntimeError("model unavailable"))
+
+    asyncio.run(run())
+    assert [(s.kind, s.status) for s in recorded] == [("llm", "error"), ("agent", "error")]
+    assert recorded[0].error == "RuntimeError: model unavailable"
+    assert len(hooks._open) == 2
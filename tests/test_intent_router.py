@@ -0,0 +1,43 @@
+import pytest
+from intent_router import classify, route
+
+
+@pytest.mark.parametrize("message, intent", [
+    ("Schedule a meeting with Alice tomorrow at 3pm", "schedule"),
+    ("Book a call with Bob on Friday", "schedule"),
+    ("Cancel my meeting tomorrow", "cancel"),
+    ("Reschedule the project sync to Friday", "reschedule"),
+    ("Update the meeting title to Roadmap review", "update"),
+    ("Add participant john@example.com to the design meeting", "update"),
+    ("show my schedule", "view"),
+    ("What is on my schedule tomorrow?", "view"),
+    ("List my meetings", "view"),
+    ("Can you update me on my meetings today?", "view"),
+])
+def test_clear_requests_are_routed_locally(message, intent):
+    assert route(message) == intent
+
+
+@pytest.mark.parametrize("message", [
+    "Can you update me on things?",
+    "I need to book something",
+    "schedule",
+    "Cancel the standup and move the review to Friday",
+])
+def test_generic_or_mixed_requests_go_to_the_manager(message):
+    assert route(message) is None
+
+
+def test_lone_ambiguous_keyword_scores_below_the_threshold():
+    intent, confidence = classify("Can you update me?")
+    assert intent == "update"
+    assert confidence < 0.75
+
+
+def test_free_time_question_is_not_routed_to_the_scheduler():
+    assert route("Am I free to book a room?") != "schedule"
+
+
+def test_active_task_keeps_other_intents_with_the_manager():
+    assert route("Cancel my meeting tomorrow", active_intent="schedule") is None
+    assert route("Cancel my meeting tomorrow", active_intent="cancel") == "cancel"
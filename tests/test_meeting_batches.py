@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+
+pytest.importorskip("agents")
+pytest.importorskip("googleapiclient")
+import offline_bench
+
+
+@pytest.fixture(scope="module")
+def harness():
+    harness = offline_bench.Harness(4)
+    yield harness
+    harness.close()
+
+
+def run(tool, conversation_id, **arguments):
+    return asyncio.run(offline_bench.call_tool(tool, conversation_id, **arguments))
+
+
+def test_reschedule_meetings_collapses_repeated_changes(harness):
+    from my_agents.meeting_rescheduler import reschedule_meeting, reschedule_meetings
+
+    run(reschedule_meeting, "conv-batch-move")
+    change = {"selection_number": 1, "new_date": "2031-03-03", "new_time": "09:00"}
+    result = run(reschedule_meetings, "conv-batch-move", changes=[change, change])
+
+    assert result["status"] == "Rescheduled"
+    assert [r["selection_number"] for r in result["results"]] == [1]
+
+
+def test_reschedule_meetings_rejects_conflicting_changes(harness):
+    from my_agents.meeting_rescheduler import reschedule_meeting, reschedule_meetings
+
+    run(reschedule_meeting, "conv-batch-conflict")
+    result = run(reschedule_meetings, "conv-batch-conflict", changes=[
+        {"selection_number": 2, "new_date": "2031-03-04", "new_time": "09:00"},
+        {"selection_number": 2, "new_date": "2031-03-04", "new_time": "15:00"},
+        {"selection_number": 3, "new_date": "2031-03-05", "new_time": "09:00"},
+    ])
+
+    assert result["status"] == "Partial"
+    assert result["message"] == "✅ Rescheduled 1 of 2 meetings."
+    by_number = {r["selection_number"]: r for r in result["results"]}
+    assert by_number[2]["status"] == "Failed"
+    assert by_number[3]["status"] == "Rescheduled"
+
+
+def test_cancel_meetings_counts_a_repeated_number_once(harness):
+    from my_agents.meeting_canceller import cancel_meeting, cancel_meetings
+
+    run(cancel_meeting, "conv-batch-cancel")
+    result = run(cancel_meetings, "conv-batch-cancel", selection_numbers=[1, 1])
+
+    assert result["status"] == "Cancelled"
+    assert result["message"] == "✅ Cancelled 1 of 1 meetings."
+    assert len(result["results"]) == 1
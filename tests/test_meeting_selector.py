@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("agents")
+import meeting_selector
+from meeting_selector import PAGE_SIZE, get_selection_snapshot, load_selection_page
+
+
+@pytest.fixture
+def calendar(monkeypatch):
+    # Upcoming event ids in start order, served the way calendar_setup numbers them
+    event_ids = [f"event{i}" for i in range(1, 26)]
+
+    def list_meetings_for_selection(max_results=10, offset=0):
+        return [{"index": i, "label": event_id, "event_id": event_id}
+                for i, event_id in enumerate(event_ids[offset:offset + max_results], start=offset + 1)]
+
+    monkeypatch.setattr(meeting_selector, "list_meetings_for_selection", list_meetings_for_selection)
+    return event_ids
+
+
+def test_pages_continue_the_numbering_and_report_more(calendar):
+    first, has_more, changed = load_selection_page("conv-pages", 1)
+    second, _, _ = load_selection_page("conv-pages", 2)
+    third, last_has_more, _ = load_selection_page("conv-pages", 3)
+
+    assert [m["index"] for m in first] == list(range(1, PAGE_SIZE + 1))
+    assert has_more and not changed
+    assert second[0]["index"] == PAGE_SIZE + 1
+    assert len(third) == 5 and not last_has_more
+    assert [m["event_id"] for m in get_selection_snapshot("conv-pages")] == calendar
+
+
+def test_changed_earlier_pages_are_reread_and_shown_again(calendar):
+    load_selection_page("conv-changed", 1)
+    calendar.remove("event3")  # cancelled elsewhere after page 1 was shown
+
+    shown, _, changed = load_selection_page("conv-changed", 2)
+
+    assert changed
+    assert [m["index"] for m in shown] == list(range(1, 2 * PAGE_SIZE + 1))
+    snapshot = get_selection_snapshot("conv-changed")
+    assert "event3" not in [m["event_id"] for m in snapshot]
+    assert snapshot[2]["event_id"] == "event4"
+
+
+def test_page_past_the_end_keeps_the_previous_list(calendar):
+    load_selection_page("conv-end", 1)
+
+    assert load_selection_page("conv-end", 9) == ([], False, False)
+    assert len(get_selection_snapshot("conv-end")) == PAGE_SIZE
+
+
+
+def test_refresh_applies_only_this_conversations_changes(calendar):
+    load_selection_page("conv-refresh", 1)
+    moved = {"id": "event3", "summary": "Moved",
+             "start": {"dateTime": "2026-02-01T09:00:00+05:00"},
+             "end": {"dateTime": "2026-02-01T10:00:00+05:00"}, "attendees": []}
+
+    meeting_selector.refresh_selection_snapshot("conv-refresh", removed=["event2"], updated=[moved])
+
+    snapshot = {m["index"]: m for m in get_selection_snapshot("conv-refresh")}
+    assert 2 not in snapshot
+    assert snapshot[3]["event_id"] == "event3"
+    assert snapshot[3]["label"] == "Moved — 2026-02-01T09:00:00+05:00"
+    assert snapshot[3]["start"] == "2026-02-01T09:00:00+05:00"
+    # Entries this call did not touch stay as shown, whatever the mirror holds
+    assert snapshot[4]["label"] == "event4"
+    assert len(snapshot) == PAGE_SIZE - 1
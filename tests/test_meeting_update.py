@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+
+pytest.importorskip("agents")
+pytest.importorskip("googleapiclient")
+import offline_bench
+
+
+@pytest.fixture(scope="module")
+def harness():
+    harness = offline_bench.Harness(3)
+    yield harness
+    harness.close()
+
+
+def guests(harness, event_id):
+    return harness.calendar.calendar.events[event_id]["attendees"]
+
+
+def run(tool, conversation_id, **arguments):
+    return asyncio.run(offline_bench.call_tool(tool, conversation_id, **arguments))
+
+
+@pytest.fixture
+def selection(harness):
+    from calendar_setup import get_event_store
+    from meeting_selector import get_selection_snapshot
+    from my_agents.meeting_update import update_meeting
+
+    for event_id in harness.calendar.calendar.events:
+        guests(harness, event_id)[:] = [{"email": f"guest-{event_id}@example.com",
+                                         "comment": "Running late", "additionalGuests": 2}]
+    store = get_event_store()
+    store._sync_token = None  # full sync for the list below
+    run(update_meeting, "conv-update")  # shows the numbered list
+    # Forget the mirror, as after an eviction or before the next sync
+    store._events.clear()
+    store._changed()
+    return [m["event_id"] for m in get_selection_snapshot("conv-update")]
+
+
+def test_update_meeting_keeps_existing_guests_and_their_details(harness, selection):
+    from my_agents.meeting_update import update_meeting
+
+    result = run(update_meeting, "conv-update", selection_number=1, add_attendees=["zara@example.com"])
+
+    assert result["status"] == "Updated"
+    existing, added = guests(harness, selection[0])
+    assert existing["comment"] == "Running late" and existing["additionalGuests"] == 2
+    assert added["email"] == "zara@example.com"
+
+
+def test_update_meetings_keeps_existing_guests_with_a_cold_mirror(harness, selection):
+    from my_agents.meeting_update import update_meetings
+
+    result = run(update_meetings, "conv-update", selection_numbers=[2, 3], add_attendees=["sam@example.com"])
+
+    assert result["status"] == "Updated"
+    for event_id in selection[1:3]:
+        emails = [a["email"] for a in guests(harness, event_id)]
+        assert len(emails) == 2 and emails[-1] == "sam@example.com"
+        assert guests(harness, event_id)[0]["comment"] == "Running late"
@@ -0,0 +1,31 @@
+import threading
+from notification_outbox import NotificationOutbox
+
+
+def test_message_queued_during_a_dispatch_is_sent_without_waiting_for_the_poll(tmp_path):
+    first_batch_started = threading.Event()
+    release_first_batch = threading.Event()
+    sent = []
+    delivered = threading.Event()
+
+    def sender(messages):
+        if not sent:
+            first_batch_started.set()
+            release_first_batch.wait(5)
+        sent.extend(to for to, _, _ in messages)
+        if len(sent) == 2:
+            delivered.set()
+        return [{"status": "Sent"} for _ in messages]
+
+    # A poll interval far longer than the test: only the wakeup can deliver the second message
+    outbox = NotificationOutbox(str(tmp_path / "outbox.db"), sender=sender, poll_interval=60)
+    try:
+        outbox.enqueue([("a@example.com", "Hi", "Body")])
+        assert first_batch_started.wait(5)
+        outbox.enqueue([("b@example.com", "Hi", "Body")])
+        release_first_batch.set()
+
+        assert delivered.wait(5)
+    finally:
+        outbox.stop(timeout=5)
+    assert sent == ["a@example.com", "b@example.com"]
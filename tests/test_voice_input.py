@@ -0,0 +1,79 @@
+import os
+import numpy as np
+import pytest
+
+pytest.importorskip("soundfile")
+from voice_input import SAMPLE_RATE, EnergyVAD, WavFileSource, capture_utterance, load_wav
+
+# Regenerate with tests/fixtures/make_fixtures.py
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FRAME_LEN = SAMPLE_RATE * 30 // 1000
+
+
+def fixture(name):
+    return os.path.join(FIXTURES, name)
+
+
+def energy_vad():
+    # The energy path is deterministic; webrtcvad, when installed, is not what we test here
+    return EnergyVAD(use_webrtc=False)
+
+
+def test_load_wav_keeps_the_trailing_partial_frame():
+    audio = load_wav(fixture("speech_pause.wav"))
+
+    assert audio.dtype == np.float32
+    assert len(audio) == 3 * SAMPLE_RATE
+    assert np.abs(audio).max() <= 1.0
+
+
+def test_load_wav_handles_clips_shorter_than_a_frame_and_empty_files():
+    assert len(load_wav(fixture("short.wav"))) == SAMPLE_RATE // 100
+    assert load_wav(fixture("empty.wav")).size == 0
+
+
+def test_load_wav_mixes_down_and_resamples():
+    audio = load_wav(fixture("stereo_44k.wav"))
+
+    assert abs(len(audio) - int(1.5 * SAMPLE_RATE)) <= 1
+
+
+def test_frames_are_full_length_with_a_zero_padded_tail():
+    frames = list(WavFileSource(fixture("short.wav")).frames())
+
+    assert len(frames) == 1
+    assert len(frames[0]) == FRAME_LEN
+    assert not frames[0][SAMPLE_RATE // 100:].any()
+    assert list(WavFileSource(fixture("empty.wav")).frames()) == []
+
+
+def test_energy_vad_separates_speech_from_background_noise():
+    vad = energy_vad()
+    flags = [vad.is_speech(frame) for frame in WavFileSource(fixture("speech_pause.wav")).frames()]
+
+    # 0.6 s of noise (20 frames), 0.9 s of speech (30 frames), then noise
+    assert not any(flags[:20])
+    assert sum(flags[20:50]) >= 27
+    assert not any(flags[52:])
+
+
+def test_capture_utterance_stops_after_the_pause():
+    audio = capture_utterance(WavFileSource(fixture("speech_pause.wav")), vad=energy_vad(),
+                              silence_ms=300, pre_roll_ms=90)
+
+    # 3 frames of pre-roll + 0.9 s of speech + 300 ms of trailing silence
+    assert 1.1 * SAMPLE_RATE <= len(audio) <= 1.4 * SAMPLE_RATE
+
+
+def test_capture_utterance_gives_up_when_nobody_speaks():
+    audio = capture_utterance(WavFileSource(fixture("silence.wav")), vad=energy_vad(),
+                              start_timeout=1.0)
+
+    assert audio.size == 0
+
+
+def test_capture_utterance_on_an_empty_file():
+    audio = capture_utterance(WavFileSource(fixture("empty.wav")), vad=energy_vad())
+
+    assert audio.dtype == np.float32
+    assert audio.size == 0
@@ -1,30 +1,260 @@
-import sounddevice as sd
+import os
+import threading
+from collections import deque
 import numpy as np
-import tempfile
-import soundfile as sf
-import whisper
 
-# Load Whisper model once
-_whisper_model = whisper.load_model("base")
+SAMPLE_RATE = 16000  # Whisper expects 16 kHz mono
+FRAME_MS = 30
 
+# ASR backend, chosen per deployment (see benchmarks/asr_bench.py):
+#   ASR_ENGINE  = whisper | faster-whisper
+#   ASR_MODEL   = tiny | base | small | ... (Whisper model size)
+#   ASR_COMPUTE = fp32 | int8
+ASR_ENGINES = ("whisper", "faster-whisper")
+ASR_COMPUTE_TYPES = ("fp32", "int8")
 
-def record_audio(duration=8, fs=16000, device=None):
+# Models are imported and loaded on first use, not at import time; one per configuration
+_asr_models = {}
+_asr_lock = threading.Lock()
+
+
+def asr_config(engine=None, model=None, compute=None):
+    """
+    Returns the (engine, model, compute) triple, filling gaps from the environment.
+    """
+    engine = engine or os.getenv("ASR_ENGINE", "whisper")
+    model = model or os.getenv("ASR_MODEL", "base")
+    compute = compute or os.getenv("ASR_COMPUTE", "fp32")
+    if engine not in ASR_ENGINES:
+        raise ValueError(f"Unknown ASR engine {engine!r}, expected one of {ASR_ENGINES}")
+    if compute not in ASR_COMPUTE_TYPES:
+        raise ValueError(f"Unknown ASR compute type {compute!r}, expected one of {ASR_COMPUTE_TYPES}")
+    return engine, model, compute
+
+
+class WhisperASR:
+    """
+    openai-whisper on CPU. int8 applies dynamic quantization to the Linear layers.
+    """
+
+    def __init__(self, model, compute):
+        import whisper
+        self.model = whisper.load_model(model, device="cpu")
+        if compute == "int8":
+            import torch
+            self.model = torch.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    def transcribe(self, audio):
+        return self.model.transcribe(audio, fp16=False)["text"].strip()
+
+
+class FasterWhisperASR:
+    """
+    faster-whisper (CTranslate2) on CPU.
+    """
+
+    def __init__(self, model, compute):
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(model, device="cpu",
+                                  compute_type="int8" if compute == "int8" else "float32")
+
+    def transcribe(self, audio):
+        segments, _ = self.model.transcribe(audio)
+        return "".join(segment.text for segment in segments).strip()
+
+
+def get_asr_model(engine=None, model=None, compute=None):
+    """
+    Returns the process-wide ASR model for a configuration, loading it on first call.
+    """
+    config = asr_config(engine, model, compute)
+    with _asr_lock:
+        if config not in _asr_models:
+            backend = WhisperASR if config[0] == "whisper" else FasterWhisperASR
+            _asr_models[config] = backend(config[1], config[2])
+        return _asr_models[config]
+
+
+# ---------- Audio sources ----------
+
+class MicrophoneSource:
+    """
+    Yields int16 mono frames of `frame_ms` from the microphone until the consumer stops.
+    """
+
+    def __init__(self, fs=SAMPLE_RATE, frame_ms=FRAME_MS, device=None):
+        self.fs = fs
+        self.frame_len = fs * frame_ms // 1000
+        self.device = device
+
+    def frames(self):
+        import sounddevice as sd
+        with sd.InputStream(samplerate=self.fs, channels=1, dtype='int16',
+                            blocksize=self.frame_len, device=self.device) as stream:
+            while True:
+                data, _ = stream.read(self.frame_len)
+                yield data[:, 0].copy()
+
+
+def load_wav(path, fs=SAMPLE_RATE):
+    """
+    Reads a WAV file as a float32 16 kHz mono buffer (fixtures, benchmarks).
+    An empty file gives an empty buffer.
+    """
+    return WavFileSource(path, fs=fs).read().astype(np.float32) / 32768.0
+
+
+class WavFileSource:
+    """
+    Yields frames from a prerecorded WAV file in place of the microphone (fixtures, tests).
+    Stereo files are mixed down and other sample rates are resampled to 16 kHz.
+    """
+
+    def __init__(self, path, fs=SAMPLE_RATE, frame_ms=FRAME_MS):
+        self.path = path
+        self.fs = fs
+        self.frame_len = fs * frame_ms // 1000
+
+    def read(self):
+        """
+        Returns the whole file as int16 mono samples at `fs`.
+        """
+        import soundfile as sf
+        audio, file_fs = sf.read(self.path, dtype='int16', always_2d=True)
+        if len(audio) == 0:
+            return np.zeros(0, dtype=np.int16)
+        audio = audio.mean(axis=1)
+        if file_fs != self.fs:
+            positions = np.arange(0, len(audio), file_fs / self.fs)
+            audio = np.interp(positions, np.arange(len(audio)), audio)
+        return audio.astype(np.int16)
+
+    def frames(self):
+        audio = self.read()
+        for offset in range(0, len(audio), self.frame_len):
+            frame = audio[offset:offset + self.frame_len]
+            if len(frame) < self.frame_len:
+                # Zero-pad the tail so the last partial frame is not dropped
+                frame = np.pad(frame, (0, self.frame_len - len(frame)))
+            yield frame
+
+
+# ---------- Voice activity detection ----------
+
+class EnergyVAD:
+    """
+    Voice activity detector for int16 frames.
+    Uses webrtcvad when installed (unless use_webrtc=False), otherwise an RMS
+    energy threshold relative to a running noise floor.
+    """
+
+    def __init__(self, fs=SAMPLE_RATE, aggressiveness=2, min_rms=300.0, noise_ratio=3.0,
+                 use_webrtc=True):
+        self.fs = fs
+        self.min_rms = min_rms
+        self.noise_ratio = noise_ratio
+        self.noise_floor = None
+        self._webrtc = None
+        if use_webrtc:
+            try:
+                import webrtcvad
+                self._webrtc = webrtcvad.Vad(aggressiveness)
+            except ImportError:
+                pass
+
+    def is_speech(self, frame):
+        if self._webrtc is not None:
+            return self._webrtc.is_speech(frame.astype(np.int16).tobytes(), self.fs)
+        rms = float(np.sqrt(np.mean(frame.astype(np.float32) ** 2)))
+        if self.noise_floor is None:
+            self.noise_floor = rms
+        speech = rms > max(self.min_rms, self.noise_floor * self.noise_ratio)
+        if not speech:
+            # Track background noise slowly so a noisy room doesn't count as speech
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+        return speech
+
+
+def capture_utterance(source, vad=None, silence_ms=700, max_seconds=15.0,
+                      start_timeout=5.0, pre_roll_ms=300, frame_ms=FRAME_MS):
+    """
+    Reads frames from `source` until the speaker stops talking.
+    Stops after `silence_ms` of silence following speech, after `max_seconds`,
+    or after `start_timeout` seconds without any speech.
+    Returns float32 audio in [-1, 1] ready for Whisper (empty if nobody spoke).
+    """
+    vad = vad or EnergyVAD(fs=source.fs)
+    pre_roll = deque(maxlen=max(1, pre_roll_ms // frame_ms))
+    captured = []
+    heard_speech = False
+    silent_frames = 0
+    elapsed_ms = 0
+
+    frames = source.frames()
+    try:
+        for frame in frames:
+            elapsed_ms += frame_ms
+            speech = vad.is_speech(frame)
+            if not heard_speech:
+                pre_roll.append(frame)
+                if speech:
+                    heard_speech = True
+                    captured.extend(pre_roll)
+                elif elapsed_ms >= start_timeout * 1000:
+                    break
+            else:
+                captured.append(frame)
+                silent_frames = 0 if speech else silent_frames + 1
+                if silent_frames * frame_ms >= silence_ms:
+                    break
+            if elapsed_ms >= max_seconds * 1000:
+                break
+    finally:
+        frames.close()
+
+    if not captured:
+        return np.zeros(0, dtype=np.float32)
+    return np.concatenate(captured).astype(np.float32) / 32768.0
+
+
+# ---------- Recording / transcription ----------
+
+def record_audio(duration=8, fs=SAMPLE_RATE, device=None):
     """
     Records audio from the microphone for `duration` seconds.
     """
+    import sounddevice as sd
     recording = sd.rec(int(duration * fs), samplerate=fs,
                        channels=1, dtype='int16', device=device)
     sd.wait()
     return recording
 
 
-def render_voice_input(duration=5):
+def transcribe_audio(audio, engine=None, model=None, compute=None):
+    """
+    Transcribes a float32 16 kHz NumPy buffer in memory (no temp file)
+    with the configured ASR backend.
+    """
+    if audio.size == 0:
+        return ""
+    return get_asr_model(engine, model, compute).transcribe(audio)
+
+
+def record_utterance(duration=5, streaming=True, source=None):
+    """
+    Records audio and returns it as a float32 16 kHz buffer (no transcription).
+    streaming=True stops at the end of speech (voice activity detection), with
+    `duration` as an upper bound; otherwise records for exactly `duration` seconds.
+    source: audio source to read instead of the microphone (e.g. WavFileSource).
+    """
+    if streaming:
+        return capture_utterance(source or MicrophoneSource(), max_seconds=duration)
+    return record_audio(duration=duration)[:, 0].astype(np.float32) / 32768.0
+
+
+def render_voice_input(duration=5, streaming=True, source=None):
     """
-    Records audio and returns transcribed text.
+    Records audio and returns transcribed text, transcribing in this thread.
     """
-    audio = record_audio(duration=duration)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-        sf.write(tmp.name, audio, 16000)
-        result = _whisper_model.transcribe(tmp.name)
-    text = result["text"].strip()
-    return text
+    return transcribe_audio(record_utterance(duration, streaming, source))